@@ -1,4 +1,5 @@
 import os
+import json
 from anthropic import Anthropic
 from dotenv import load_dotenv
 
@@ -6,6 +7,12 @@ load_dotenv()
 
 client = Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
 
+# Sonnet 4 list prices, USD per million tokens (for throughput-per-dollar reporting)
+PRICE_PER_MTOK = {'input': 3.00, 'output': 15.00}
+
+# Companies packed into one sector-sweep request
+SWEEP_MAX_COMPANIES = 30
+
 def analyze_financial_health(ticker, fundamental_data):
     """
     Analyze company's financial health based on key metrics
@@ -39,7 +46,13 @@ Be specific and actionable. Write like you're texting a fellow analyst."""
 def analyze_peer_comparison(ticker, peer_data):
     """
     Compare company against peers
+    Large peer sets are sent as a bounded CSV (see analyze_peer_set)
     """
+    from peer_ranking import COMPACT_THRESHOLD
+
+    if len(peer_data) > COMPACT_THRESHOLD:
+        return analyze_peer_set(ticker, peer_data)
+
     # Format peer data for prompt
     comparison_text = ""
     for company, metrics in peer_data.items():
@@ -73,21 +86,77 @@ Be direct and specific."""
         return f"Error: {str(e)}"
 
 
-def analyze_price_trend(ticker, stock_data):
+def analyze_peer_set(ticker, peer_data):
+    """
+    Compare company against a large peer set with a prompt of bounded size
+    Peers are pre-ranked by similarity; only the nearest are listed, the rest
+    contribute through sector aggregates
+    """
+    from peer_ranking import compact_peer_prompt_data
+
+    peers_csv, aggregates_csv, omitted = compact_peer_prompt_data(ticker, peer_data)
+
+    prompt = f"""Compare {ticker} vs its sector peer set ({len(peer_data) - 1} peers).
+
+{ticker} and its nearest peers by size and metrics (mcap_b = market cap in $B; margin, roe and rev_growth are fractions; chg_30d_pct is in percent; blank = not available):
+```csv
+{peers_csv}```
+
+Distribution across all {len(peer_data)} companies ({omitted} not listed above), with {ticker}'s percentile:
+```csv
+{aggregates_csv}```
+
+Provide analysis (200 words max):
+1. **Relative Valuation**: Where does {ticker} stand on P/E and EV/EBITDA within the sector?
+2. **Competitive Position**: Leader or laggard on margins, returns and growth?
+3. **Investment Implication**: Which listed company looks most attractive and why?
+
+Be direct and specific."""
+
+    try:
+        message = client.messages.create(
+            model="claude-sonnet-4-20250514",
+            max_tokens=1000,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return message.content[0].text
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
+def analyze_price_trend(ticker, stock_data, technicals=None):
     """
     Analyze recent price action
+    technicals: optional dict ticker -> stats from technicals.compute_technicals (peers included)
     """
+    technicals_text = ""
+    if technicals and ticker in technicals:
+        from technicals import TECHNICAL_LABELS, format_technical
+        stats = technicals[ticker]
+        technicals_text = "\nTechnicals (daily bars, 1 year):\n" + "\n".join(
+            f"- {label}: {format_technical(column, stats.get(column))}"
+            for column, label in TECHNICAL_LABELS.items()
+        ) + "\n"
+        peers = [symbol for symbol in technicals if symbol != ticker]
+        if peers:
+            technicals_text += "\nPeers (3M return / RSI / vs 200D MA):\n" + "\n".join(
+                f"- {symbol}: {format_technical('return_3m', technicals[symbol].get('return_3m'))} / "
+                f"{format_technical('rsi', technicals[symbol].get('rsi'))} / "
+                f"{format_technical('vs_ma200', technicals[symbol].get('vs_ma200'))}"
+                for symbol in peers
+            ) + "\n"
+    
     prompt = f"""Analyze {ticker}'s recent price action:
 
 - Current Price: ${stock_data['current_price']}
 - 30-Day Change: {stock_data['price_change_pct_30d']}%
 - 30-Day High: ${stock_data['high_30d']}
 - 30-Day Low: ${stock_data['low_30d']}
-
+{technicals_text}
 Brief analysis (100 words):
-1. **Trend**: What's the momentum? Bullish/bearish/sideways?
-2. **Position in Range**: Trading near highs, lows, or middle?
-3. **Technical Take**: Simple observation on price action.
+1. **Trend**: What's the momentum across horizons? Bullish/bearish/sideways?
+2. **Position in Range**: Trading near highs, lows, or middle? Stretched vs its moving averages?
+3. **Technical Take**: Simple observation on volatility, RSI or volume, and relative strength vs peers if given.
 
 Keep it conversational."""
 
@@ -102,25 +171,49 @@ Keep it conversational."""
         return f"Error: {str(e)}"
 
 
-def analyze_news_sentiment(ticker, news_articles):
+def analyze_news_sentiment(ticker, news_articles, sentiment=None):
     """
     Analyze sentiment from recent news
+    sentiment: local lexicon pre-pass (news_sentiment.score_news); with no clear
+    signal the Claude call is skipped, with a weak one it gets a shorter brief
     """
     if not news_articles:
         return "No recent news articles found."
+
+    from news_sentiment import format_score
+
+    if sentiment and sentiment['strength'] == 'none':
+        return (f"**Overall Sentiment**: No clear signal. Lexicon score {format_score(sentiment)} across "
+                f"{len(news_articles)} headlines is too thin for a read, so the AI sentiment call was skipped.")
+
+    brief = bool(sentiment) and sentiment['strength'] == 'weak'
+    if brief:
+        # Only the most opinionated headlines are worth Claude's time
+        order = sorted(range(len(news_articles)), key=lambda i: -abs(sentiment['articles'][i]))[:3]
+        selected = [news_articles[i] for i in sorted(order)]
+    else:
+        selected = news_articles[:5]
     
     # Extract headlines and descriptions
     news_text = ""
-    for i, article in enumerate(news_articles[:5], 1):
-        news_text += f"{i}. {article['title']}\n"
+    for i, article in enumerate(selected, 1):
+        copies = article.get('duplicates', 0)
+        news_text += f"{i}. {article['title']}" + (f" (also carried by {copies} other outlets)" if copies else "") + "\n"
         if article['description']:
             news_text += f"   {article['description']}\n"
         news_text += "\n"
     
-    prompt = f"""Analyze sentiment for {ticker} based on these recent headlines:
+    score_line = f"\nLocal lexicon score: {format_score(sentiment)}\n" if sentiment else ""
+
+    if brief:
+        prompt = f"""Recent headlines for {ticker} lean only slightly one way:
 
-{news_text}
+{news_text}{score_line}
+In 60 words max: overall sentiment and the one theme worth watching."""
+    else:
+        prompt = f"""Analyze sentiment for {ticker} based on these recent headlines:
 
+{news_text}{score_line}
 Provide (150 words):
 1. **Overall Sentiment**: Bullish, bearish, or neutral?
 2. **Key Themes**: What's driving the narrative?
@@ -128,6 +221,40 @@ Provide (150 words):
 
 Be concise and specific."""
 
+    try:
+        message = client.messages.create(
+            model="claude-sonnet-4-20250514",
+            max_tokens=300 if brief else 800,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return message.content[0].text
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
+def analyze_risk_factor_changes(ticker, risk_diff):
+    """
+    Analyze year-over-year changes in Item 1A risk factors
+    risk_diff: output of SECParser.diff_risk_factors
+    """
+    from sec_diff import format_diff_for_prompt
+    
+    if not (risk_diff['added'] or risk_diff['modified'] or risk_diff['removed']):
+        return "Risk factors are unchanged from the prior 10-K."
+    
+    stats = risk_diff['stats']
+    prompt = f"""Here is what changed in {ticker}'s 10-K risk factors versus last year's filing.
+{risk_diff.get('unchanged_count', 0)} of {stats['new_paragraphs']} paragraphs are unchanged and omitted.
+
+{format_diff_for_prompt(risk_diff)}
+
+Provide analysis (150 words max):
+1. **New Risks**: What has the company started warning about?
+2. **Shifted Emphasis**: Which existing risks were reworded in a meaningful way?
+3. **Dropped Risks**: Anything removed that signals an improved situation?
+
+Ignore purely cosmetic edits. Be direct and specific."""
+
     try:
         message = client.messages.create(
             model="claude-sonnet-4-20250514",
@@ -139,6 +266,49 @@ Be concise and specific."""
         return f"Error: {str(e)}"
 
 
+# BM25 queries for analyze_10k: the passages of each section most worth the token budget
+FILING_QUERIES = {
+    'risk_factors': "competition supply chain customer concentration regulation export controls litigation demand decline",
+    'mda': "revenue growth gross margin operating expenses outlook guidance liquidity segment results",
+}
+
+
+def analyze_10k(ticker, parser, file_path):
+    """
+    Key risks and management's view from a 10-K
+    Risk Factors and MD&A go in as their passages most relevant to FILING_QUERIES,
+    at a fixed token budget each, instead of the first pages of each section
+    parser: SECParser; file_path: filing document from get_latest_10k
+    """
+    risks = parser.extract_risk_factors(file_path, query=FILING_QUERIES['risk_factors'])
+    mda = parser.extract_mda(file_path, query=FILING_QUERIES['mda'])
+
+    prompt = f"""Here are the most relevant passages from {ticker}'s latest 10-K.
+
+RISK FACTORS (Item 1A):
+{risks}
+
+MANAGEMENT'S DISCUSSION AND ANALYSIS (Item 7):
+{mda}
+
+Provide analysis (200 words max):
+1. **Material Risks**: The 3 risks most likely to affect results, and why
+2. **Management's View**: What drove results and what management expects
+3. **Watch Items**: What to monitor in the next filing
+
+Quote figures from the passages where possible. Be direct and specific."""
+
+    try:
+        message = client.messages.create(
+            model="claude-sonnet-4-20250514",
+            max_tokens=1000,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return message.content[0].text
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
 def generate_investment_summary(ticker, all_analyses):
     """
     Generate comprehensive investment summary
@@ -175,6 +345,78 @@ Write like you're advising a friend."""
         return f"Error: {str(e)}"
 
 
+def usage_cost(message):
+    """Returns: dict with input/output tokens and cost_usd of one API response"""
+    input_tokens, output_tokens = message.usage.input_tokens, message.usage.output_tokens
+    return {
+        'input_tokens': input_tokens,
+        'output_tokens': output_tokens,
+        'cost_usd': (input_tokens * PRICE_PER_MTOK['input'] + output_tokens * PRICE_PER_MTOK['output']) / 1e6,
+    }
+
+
+def analyze_sector_sweep(sector, company_data, sector_data=None):
+    """
+    Verdicts for a group of companies from one request with a shared sector context
+    company_data: ticker -> metrics (get_comprehensive_peer_data format), at most SWEEP_MAX_COMPANIES
+    sector_data: the whole sector when company_data is one batch of it (feeds the aggregates)
+    Returns: dict with sector_view, companies {ticker: {verdict, score, thesis}}, ranking
+             (best first) and usage; 'error' instead of the analysis if the call or its JSON fails
+    """
+    from peer_ranking import peer_frame, metrics_csv, aggregates_csv
+
+    if len(company_data) > SWEEP_MAX_COMPANIES:
+        raise ValueError(f"A sweep covers at most {SWEEP_MAX_COMPANIES} companies, got {len(company_data)}")
+
+    sector_frame = peer_frame(sector_data or company_data)
+    prompt = f"""You are covering the {sector} sector. Assess each company below relative to the sector.
+
+Companies (mcap_b = market cap in $B; margin, roe and rev_growth are fractions; chg_30d_pct is in percent; blank = not available):
+```csv
+{metrics_csv(peer_frame(company_data))}```
+
+Sector distribution across {len(sector_frame)} companies:
+```csv
+{aggregates_csv(sector_frame)}```
+
+Reply with JSON only, in this shape:
+{{"sector_view": "2-3 sentences on the sector as a whole",
+ "companies": [{{"ticker": "...", "verdict": "buy|hold|avoid", "score": 1-10, "thesis": "one sentence citing the metrics"}}],
+ "ranking": ["tickers, most attractive first"]}}
+Include every ticker exactly once in both lists."""
+
+    try:
+        message = client.messages.create(
+            model="claude-sonnet-4-20250514",
+            max_tokens=400 + 90 * len(company_data),
+            messages=[{"role": "user", "content": prompt}]
+        )
+        text = message.content[0].text
+        parsed = json.loads(text[text.index('{'):text.rindex('}') + 1])
+    except Exception as e:
+        return {'error': f"Error: {str(e)}", 'companies': {}, 'ranking': []}
+
+    def as_list(value):
+        return value if isinstance(value, list) else []
+
+    # Model output is not trusted: rows that are not objects or lack a known ticker are skipped
+    companies = {}
+    for row in as_list(parsed.get('companies')):
+        if not isinstance(row, dict):
+            continue
+        ticker = str(row.get('ticker') or '').upper()
+        if ticker in company_data:
+            companies[ticker] = {'verdict': row.get('verdict', 'N/A'), 'score': row.get('score', 'N/A'), 'thesis': row.get('thesis', '')}
+    ranking = list(dict.fromkeys(str(t).upper() for t in as_list(parsed.get('ranking')) if str(t).upper() in companies))
+    return {
+        'sector_view': parsed.get('sector_view', ''),
+        'companies': companies,
+        'ranking': ranking + [t for t in companies if t not in ranking],
+        'missing': [t for t in company_data if t not in companies],
+        'usage': usage_cost(message),
+    }
+
+
 # Test
 if __name__ == "__main__":
     from data_fetchers import (
@@ -190,29 +432,38 @@ if __name__ == "__main__":
     ticker = "NVDA"
     
     # Get data
-    print(f"\n[1/5] Fetching data for {ticker}...")
+    print(f"\n[1/6] Fetching data for {ticker}...")
     stock_data = get_stock_data(ticker)
     fund_data = get_fundamental_data(ticker)
     news = get_company_news(ticker, "NVIDIA")
     peers = get_comprehensive_peer_data(ticker, ["AMD", "INTC"])
     
     # Run analyses
-    print("\n[2/5] Analyzing financial health...")
+    print("\n[2/6] Analyzing financial health...")
     health = analyze_financial_health(ticker, fund_data)
     print(health[:150] + "...")
     
-    print("\n[3/5] Analyzing peer comparison...")
+    print("\n[3/6] Analyzing peer comparison...")
     peer_analysis = analyze_peer_comparison(ticker, peers)
     print(peer_analysis[:150] + "...")
     
-    print("\n[4/5] Analyzing price trend...")
+    print("\n[4/6] Analyzing price trend...")
     trend = analyze_price_trend(ticker, stock_data)
     print(trend[:150] + "...")
     
-    print("\n[5/5] Analyzing news sentiment...")
+    print("\n[5/6] Analyzing news sentiment...")
     sentiment = analyze_news_sentiment(ticker, news)
     print(sentiment[:150] + "...")
     
+    print("\n[6/6] Analyzing the latest 10-K...")
+    from sec_parser import SECParser
+    parser = SECParser(verbose=False)
+    filing_info = parser.get_latest_10k(ticker)
+    if "error" in filing_info:
+        print(f"❌ {filing_info['error']}")
+    else:
+        print(analyze_10k(ticker, parser, filing_info['file_path'])[:150] + "...")
+    
     print("\n" + "="*60)
     print("AI ANALYSIS TEST COMPLETE ✅")
     print("="*60)
\ No newline at end of file
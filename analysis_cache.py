@@ -0,0 +1,301 @@
+import os
+import json
+import math
+import sqlite3
+import hashlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from fetch_cache import record_lookup
+
+ANALYSIS_CACHE_DB = os.getenv('ANALYSIS_CACHE_DB', 'analysis_cache.db')
+
+# Per analysis: how long a stored text may be reused, and how coarsely each input is bucketed
+#   ('rel', 0.05)  log-spaced buckets ~5% wide (ratios, prices)
+#   ('abs', 1.0)   fixed-width bands in the input's own unit (percent points, fractions)
+#   inputs without a rule must match exactly
+# Values near a bucket edge can still land in different buckets; the age limit bounds staleness
+TOLERANCES = {
+    'health_analysis': {
+        'max_age_minutes': 24 * 60,
+        'inputs': {
+            'pe_ratio': ('rel', 0.05),
+            'ev_to_ebitda': ('rel', 0.05),
+            'profit_margin': ('abs', 0.005),
+            'roe': ('abs', 0.01),
+            'revenue_growth_yoy': ('abs', 0.01),
+        },
+    },
+    'trend_analysis': {
+        'max_age_minutes': 4 * 60,
+        'inputs': {
+            'current_price': ('rel', 0.01),
+            'price_change_pct_30d': ('abs', 1.0),
+            'high_30d': ('rel', 0.01),
+            'low_30d': ('rel', 0.01),
+            'return_3m': ('abs', 0.02),
+            'rsi': ('abs', 5.0),
+            'vs_ma50': ('abs', 0.02),
+            'vs_ma200': ('abs', 0.02),
+            'volatility_1m': ('rel', 0.10),
+        },
+    },
+    # Reused only when every upstream text is identical (i.e. they were reused too)
+    'investment_summary': {
+        'max_age_minutes': 4 * 60,
+        'inputs': {},
+    },
+}
+
+# A section whose exact inputs are unchanged reuses its last text for this long
+SECTION_MAX_AGE_MINUTES = 24 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sections (
+    ticker TEXT NOT NULL,
+    analysis TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    text TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (ticker, analysis)
+);
+CREATE TABLE IF NOT EXISTS analyses (
+    analysis TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    input_key TEXT NOT NULL,
+    inputs TEXT NOT NULL,
+    text TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (analysis, ticker, input_key)
+);
+"""
+
+
+def analysis_cache_enabled():
+    """The cache is opt-in: ANALYSIS_CACHE=on"""
+    return os.getenv('ANALYSIS_CACHE', 'off') == 'on'
+
+
+def _number(value):
+    """Input value -> float ('12.34%' -> 0.1234), or None when it is not numeric"""
+    if isinstance(value, str) and value.endswith('%'):
+        try:
+            return float(value[:-1]) / 100
+        except ValueError:
+            return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+        return float(value)
+    return None
+
+
+def quantize(value, rule):
+    """Bucket label for one input under a tolerance rule (the value itself when exact or non-numeric)"""
+    number = _number(value)
+    if rule is None or number is None:
+        return value if isinstance(value, (str, int, float, bool)) or value is None else str(value)
+
+    kind, step = rule
+    if kind == 'abs':
+        return round(number / step)
+    if number == 0:
+        return 0
+    return ('-' if number < 0 else '+') + str(round(math.log(abs(number)) / math.log1p(step)))
+
+
+def analysis_inputs(key, ticker, data, upstream=None):
+    """
+    The inputs an analysis reads, flattened to name -> value
+    Returns: dict, or None for analyses the cache does not cover
+    """
+    if key == 'health_analysis':
+        fund_data = data['fund_data']
+        return {field: fund_data.get(field) for field in ('pe_ratio', 'ev_to_ebitda', 'profit_margin', 'roe', 'revenue_growth_yoy')}
+    if key == 'trend_analysis':
+        stock_data = data['stock_data']
+        technicals = data.get('technicals', {})
+        stats = technicals.get(ticker, {})
+        return {
+            **{field: stock_data.get(field) for field in ('current_price', 'price_change_pct_30d', 'high_30d', 'low_30d')},
+            **{column: stats.get(column) for column in ('return_3m', 'rsi', 'vs_ma50', 'vs_ma200', 'volatility_1m')},
+            'peers': ','.join(sorted(symbol for symbol in technicals if symbol != ticker)),
+        }
+    if key == 'investment_summary' and upstream:
+        return {name: hashlib.sha1(text.encode('utf-8')).hexdigest() for name, text in sorted(upstream.items())}
+    return None
+
+
+def section_inputs(key, ticker, data, upstream=None):
+    """Everything a section's prompt is built from, for exact change detection"""
+    if key == 'health_analysis':
+        return data['fund_data']
+    if key == 'trend_analysis':
+        stock_data = {field: value for field, value in data['stock_data'].items() if field != 'chart_data'}
+        return {'stock_data': stock_data, 'technicals': data.get('technicals', {})}
+    if key == 'peer_analysis':
+        return data['peer_data']
+    if key == 'news_analysis':
+        return {
+            'keys': [article.get('key') for article in data['news']],
+            'duplicates': [article.get('duplicates', 0) for article in data['news']],
+            'sentiment': data.get('news_sentiment'),
+        }
+    if key == 'investment_summary':
+        return upstream
+    raise ValueError(f"Unknown analysis: {key}")
+
+
+def input_fingerprint(inputs):
+    """Stable hash of a section's inputs"""
+    return hashlib.sha1(json.dumps(inputs, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class AnalysisCache:
+    """
+    Reuse analysis texts across runs, in SQLite shared by the app, job workers and batch scripts
+    - sections: each ticker's latest text per analysis with an exact fingerprint of its inputs
+    - analyses: texts keyed on (analysis, ticker, bucketed inputs), for inputs that
+      only moved within tolerance (opt-in, ANALYSIS_CACHE=on)
+    """
+
+    def __init__(self, db_path=ANALYSIS_CACHE_DB, tolerances=TOLERANCES):
+        self.db_path = db_path
+        self.tolerances = tolerances
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.row_factory = sqlite3.Row
+            yield conn
+        finally:
+            conn.close()
+
+    def input_key(self, key, inputs):
+        """Returns: (hash of the bucketed inputs, the bucketed inputs)"""
+        rules = self.tolerances[key]['inputs']
+        buckets = {name: quantize(value, rules.get(name)) for name, value in sorted(inputs.items())}
+        return hashlib.sha1(json.dumps(buckets, sort_keys=True).encode('utf-8')).hexdigest(), buckets
+
+    def get(self, key, ticker, inputs):
+        """Stored text for near-identical inputs within the analysis's age limit, or None"""
+        input_key, _ = self.input_key(key, inputs)
+        cutoff = (datetime.now() - timedelta(minutes=self.tolerances[key]['max_age_minutes'])).isoformat(timespec='seconds')
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT text FROM analyses WHERE analysis = ? AND ticker = ? AND input_key = ? AND created_at >= ?",
+                (key, ticker, input_key, cutoff),
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE analyses SET hits = hits + 1 WHERE analysis = ? AND ticker = ? AND input_key = ?",
+                             (key, ticker, input_key))
+        return row['text'] if row else None
+
+    def put(self, key, ticker, inputs, text):
+        """Store a finished analysis (error texts are not stored)"""
+        if not text or text.startswith("Error"):
+            return
+        input_key, buckets = self.input_key(key, inputs)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analyses (analysis, ticker, input_key, inputs, text, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, ticker, input_key, json.dumps(buckets), text, datetime.now().isoformat(timespec='seconds')),
+            )
+
+    def last_section(self, key, ticker, fingerprint):
+        """The section's last text if it was made from the same inputs (within SECTION_MAX_AGE_MINUTES), else None"""
+        cutoff = (datetime.now() - timedelta(minutes=SECTION_MAX_AGE_MINUTES)).isoformat(timespec='seconds')
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT text FROM sections WHERE ticker = ? AND analysis = ? AND fingerprint = ? AND created_at >= ?",
+                (ticker, key, fingerprint, cutoff),
+            ).fetchone()
+        return row['text'] if row else None
+
+    def save_section(self, key, ticker, fingerprint, text):
+        """Remember the section's latest text and input fingerprint (error texts are not kept)"""
+        if not text or text.startswith("Error"):
+            return
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sections (ticker, analysis, fingerprint, text, created_at) VALUES (?, ?, ?, ?, ?)",
+                (ticker, key, fingerprint, text, datetime.now().isoformat(timespec='seconds')),
+            )
+
+    def stats(self):
+        """Returns: dict analysis -> {'entries', 'hits'} over the stored texts"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT analysis, COUNT(*) AS entries, SUM(hits) AS hits FROM analyses GROUP BY analysis").fetchall()
+        return {row['analysis']: {'entries': row['entries'], 'hits': row['hits'] or 0} for row in rows}
+
+
+def cached_analyze(ticker, data, compute, refresh=False, cache=None, status=None):
+    """
+    Wrap compute(key, upstream) so covered analyses go through the cache
+    refresh: skip lookups (results are still stored)
+    status: optional dict, set to 'reused' for analyses served from the cache
+    Lookups are counted per analysis in fetch_cache.cache_stats() as 'analysis:<key>'
+    Returns: callable(key, upstream) for pipeline.iter_analyses
+    """
+    cache = cache or AnalysisCache()
+
+    def analyze(key, upstream):
+        inputs = analysis_inputs(key, ticker, data, upstream) if key in cache.tolerances else None
+        if inputs is None:
+            return compute(key, upstream)
+
+        text = None if refresh else cache.get(key, ticker, inputs)
+        record_lookup(f"analysis:{key}", text is not None)
+        if text is None:
+            text = compute(key, upstream)
+            cache.put(key, ticker, inputs, text)
+        elif status is not None:
+            status[key] = 'reused'
+        return text
+
+    return analyze
+
+
+def reuse_unchanged(ticker, data, analyze, refresh=False, cache=None, status=None):
+    """
+    Wrap analyze(key, upstream) so a section whose inputs are exactly unchanged since
+    its last run for this ticker keeps its text; the summary's inputs are the four
+    upstream texts, so it only reruns when one of them changed
+    status: optional dict, set to 'reused' for sections kept as they were
+    Returns: callable(key, upstream) for pipeline.iter_analyses
+    """
+    cache = cache or AnalysisCache()
+
+    def run(key, upstream):
+        fingerprint = input_fingerprint(section_inputs(key, ticker, data, upstream))
+        text = None if refresh else cache.last_section(key, ticker, fingerprint)
+        record_lookup(f"section:{key}", text is not None)
+        if text is not None:
+            if status is not None:
+                status[key] = 'reused'
+            return text
+
+        text = analyze(key, upstream)
+        cache.save_section(key, ticker, fingerprint, text)
+        return text
+
+    return run
+
+
+if __name__ == "__main__":
+    cache = AnalysisCache()
+    stats = cache.stats()
+
+    print("="*60)
+    print(f"Analysis cache: {ANALYSIS_CACHE_DB} ({'on' if analysis_cache_enabled() else 'off'}; ANALYSIS_CACHE=on enables it)")
+    with cache._connect() as conn:
+        sections, tickers = conn.execute("SELECT COUNT(*), COUNT(DISTINCT ticker) FROM sections").fetchone()
+    print(f"Section fingerprints: {sections} for {tickers} tickers (unchanged inputs reuse the last text)")
+    for key, settings in cache.tolerances.items():
+        row = stats.get(key, {'entries': 0, 'hits': 0})
+        served = row['hits'] + row['entries']
+        print(f"    {key:<20} {row['entries']:>5} texts  {row['hits']:>5} reuses  "
+              f"reuse rate {row['hits'] / max(1, served):.0%}  (max age {settings['max_age_minutes']} min)")
+    print("="*60)
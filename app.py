@@ -1,236 +1,17 @@
+import os
 import streamlit as st
 import pandas as pd
-from datetime import datetime
-from data_fetchers import (
-    get_stock_data,
-    get_fundamental_data,
-    get_company_news,
-    get_comprehensive_peer_data,
-    format_market_cap
-)
-from ai_analyzer import (
-    analyze_financial_health,
-    analyze_peer_comparison,
-    analyze_price_trend,
-    analyze_news_sentiment,
-    generate_investment_summary
-)
+from datetime import datetime, timedelta
+from data_fetchers import format_market_cap, FUNDAMENTALS
+from pipeline import data_version
+from job_queue import JobQueue
+from report import build_report
+from charts import CHART_RANGES, RANGE_LABELS, DEFAULT_CHART_RANGE, price_figure
+from technicals import TECHNICAL_LABELS, format_technical
+from quotes import get_quote_source, apply_quote
+from fundamentals_store import FundamentalsStore
+from peer_index import PeerIndex, PEER_INDEX_PATH
 
-# ADD THIS NEW FUNCTION HERE:
-def generate_html_report(ticker, company_name, sector, analyses, stock_data, fund_data, peer_data):
-    """Generate standalone HTML for printing/PDF export"""
-    
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <title>{ticker} Analysis Report</title>
-        <style>
-            body {{
-                font-family: 'Helvetica Neue', Arial, sans-serif;
-                margin: 40px;
-                color: #1e293b;
-                line-height: 1.6;
-            }}
-            .header {{
-                background: linear-gradient(135deg, #1e3a8a 0%, #3b82f6 100%);
-                color: white;
-                padding: 30px;
-                border-radius: 10px;
-                text-align: center;
-                margin-bottom: 30px;
-            }}
-            .company-info {{
-                background: #f8fafc;
-                padding: 20px;
-                border-left: 5px solid #2563eb;
-                margin: 20px 0;
-                border-radius: 8px;
-            }}
-            .quick-take {{
-                background: #fef3c7;
-                border-left: 5px solid #f59e0b;
-                padding: 20px;
-                margin: 20px 0;
-                border-radius: 8px;
-            }}
-            .quick-take h2 {{
-                color: #78350f;
-                margin-top: 0;
-            }}
-            .summary {{
-                background: #eff6ff;
-                border-left: 5px solid #2563eb;
-                padding: 20px;
-                margin: 20px 0;
-                border-radius: 8px;
-            }}
-            .section {{
-                margin: 30px 0;
-                page-break-inside: avoid;
-            }}
-            h1 {{
-                margin: 0;
-            }}
-            h2 {{
-                color: #1e3a8a;
-                border-bottom: 2px solid #e2e8f0;
-                padding-bottom: 10px;
-                page-break-after: avoid;
-                margin-top: 30px;
-            }}
-            .analysis-box {{
-                background: #f8fafc;
-                padding: 20px;
-                border: 1px solid #cbd5e1;
-                border-radius: 8px;
-                margin: 15px 0;
-                white-space: pre-wrap;
-            }}
-            .metrics {{
-                display: grid;
-                grid-template-columns: repeat(2, 1fr);
-                gap: 15px;
-                margin: 15px 0;
-            }}
-            .metric {{
-                padding: 10px;
-                background: white;
-                border-radius: 5px;
-            }}
-            .metric strong {{
-                display: block;
-                color: #64748b;
-                font-size: 0.9em;
-                margin-bottom: 5px;
-            }}
-            .metric-value {{
-                font-size: 1.2em;
-                font-weight: 600;
-                color: #1e293b;
-            }}
-            table {{
-                width: 100%;
-                border-collapse: collapse;
-                margin: 15px 0;
-                page-break-inside: avoid;
-            }}
-            th, td {{
-                padding: 12px;
-                text-align: left;
-                border: 1px solid #e2e8f0;
-            }}
-            th {{
-                background: #f1f5f9;
-                font-weight: 600;
-                color: #1e293b;
-            }}
-            tr:nth-child(even) {{
-                background: #f8fafc;
-            }}
-            .footer {{
-                margin-top: 50px;
-                padding-top: 20px;
-                border-top: 2px solid #e2e8f0;
-                text-align: center;
-                color: #64748b;
-                font-size: 0.9em;
-            }}
-            @media print {{
-                body {{ margin: 20px; }}
-                .no-print {{ display: none; }}
-                * {{
-                    -webkit-print-color-adjust: exact !important;
-                    print-color-adjust: exact !important;
-                }}
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h1>📊 Equity Analyst Assistant</h1>
-            <p>AI-Powered Stock Analysis Report</p>
-        </div>
-        
-        <div class="company-info">
-            <h1>{company_name} ({ticker})</h1>
-            <p style="margin: 5px 0; color: #64748b;">{sector}</p>
-            <p style="margin: 5px 0; font-size: 0.9em; color: #64748b;">Analysis generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}</p>
-        </div>
-        
-        <div class="quick-take">
-            <h2>📌 Quick Take</h2>
-            <div class="metrics">
-                <div class="metric">
-                    <strong>Price</strong>
-                    <div class="metric-value">${stock_data['current_price']}</div>
-                    <div style="color: {'#059669' if stock_data['price_change_pct_30d'] > 0 else '#dc2626'}; font-size: 0.9em;">
-                        {stock_data['price_change_pct_30d']:+.2f}% (30D)
-                    </div>
-                </div>
-                <div class="metric">
-                    <strong>Market Cap</strong>
-                    <div class="metric-value">{format_market_cap(fund_data['market_cap'])}</div>
-                </div>
-                <div class="metric">
-                    <strong>P/E Ratio</strong>
-                    <div class="metric-value">{fund_data['pe_ratio'] if isinstance(fund_data['pe_ratio'], str) else f"{fund_data['pe_ratio']:.2f}"}</div>
-                </div>
-                <div class="metric">
-                    <strong>Profit Margin</strong>
-                    <div class="metric-value">{fund_data['profit_margin']}</div>
-                </div>
-            </div>
-        </div>
-        
-        <div class="summary">
-            <h2>🎯 Investment Summary</h2>
-            <p style="margin: 10px 0; line-height: 1.8;">{analyses['investment_summary']}</p>
-        </div>
-        
-        <div class="section">
-            <h2>📊 Financial Health Analysis</h2>
-            <div class="analysis-box">{analyses['health_analysis']}</div>
-        </div>
-        
-        <div class="section">
-            <h2>🔄 Peer Comparison Analysis</h2>
-            <div class="analysis-box">{analyses['peer_analysis']}</div>
-        </div>
-        
-        <div class="section">
-            <h2>📈 Price Trend Analysis (30 Days)</h2>
-            <div class="metrics">
-                <div class="metric">
-                    <strong>30-Day High</strong>
-                    <div class="metric-value">${stock_data['high_30d']}</div>
-                </div>
-                <div class="metric">
-                    <strong>30-Day Low</strong>
-                    <div class="metric-value">${stock_data['low_30d']}</div>
-                </div>
-            </div>
-            <div class="analysis-box">{analyses['trend_analysis']}</div>
-        </div>
-        
-        <div class="section">
-            <h2>📰 News & Sentiment Analysis</h2>
-            <div class="analysis-box">{analyses['news_analysis']}</div>
-        </div>
-        
-        <div class="footer">
-            <p><strong>Karan Rajpal</strong></p>
-            <p>Model Validation Expert @ Handshake AI | Partnering with OpenAI on LLM Fine-Tuning</p>
-            <p>Former 5th Hire @ Borderless Capital | UC Berkeley Haas MBA '25</p>
-            <p style="margin-top: 10px;"><em>Built with Streamlit, Claude AI (Sonnet 4), and yfinance</em></p>
-        </div>
-    </body>
-    </html>
-    """
-    return html
-
-# NOW continue with st.set_page_config...
 st.set_page_config(
     page_title="Equity Analyst Assistant | Karan Rajpal",
     page_icon="📊",
@@ -387,6 +168,55 @@ st.markdown("""
 
 st.info("💡 **Built for analysts**: Get financials, peer comparisons, price trends, and AI-powered insights in one dashboard")
 
+# Live mode: only the price tiles poll the quote source; analyses stay as fetched
+LIVE_INTERVAL_S = 10
+
+
+@st.cache_data(ttl=LIVE_INTERVAL_S, show_spinner=False)
+def live_quote(ticker, reference_price):
+    """Latest quote, shared by both tile fragments (and all sessions) for one interval"""
+    return get_quote_source().get_quote(ticker, reference_price)
+
+
+def live_interval():
+    """Polling interval for the tile fragments, None when live mode is off"""
+    return LIVE_INTERVAL_S if st.session_state.get('live_quotes') else None
+
+
+def tile_data():
+    """
+    Price and fundamentals for the tiles, with the live quote applied in live mode
+    Returns: (stock_data, fund_data, quote or None)
+    """
+    result = st.session_state['analysis']
+    stock_data, fund_data = result['data']['stock_data'], result['data']['fund_data']
+    if not st.session_state.get('live_quotes'):
+        return stock_data, fund_data, None
+    
+    quote = live_quote(result['ticker'], stock_data['current_price'])
+    return (*apply_quote(stock_data, fund_data, quote), quote)
+
+
+# Peer suggestions come from the locally built index (python peer_index.py build <universe>)
+@st.cache_resource(show_spinner=False)
+def peer_index(modified_at):
+    """Peer index loaded once per build (keyed on the file's modification time)"""
+    return PeerIndex.load()
+
+
+def suggested_peers(ticker, k=5):
+    """Nearest indexed peers for the ticker; empty when there is no index or the ticker is not in it"""
+    if not ticker or not os.path.exists(PEER_INDEX_PATH):
+        return []
+    index = peer_index(os.path.getmtime(PEER_INDEX_PATH))
+    return [symbol for symbol, _ in index.suggest(ticker, k)] if index else []
+
+
+def use_peers(peers):
+    """Button callback: fill the peers box (runs before the widget is drawn again)"""
+    st.session_state['peers'] = ", ".join(peers)
+
+
 # Input Section
 col1, col2, col3 = st.columns([2, 2, 1])
 
@@ -403,347 +233,521 @@ with col2:
         placeholder="e.g., AMD, INTC",
         key="peers"
     )
+    suggestions = suggested_peers(ticker_input)
+    if suggestions:
+        st.button(f"💡 Suggested: {', '.join(suggestions)}", type="tertiary", key="use_suggested_peers",
+                  on_click=use_peers, args=(suggestions,), help="Nearest companies by sector, size and key ratios")
 
 with col3:
     st.write("")
     st.write("")
     analyze_btn = st.button("🔍 Analyze", type="primary", use_container_width=True)
+    force_refresh = st.checkbox("Force refresh", help="Ignore cached data and analyses for this ticker")
+    st.toggle("Live quotes", key="live_quotes", help=f"Refresh the price tiles every {LIVE_INTERVAL_S}s without re-running the analyses")
 
 st.divider()
 
-# Main Analysis
-if analyze_btn and ticker_input:
+# Cached pipeline stages, keyed on ticker, peers and a data-version stamp
+@st.cache_resource
+def refresh_registry():
+    """Server-wide force-refresh stamps per (ticker, peers)"""
+    return {}
+
+
+def current_version(ticker, peers):
+    """
+    Data-version stamp; bumped for every session when a user forces a refresh
+    A refresh stamp only applies within the data window it was made in
+    """
+    version = data_version()
+    window, stamp = refresh_registry().get((ticker, peers), (None, ''))
+    return version + stamp if window == version else version
+
+
+@st.cache_resource
+def job_queue():
+    """
+    One job queue per server process, shared by every session
+    Its worker count bounds concurrent analyses on this host; with
+    JOB_QUEUE_WORKERS=0 the work is left to `python job_queue.py` processes
+    """
+    return JobQueue(workers=int(os.getenv('JOB_QUEUE_WORKERS', '2')))
+
+
+# AI boxes: css class of the box, css class of the title, title text
+ANALYSIS_BOXES = {
+    'investment_summary': ('summary-box', 'summary-title', '🎯 Investment Summary'),
+    'health_analysis': ('analysis-box', 'analysis-title', '🤖 AI Financial Health Analysis'),
+    'peer_analysis': ('analysis-box', 'analysis-title', '🤖 AI Peer Analysis'),
+    'trend_analysis': ('analysis-box', 'analysis-title', '🤖 AI Trend Analysis'),
+    'news_analysis': ('analysis-box', 'analysis-title', '🤖 AI Sentiment Analysis'),
+}
+
+
+def analysis_box(key):
+    """One AI analysis box, or a placeholder while the job is still producing it"""
+    box_class, title_class, title = ANALYSIS_BOXES[key]
+    text = st.session_state['analysis']['analyses'].get(key)
+    if text is None:
+        st.info(f"🧠 {title.split(' ', 1)[1]}: Claude is on it...")
+        return
     
-    # Parse peers
-    peers = [p.strip().upper() for p in peers_input.split(",")] if peers_input else []
+    st.markdown(f'<div class="{box_class}">', unsafe_allow_html=True)
+    st.markdown(f'<div class="{title_class}">{title}</div>', unsafe_allow_html=True)
+    section_status = st.session_state['analysis'].get('sections', {}).get(key)
+    if section_status == 'reused':
+        st.caption("♻️ Reused: inputs unchanged since the last run")
+    elif section_status == 'fresh':
+        st.caption("✨ Fresh: regenerated from new inputs")
+    st.markdown(text)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
+# Page sections are fragments: a widget inside one reruns only that section.
+# They read the current analysis from session state, which fills in as AI calls finish.
+@st.fragment
+def download_section():
+    """Report download, available once every analysis is in"""
+    result = st.session_state['analysis']
+    if not result.get('html_report'):
+        return
     
-    with st.spinner(f"Analyzing {ticker_input}..."):
-        
-        try:
-            # Fetch all data
-            progress = st.empty()
-            
-            progress.info("📊 Step 1/4: Fetching stock data and financials...")
-            stock_data = get_stock_data(ticker_input)
-            fund_data = get_fundamental_data(ticker_input)
-            
-            if not stock_data or not fund_data:
-                st.error(f"❌ Could not fetch data for {ticker_input}. Please check the ticker symbol.")
-                st.stop()
-            
-            progress.info("📰 Step 2/4: Fetching news and peer data...")
-            news = get_company_news(ticker_input, ticker_input)
-            peer_data = get_comprehensive_peer_data(ticker_input, peers) if peers else {}
-            
-            progress.info("🧠 Step 3/4: AI analyzing financials and trends...")
-            health_analysis = analyze_financial_health(ticker_input, fund_data)
-            trend_analysis = analyze_price_trend(ticker_input, stock_data)
-            
-            progress.info("🧠 Step 4/4: AI analyzing peers and news...")
-            peer_analysis = analyze_peer_comparison(ticker_input, peer_data) if peer_data else "No peer data provided."
-            news_analysis = analyze_news_sentiment(ticker_input, news)
-            
-            # Generate summary
-            all_analyses = {
-                'financial_health': health_analysis,
-                'peer_comparison': peer_analysis,
-                'price_trend': trend_analysis,
-                'news_sentiment': news_analysis
-            }
-            investment_summary = generate_investment_summary(ticker_input, all_analyses)
-            
-            progress.empty()
-            st.success("✅ Analysis complete!")
-            
-            # Generate HTML report for download
-            all_analyses_dict = {
-                'investment_summary': investment_summary,
-                'health_analysis': health_analysis,
-                'peer_analysis': peer_analysis,
-                'trend_analysis': trend_analysis,
-                'news_analysis': news_analysis
-            }
-            
-            try:
-                import yfinance as yf
-                company = yf.Ticker(ticker_input)
-                company_name_full = company.info.get('longName', ticker_input)
-                sector_full = company.info.get('sector', 'N/A')
-                industry_full = company.info.get('industry', 'N/A')
-                sector_display = f"{sector_full} • {industry_full}"
-            except:
-                company_name_full = ticker_input
-                sector_display = "N/A"
-            
-            html_report = generate_html_report(
-                ticker=ticker_input,
-                company_name=company_name_full,
-                sector=sector_display,
-                analyses=all_analyses_dict,
-                stock_data=stock_data,
-                fund_data=fund_data,
-                peer_data=peer_data
-            )
-            
-            # Download button
-            col1, col2, col3 = st.columns([1, 2, 3])
-            with col1:
-                st.download_button(
-                    label="📄 Download Report",
-                    data=html_report,
-                    file_name=f"{ticker_input}_Analysis_{datetime.now().strftime('%Y%m%d')}.html",
-                    mime="text/html",
-                    type="primary",
-                    help="Download as HTML - open in browser, then Print (Ctrl+P) and Save as PDF"
-                )
-            with col2:
-                st.info("💡 Open the HTML file and use Ctrl+P → Save as PDF")
-            
-            # Timestamp
-            analysis_time = datetime.now().strftime("%B %d, %Y at %I:%M %p")
-            st.markdown(f'<div class="timestamp">Analysis generated on {analysis_time}</div>', unsafe_allow_html=True)            
-            # Company Header
-            import yfinance as yf
-            try:
-                company = yf.Ticker(ticker_input)
-                company_name = company.info.get('longName', ticker_input)
-                sector = company.info.get('sector', 'N/A')
-                industry = company.info.get('industry', 'N/A')
-                
-                st.markdown(f"""
-                <div class="company-header">
-                    <div class="company-name">{company_name} ({ticker_input})</div>
-                    <div class="company-info">{sector} • {industry}</div>
-                </div>
-                """, unsafe_allow_html=True)
-            except:
-                st.markdown(f"## {ticker_input} Analysis Dashboard")
-            
-            # Quick Take Box
-            price_change_color = "metric-positive" if stock_data['price_change_pct_30d'] > 0 else "metric-negative"
-            price_arrow = "↑" if stock_data['price_change_pct_30d'] > 0 else "↓"
-            
-            # Format PE ratio properly
-            pe_value = fund_data['pe_ratio']
-            if isinstance(pe_value, (int, float)):
-                pe_display = f"{pe_value:.2f}"
-            else:
-                pe_display = str(pe_value)
-            
-            st.markdown(f"""
-            <div class="quick-take">
-                <div class="quick-take-title">📌 Quick Take</div>
-                <div style="display: grid; grid-template-columns: repeat(4, 1fr); gap: 1rem;">
-                    <div>
-                        <div style="font-size: 0.85rem; color: #78350f; font-weight: 500;">Price</div>
-                        <div style="font-size: 1.5rem; font-weight: 700; color: #78350f;">${stock_data['current_price']}</div>
-                        <div class="{price_change_color}" style="font-size: 0.9rem;">{price_arrow} {stock_data['price_change_pct_30d']:+.2f}% (30D)</div>
-                    </div>
-                    <div>
-                        <div style="font-size: 0.85rem; color: #78350f; font-weight: 500;">Market Cap</div>
-                        <div style="font-size: 1.5rem; font-weight: 700; color: #78350f;">{format_market_cap(fund_data['market_cap'])}</div>
-                    </div>
-                    <div>
-                        <div style="font-size: 0.85rem; color: #78350f; font-weight: 500;">P/E Ratio</div>
-                        <div style="font-size: 1.5rem; font-weight: 700; color: #78350f;">{pe_display}</div>
-                    </div>
-                    <div>
-                        <div style="font-size: 0.85rem; color: #78350f; font-weight: 500;">Profit Margin</div>
-                        <div style="font-size: 1.5rem; font-weight: 700; color: #78350f;">{fund_data['profit_margin']}</div>
-                    </div>
-                </div>
+    def report_for_range():
+        # Runs off the script thread on click, so the range comes from the result dict, not session state
+        chart_range = result.get('chart_range', DEFAULT_CHART_RANGE)
+        if result.get('html_report_range') != chart_range:
+            result['html_report'] = build_report(result['ticker'], result['data'], result['analyses'], chart_range)
+            result['html_report_range'] = chart_range
+        return result['html_report']
+    
+    col1, col2, col3 = st.columns([1, 2, 3])
+    with col1:
+        st.download_button(
+            label="📄 Download Report",
+            data=report_for_range,
+            file_name=f"{result['ticker']}_Analysis_{result['data']['fetched_at'].strftime('%Y%m%d')}.html",
+            mime="text/html",
+            type="primary",
+            help="Download as HTML - open in browser, then Print (Ctrl+P) and Save as PDF"
+        )
+    with col2:
+        st.info("💡 Open the HTML file and use Ctrl+P → Save as PDF")
+
+
+@st.fragment(run_every=live_interval())
+def quick_take_tiles():
+    """Quick Take tiles; polls the live quote on its own when live mode is on"""
+    stock_data, fund_data, quote = tile_data()
+    
+    # Quick Take Box
+    price_change_color = "metric-positive" if stock_data['price_change_pct_30d'] > 0 else "metric-negative"
+    price_arrow = "↑" if stock_data['price_change_pct_30d'] > 0 else "↓"
+    
+    # Format PE ratio properly
+    pe_value = fund_data['pe_ratio']
+    if isinstance(pe_value, (int, float)):
+        pe_display = f"{pe_value:.2f}"
+    else:
+        pe_display = str(pe_value)
+    
+    st.markdown(f"""
+    <div class="quick-take">
+        <div class="quick-take-title">📌 Quick Take</div>
+        <div style="display: grid; grid-template-columns: repeat(4, 1fr); gap: 1rem;">
+            <div>
+                <div style="font-size: 0.85rem; color: #78350f; font-weight: 500;">Price</div>
+                <div style="font-size: 1.5rem; font-weight: 700; color: #78350f;">${stock_data['current_price']}</div>
+                <div class="{price_change_color}" style="font-size: 0.9rem;">{price_arrow} {stock_data['price_change_pct_30d']:+.2f}% (30D)</div>
             </div>
-            """, unsafe_allow_html=True)
-            
-            # Investment Summary - MOVED TO TOP
-            st.markdown('<div class="summary-box">', unsafe_allow_html=True)
-            st.markdown('<div class="summary-title">🎯 Investment Summary</div>', unsafe_allow_html=True)
-            st.markdown(investment_summary)
-            st.markdown('</div>', unsafe_allow_html=True)
-            
-            # Key Metrics Row
-            st.markdown('<div class="section-header">💰 Key Metrics</div>', unsafe_allow_html=True)
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                st.metric(
-                    "Current Price",
-                    f"${stock_data['current_price']}",
-                    f"{stock_data['price_change_pct_30d']:+.2f}% (30D)",
-                    delta_color="normal"
-                )
-            
-            with col2:
-                st.metric(
-                    "Market Cap",
-                    format_market_cap(fund_data['market_cap'])
-                )
-            
-            with col3:
-                pe = fund_data['pe_ratio']
-                st.metric(
-                    "P/E Ratio",
-                    f"{pe:.2f}" if isinstance(pe, (int, float)) else pe
-                )
-            
-            with col4:
-                st.metric(
-                    "Profit Margin",
-                    fund_data['profit_margin']
-                )
-            
-            # Additional metrics row
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                st.metric(
-                    "ROE",
-                    fund_data.get('roe', 'N/A')
-                )
-            
-            with col2:
-                st.metric(
-                    "Revenue Growth (YoY)",
-                    fund_data.get('revenue_growth_yoy', 'N/A')
-                )
-            
-            with col3:
-                st.metric(
-                    "30-Day High",
-                    f"${stock_data['high_30d']}"
-                )
-            
-            with col4:
-                st.metric(
-                    "30-Day Low",
-                    f"${stock_data['low_30d']}"
-                )
-            
-            # Detailed Financials Table
-            st.markdown('<div class="section-header">📊 Financial Health Metrics</div>', unsafe_allow_html=True)
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.markdown("**Valuation Metrics**")
-                val_df = pd.DataFrame({
-                    'Metric': ['P/E Ratio', 'Forward P/E', 'PEG Ratio', 'EV/EBITDA'],
-                    'Value': [
-                        f"{fund_data.get('pe_ratio', 'N/A'):.2f}" if isinstance(fund_data.get('pe_ratio'), (int, float)) else 'N/A',
-                        f"{fund_data.get('forward_pe', 'N/A'):.2f}" if isinstance(fund_data.get('forward_pe'), (int, float)) else 'N/A',
-                        f"{fund_data.get('peg_ratio', 'N/A'):.2f}" if isinstance(fund_data.get('peg_ratio'), (int, float)) else 'N/A',
-                        f"{fund_data.get('ev_to_ebitda', 'N/A'):.2f}" if isinstance(fund_data.get('ev_to_ebitda'), (int, float)) else 'N/A'
-                    ]
-                })
-                st.dataframe(val_df, hide_index=True, use_container_width=True)
-            
-            with col2:
-                st.markdown("**Profitability & Growth**")
-                prof_df = pd.DataFrame({
-                    'Metric': ['Profit Margin', 'ROE', 'ROA', 'Revenue Growth'],
-                    'Value': [
-                        fund_data.get('profit_margin', 'N/A'),
-                        fund_data.get('roe', 'N/A'),
-                        f"{fund_data.get('roa', 'N/A'):.2f}%" if isinstance(fund_data.get('roa'), (int, float)) else 'N/A',
-                        fund_data.get('revenue_growth_yoy', 'N/A')
-                    ]
-                })
-                st.dataframe(prof_df, hide_index=True, use_container_width=True)
-            
-            # AI Analysis
-            st.markdown('<div class="analysis-box">', unsafe_allow_html=True)
-            st.markdown('<div class="analysis-title">🤖 AI Financial Health Analysis</div>', unsafe_allow_html=True)
-            st.markdown(health_analysis)
-            st.markdown('</div>', unsafe_allow_html=True)
-            
-            # Peer Comparison
-            if peer_data:
-                st.markdown('<div class="section-header">🔄 Peer Comparison</div>', unsafe_allow_html=True)
-                
-                # Build comparison dataframe
-                comp_data = []
-                for ticker_sym, metrics in peer_data.items():
-                    mc = metrics['market_cap']
-                    change_pct = metrics['change_30d']
-                    
-                    # Format with color indicators
-                    if change_pct != 'N/A':
-                        change_str = f"{change_pct:+.2f}%" if isinstance(change_pct, (int, float)) else f"{change_pct}%"
-                    else:
-                        change_str = 'N/A'
-                    
-                    comp_data.append({
-                        'Ticker': ticker_sym,
-                        'Price': f"${metrics['price']}" if metrics['price'] != 'N/A' else 'N/A',
-                        '30D Change': change_str,
-                        'P/E': f"{metrics['pe_ratio']:.2f}" if isinstance(metrics['pe_ratio'], (int, float)) else metrics['pe_ratio'],
-                        'Profit Margin': metrics['profit_margin'],
-                        'ROE': metrics['roe'],
-                        'Market Cap': format_market_cap(mc) if mc != 'N/A' else 'N/A'
-                    })
-                
-                comp_df = pd.DataFrame(comp_data)
-                
-                # Highlight primary ticker
-                def highlight_primary(row):
-                    if row['Ticker'] == ticker_input:
-                        return ['background-color: #dbeafe; font-weight: 600'] * len(row)
-                    return [''] * len(row)
-                
-                styled_df = comp_df.style.apply(highlight_primary, axis=1)
-                st.dataframe(styled_df, hide_index=True, use_container_width=True)
-                
-                st.markdown('<div class="analysis-box">', unsafe_allow_html=True)
-                st.markdown('<div class="analysis-title">🤖 AI Peer Analysis</div>', unsafe_allow_html=True)
-                st.markdown(peer_analysis)
-                st.markdown('</div>', unsafe_allow_html=True)
-            
-            # Price Trend
-            st.markdown('<div class="section-header">📈 Price Trend (30 Days)</div>', unsafe_allow_html=True)
-            
+            <div>
+                <div style="font-size: 0.85rem; color: #78350f; font-weight: 500;">Market Cap</div>
+                <div style="font-size: 1.5rem; font-weight: 700; color: #78350f;">{format_market_cap(fund_data['market_cap'])}</div>
+            </div>
+            <div>
+                <div style="font-size: 0.85rem; color: #78350f; font-weight: 500;">P/E Ratio</div>
+                <div style="font-size: 1.5rem; font-weight: 700; color: #78350f;">{pe_display}</div>
+            </div>
+            <div>
+                <div style="font-size: 0.85rem; color: #78350f; font-weight: 500;">Profit Margin</div>
+                <div style="font-size: 1.5rem; font-weight: 700; color: #78350f;">{fund_data['profit_margin']}</div>
+            </div>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+    if quote:
+        st.caption(f"🟢 Live quote as of {quote['as_of'].strftime('%I:%M:%S %p')} · analyses use data as of the timestamp above")
+
+
+@st.fragment
+def overview_section():
+    """Timestamp, company header, Quick Take tiles and the investment summary"""
+    result = st.session_state['analysis']
+    ticker_input = result['ticker']
+    profile = result['data']['profile']
+    # Timestamp
+    data_time = result['data']['fetched_at'].strftime("%B %d, %Y at %I:%M %p")
+    st.markdown(f'<div class="timestamp">Data as of {data_time}</div>', unsafe_allow_html=True)
+    
+    # Company Header
+    st.markdown(f"""
+    <div class="company-header">
+        <div class="company-name">{profile['name']} ({ticker_input})</div>
+        <div class="company-info">{profile['sector']} • {profile['industry']}</div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    quick_take_tiles()
+    
+    # Investment Summary - MOVED TO TOP
+    analysis_box('investment_summary')
+
+
+@st.fragment(run_every=live_interval())
+def key_metric_tiles():
+    """Price, market cap, P/E and margin tiles; polls the live quote when live mode is on"""
+    stock_data, fund_data, _ = tile_data()
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric(
+            "Current Price",
+            f"${stock_data['current_price']}",
+            f"{stock_data['price_change_pct_30d']:+.2f}% (30D)",
+            delta_color="normal"
+        )
+    
+    with col2:
+        st.metric(
+            "Market Cap",
+            format_market_cap(fund_data['market_cap'])
+        )
+    
+    with col3:
+        pe = fund_data['pe_ratio']
+        st.metric(
+            "P/E Ratio",
+            f"{pe:.2f}" if isinstance(pe, (int, float)) else pe
+        )
+    
+    with col4:
+        st.metric(
+            "Profit Margin",
+            fund_data['profit_margin']
+        )
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def fundamentals_history(ticker, days=365):
+    """Daily fundamentals snapshots and the changes since the previous one"""
+    store = FundamentalsStore()
+    start = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+    return store.read([ticker], start=start), store.changes([ticker], lookback_days=days)
+
+
+def fundamentals_history_view(ticker):
+    """Snapshot history of the fundamentals, once there are at least two days of it"""
+    history, changes = fundamentals_history(ticker)
+    if len(history) < 2:
+        return
+    
+    with st.expander(f"📅 Fundamentals History ({len(history)} daily snapshots)"):
+        if not changes.empty:
+            st.markdown(f"**Changed since {changes['previous_date'].iloc[0]}**")
+            st.dataframe(pd.DataFrame({
+                'Metric': changes['field'].str.replace('_', ' ').str.title().str.replace(r'\bPe\b', 'P/E', regex=True),
+                'Previous': changes['previous'].round(4),
+                'Latest': changes['latest'].round(4),
+                'Change': changes['change'].map(lambda c: f"{c*100:+.1f}%" if pd.notna(c) else 'N/A'),
+            }), hide_index=True, use_container_width=True)
+        
+        field = st.selectbox("Metric", FUNDAMENTALS, index=FUNDAMENTALS.index('forward_pe'), key="history_field")
+        st.line_chart(history.set_index('date')[field])
+
+
+@st.fragment
+def metrics_section():
+    """Key metrics tiles, financial tables and the financial health analysis"""
+    result = st.session_state['analysis']
+    stock_data = result['data']['stock_data']
+    fund_data = result['data']['fund_data']
+    # Key Metrics Row
+    st.markdown('<div class="section-header">💰 Key Metrics</div>', unsafe_allow_html=True)
+    key_metric_tiles()
+    
+    # Additional metrics row
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric(
+            "ROE",
+            fund_data.get('roe', 'N/A')
+        )
+    
+    with col2:
+        st.metric(
+            "Revenue Growth (YoY)",
+            fund_data.get('revenue_growth_yoy', 'N/A')
+        )
+    
+    with col3:
+        st.metric(
+            "30-Day High",
+            f"${stock_data['high_30d']}"
+        )
+    
+    with col4:
+        st.metric(
+            "30-Day Low",
+            f"${stock_data['low_30d']}"
+        )
+    
+    # Detailed Financials Table
+    st.markdown('<div class="section-header">📊 Financial Health Metrics</div>', unsafe_allow_html=True)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("**Valuation Metrics**")
+        val_df = pd.DataFrame({
+            'Metric': ['P/E Ratio', 'Forward P/E', 'PEG Ratio', 'EV/EBITDA'],
+            'Value': [
+                f"{fund_data.get('pe_ratio', 'N/A'):.2f}" if isinstance(fund_data.get('pe_ratio'), (int, float)) else 'N/A',
+                f"{fund_data.get('forward_pe', 'N/A'):.2f}" if isinstance(fund_data.get('forward_pe'), (int, float)) else 'N/A',
+                f"{fund_data.get('peg_ratio', 'N/A'):.2f}" if isinstance(fund_data.get('peg_ratio'), (int, float)) else 'N/A',
+                f"{fund_data.get('ev_to_ebitda', 'N/A'):.2f}" if isinstance(fund_data.get('ev_to_ebitda'), (int, float)) else 'N/A'
+            ]
+        })
+        st.dataframe(val_df, hide_index=True, use_container_width=True)
+    
+    with col2:
+        st.markdown("**Profitability & Growth**")
+        prof_df = pd.DataFrame({
+            'Metric': ['Profit Margin', 'ROE', 'ROA', 'Revenue Growth'],
+            'Value': [
+                fund_data.get('profit_margin', 'N/A'),
+                fund_data.get('roe', 'N/A'),
+                f"{fund_data.get('roa', 'N/A'):.2f}%" if isinstance(fund_data.get('roa'), (int, float)) else 'N/A',
+                fund_data.get('revenue_growth_yoy', 'N/A')
+            ]
+        })
+        st.dataframe(prof_df, hide_index=True, use_container_width=True)
+    
+    fundamentals_history_view(result['ticker'])
+    
+    # AI Analysis
+    analysis_box('health_analysis')
+
+
+@st.fragment
+def peer_section():
+    """Peer comparison table and analysis"""
+    result = st.session_state['analysis']
+    ticker_input = result['ticker']
+    peer_data = result['data']['peer_data']
+    if not peer_data:
+        return
+    
+    st.markdown('<div class="section-header">🔄 Peer Comparison</div>', unsafe_allow_html=True)
+    
+    # Build comparison dataframe
+    comp_data = []
+    for ticker_sym, metrics in peer_data.items():
+        mc = metrics['market_cap']
+        change_pct = metrics['change_30d']
+        
+        # Format with color indicators
+        if change_pct != 'N/A':
+            change_str = f"{change_pct:+.2f}%" if isinstance(change_pct, (int, float)) else f"{change_pct}%"
+        else:
+            change_str = 'N/A'
+        
+        comp_data.append({
+            'Ticker': ticker_sym,
+            'Price': f"${metrics['price']}" if metrics['price'] != 'N/A' else 'N/A',
+            '30D Change': change_str,
+            'P/E': f"{metrics['pe_ratio']:.2f}" if isinstance(metrics['pe_ratio'], (int, float)) else metrics['pe_ratio'],
+            'Profit Margin': metrics['profit_margin'],
+            'ROE': metrics['roe'],
+            'Market Cap': format_market_cap(mc) if mc != 'N/A' else 'N/A'
+        })
+    
+    comp_df = pd.DataFrame(comp_data)
+    
+    # Highlight primary ticker
+    def highlight_primary(row):
+        if row['Ticker'] == ticker_input:
+            return ['background-color: #dbeafe; font-weight: 600'] * len(row)
+        return [''] * len(row)
+    
+    styled_df = comp_df.style.apply(highlight_primary, axis=1)
+    st.dataframe(styled_df, hide_index=True, use_container_width=True)
+    
+    analysis_box('peer_analysis')
+
+
+@st.fragment
+def trend_section():
+    """Price trend tiles and analysis"""
+    result = st.session_state['analysis']
+    stock_data = result['data']['stock_data']
+    header = st.empty()
+    
+    # Changing the range reruns only this fragment; the series is downsampled before it ships
+    range_key = st.radio("Range", list(CHART_RANGES), index=list(CHART_RANGES).index(DEFAULT_CHART_RANGE),
+                         horizontal=True, key="chart_range", label_visibility="collapsed")
+    header.markdown(f'<div class="section-header">📈 Price Trend ({RANGE_LABELS[range_key]})</div>', unsafe_allow_html=True)
+    # The downloaded report charts the same range
+    result['chart_range'] = range_key
+    fig, bars, points = price_figure(result['ticker'], stock_data['chart_data'], range_key)
+    st.plotly_chart(fig, use_container_width=True)
+    if points < bars:
+        st.caption(f"Showing {points:,} of {bars:,} bars (downsampled)")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("30-Day High", f"${stock_data['high_30d']}")
+    with col2:
+        st.metric("30-Day Low", f"${stock_data['low_30d']}")
+    with col3:
+        st.metric("Avg Volume", f"{stock_data['avg_volume_30d']:,}")
+    
+    technicals = result['data'].get('technicals')
+    if technicals:
+        tech_df = pd.DataFrame([
+            {'Ticker': symbol, **{label: format_technical(column, stats.get(column)) for column, label in TECHNICAL_LABELS.items()}}
+            for symbol, stats in technicals.items()
+        ])
+        st.dataframe(tech_df, hide_index=True, use_container_width=True)
+    
+    analysis_box('trend_analysis')
+
+
+@st.fragment
+def news_section():
+    """News sentiment analysis and headlines"""
+    news = st.session_state['analysis']['data']['news']
+    sentiment = st.session_state['analysis']['data'].get('news_sentiment')
+    st.markdown('<div class="section-header">📰 Recent News & Sentiment</div>', unsafe_allow_html=True)
+    
+    if news:
+        if sentiment:
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("30-Day High", f"${stock_data['high_30d']}")
+                st.metric("Lexicon Sentiment", sentiment['label'].capitalize(), f"{sentiment['score']:+.2f}",
+                          delta_color="off" if sentiment['label'] == 'neutral' else "normal")
             with col2:
-                st.metric("30-Day Low", f"${stock_data['low_30d']}")
+                st.metric("Positive / Negative Words", f"{sentiment['positive']} / {sentiment['negative']}")
             with col3:
-                st.metric("Avg Volume", f"{stock_data['avg_volume_30d']:,}")
-            
-            st.markdown('<div class="analysis-box">', unsafe_allow_html=True)
-            st.markdown('<div class="analysis-title">🤖 AI Trend Analysis</div>', unsafe_allow_html=True)
-            st.markdown(trend_analysis)
-            st.markdown('</div>', unsafe_allow_html=True)
-            
-            # News & Sentiment
-            st.markdown('<div class="section-header">📰 Recent News & Sentiment</div>', unsafe_allow_html=True)
-            
-            if news:
-                st.markdown('<div class="analysis-box">', unsafe_allow_html=True)
-                st.markdown('<div class="analysis-title">🤖 AI Sentiment Analysis</div>', unsafe_allow_html=True)
-                st.markdown(news_analysis)
-                st.markdown('</div>', unsafe_allow_html=True)
-                
-                with st.expander(f"📄 View {len(news)} Recent Headlines"):
-                    for i, article in enumerate(news, 1):
-                        st.markdown(f"**{i}. [{article['title']}]({article['url']})**")
-                        st.markdown(f"*{article['source']} - {article['published_at']}*")
-                        if article['description']:
-                            st.markdown(f"{article['description']}")
-                        st.divider()
-            else:
-                st.info("No recent news articles found.")
-            
-            # Disclaimer
-            st.divider()
-            st.warning("⚠️ **Disclaimer:** This AI-generated analysis is for informational purposes only and should not be considered investment advice. Always conduct your own research and consult with financial professionals before making investment decisions.")
-            
-        except Exception as e:
-            st.error("❌ An error occurred during analysis")
-            st.exception(e)
+                st.metric("Signal", sentiment['strength'].capitalize())
+
+        analysis_box('news_analysis')
+        
+        with st.expander(f"📄 View {len(news)} Recent Headlines"):
+            for i, article in enumerate(news, 1):
+                score = f" `{sentiment['articles'][i - 1]:+.2f}`" if sentiment else ""
+                title = f"[{article['title']}]({article['url']})" if article['url'] else article['title']
+                st.markdown(f"**{i}. {title}**{score}")
+                st.markdown(f"*{article['source']} - {article['published_at']}*")
+                if article['description']:
+                    st.markdown(f"{article['description']}")
+                st.divider()
+    else:
+        st.info("No recent news articles found.")
+
+
+def render_analysis():
+    """
+    Lay out the analysis page from session state
+    Data-only sections render as soon as the job has fetched; AI boxes not yet
+    ready show a placeholder until the job watcher reruns the page
+    """
+    if st.session_state['analysis'].get('html_report'):
+        download_section()
+    
+    for section in (overview_section, metrics_section, peer_section, trend_section, news_section):
+        section()
+    
+    # Disclaimer
+    st.divider()
+    st.warning("⚠️ **Disclaimer:** This AI-generated analysis is for informational purposes only and should not be considered investment advice. Always conduct your own research and consult with financial professionals before making investment decisions.")
+
+
+def watch_job(job_id):
+    """Start following a job (kept in the URL so a reload resumes it)"""
+    st.session_state['job_id'] = job_id
+    st.session_state['job_seq'] = -1
+    st.session_state.pop('analysis', None)
+    st.query_params['job'] = job_id
+
+
+@st.fragment(run_every=1.0)
+def job_watcher():
+    """Poll the running job and rerun the page whenever it has new results"""
+    job = job_queue().get(st.session_state['job_id'])
+    if job is None:
+        st.session_state.pop('job_id', None)
+        st.query_params.clear()
+        st.rerun()
+    
+    if job['status'] == 'error':
+        st.session_state.pop('job_id', None)
+        st.session_state['job_error'] = job['error']
+        st.query_params.clear()
+        st.rerun()
+    
+    if job['progress_seq'] == st.session_state['job_seq']:
+        if job['status'] == 'queued':
+            st.info(f"⏳ Waiting for a free worker to analyze {job['payload']['ticker']}...")
+        return
+    
+    st.session_state['job_seq'] = job['progress_seq']
+    result = job['result'] if job['status'] == 'done' else job['progress']
+    if result:
+        st.session_state['analysis'] = result
+    
+    if job['status'] == 'done':
+        st.session_state.pop('job_id', None)
+        chart_range = result.get('chart_range', DEFAULT_CHART_RANGE)
+        result['html_report'] = build_report(result['ticker'], result['data'], result['analyses'], chart_range)
+        result['html_report_range'] = chart_range
+    st.rerun()
+
+
+# Main Analysis
+if analyze_btn and ticker_input:
+    
+    # Parse peers
+    peers = tuple(p.strip().upper() for p in peers_input.split(",") if p.strip()) if peers_input else ()
+    
+    if force_refresh:
+        refresh_registry()[(ticker_input, peers)] = (data_version(), f"-r{datetime.now().timestamp():.0f}")
+    
+    # Identical requests (same ticker, peers and data version) share one job and its result
+    watch_job(job_queue().submit('analysis', {
+        'ticker': ticker_input,
+        'peers': list(peers),
+        'version': current_version(ticker_input, peers),
+    }))
+    st.session_state.pop('job_error', None)
 
 elif analyze_btn:
     st.warning("⚠️ Please enter a stock ticker")
 
+# Resume a job after a page reload
+elif 'job_id' not in st.session_state and 'analysis' not in st.session_state and st.query_params.get('job'):
+    watch_job(st.query_params['job'])
+
+if 'job_error' in st.session_state:
+    st.error(f"❌ {st.session_state['job_error']}")
+
+if 'job_id' in st.session_state:
+    job_watcher()
+
+if 'analysis' in st.session_state:
+    render_analysis()
+    if 'job_id' not in st.session_state:
+        st.success("✅ Analysis complete!")
+
 # Footer
 st.divider()
 st.markdown("""
@@ -0,0 +1,129 @@
+import os
+import json
+import time
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pipeline import fetch_data, run_analyses
+from report import write_report
+
+# Output layout under out_dir:
+#   <TICKER>.html    one report per watchlist entry, written as soon as it is ready
+#   summary.json     run summary with per-ticker status and stage timings
+
+
+def read_watchlist(path):
+    """
+    Parse a watchlist file: one ticker per line, optionally followed by peers
+    e.g. 'NVDA AMD,INTC  # semis'; blank lines and comments are ignored
+    Returns: list of (ticker, peers tuple)
+    """
+    entries = []
+    with open(path, 'r') as f:
+        for line in f:
+            parts = line.split('#')[0].split(None, 1)
+            if not parts:
+                continue
+            peers = tuple(p.strip().upper() for p in parts[1].split(',') if p.strip()) if len(parts) > 1 else ()
+            entries.append((parts[0].upper(), peers))
+    return entries
+
+
+def _write_report(out_dir, ticker, data, analyses):
+    """Stream one report to disk, swapping it in only once complete"""
+    path = os.path.join(out_dir, f"{ticker}.html")
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        write_report(f, ticker, data, analyses)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def render_ticker(ticker, peers, out_dir):
+    """
+    Fetch, analyze and render one ticker, then write its report
+    Returns: summary row with status, report path and per-stage timings
+    """
+    row = {'ticker': ticker, 'peers': list(peers)}
+    timings = {}
+
+    try:
+        start = time.perf_counter()
+        data = fetch_data(ticker, peers)
+        timings['fetch_s'] = time.perf_counter() - start
+        if not data:
+            raise ValueError(f"Could not fetch data for {ticker}")
+
+        start = time.perf_counter()
+        analyses = run_analyses(ticker, data)
+        timings['analyze_s'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        row['report'] = _write_report(out_dir, ticker, data, analyses)
+        timings['render_s'] = time.perf_counter() - start
+        row['status'] = 'ok'
+
+    except Exception as e:
+        row.update(status='error', error=str(e))
+
+    row.update({key: round(value, 3) for key, value in timings.items()})
+    row['total_s'] = round(sum(timings.values()), 3)
+    return row
+
+
+def render_watchlist(entries, out_dir="reports", workers=4):
+    """
+    Render reports for many tickers with at most `workers` tickers in flight
+    Each ticker runs its own analyses concurrently, so expect up to
+    workers x 4 simultaneous Claude requests
+    Returns: summary dict, also written to out_dir/summary.json
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    started_at = datetime.now()
+    run_start = time.perf_counter()
+    rows = []
+
+    print(f"Rendering {len(entries)} reports with {workers} workers...")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(render_ticker, ticker, peers, out_dir): ticker for ticker, peers in entries}
+        for future in as_completed(futures):
+            row = future.result()
+            rows.append(row)
+            if row['status'] == 'ok':
+                print(f"    ✅ {row['ticker']}: {row['total_s']:.1f}s -> {row['report']}")
+            else:
+                print(f"    ❌ {row['ticker']}: {row['error']}")
+
+    summary = {
+        'started_at': started_at.isoformat(timespec='seconds'),
+        'wall_s': round(time.perf_counter() - run_start, 3),
+        'workers': workers,
+        'ok': sum(row['status'] == 'ok' for row in rows),
+        'failed': sum(row['status'] != 'ok' for row in rows),
+        'tickers': sorted(rows, key=lambda row: row['ticker']),
+    }
+    with open(os.path.join(out_dir, "summary.json"), 'w') as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Render HTML analysis reports for a watchlist")
+    arg_parser.add_argument("watchlist", help="File with one 'TICKER [PEER,PEER]' entry per line")
+    arg_parser.add_argument("--out-dir", default="reports")
+    arg_parser.add_argument("--workers", type=int, default=4)
+    args = arg_parser.parse_args()
+
+    entries = read_watchlist(args.watchlist)
+    if not entries:
+        arg_parser.error("watchlist is empty")
+
+    summary = render_watchlist(entries, out_dir=args.out_dir, workers=args.workers)
+
+    print("\n" + "="*60)
+    print(f"Rendered: {summary['ok']}  Failed: {summary['failed']}  Wall time: {summary['wall_s']:.1f}s")
+    timed = [row['total_s'] for row in summary['tickers'] if row['status'] == 'ok']
+    if timed:
+        print(f"Median per-ticker time: {sorted(timed)[len(timed) // 2]:.1f}s")
+    print(f"Summary: {os.path.join(args.out_dir, 'summary.json')}")
+    print("="*60)
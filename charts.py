@@ -0,0 +1,91 @@
+import numpy as np
+import plotly.graph_objects as go
+
+# Chart range buttons -> days of history shown
+CHART_RANGES = {'1M': 31, '3M': 92, '1Y': 366, '5Y': 1827}
+RANGE_LABELS = {'1M': '1 Month', '3M': '3 Months', '1Y': '1 Year', '5Y': '5 Years'}
+# Range the app's chart opens on
+DEFAULT_CHART_RANGE = '1Y'
+
+# Points sent to the browser per series; LTTB keeps the visual shape
+MAX_CHART_POINTS = 2000
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling
+    Keeps the first and last points and, from each bucket in between, the point
+    forming the largest triangle with the previously kept point and the next
+    bucket's average - peaks and troughs survive, flat stretches thin out
+    Returns: indices of the kept points
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = (np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype(np.int64) + 1
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+
+def range_slice(chart_data, range_key):
+    """
+    Last CHART_RANGES[range_key] days of columnar chart data
+    Returns: (dates, closes) arrays
+    """
+    dates, closes = chart_data['date'], chart_data['close']
+    if not len(dates):
+        return dates, closes
+    cutoff = dates[-1] - np.timedelta64(CHART_RANGES[range_key], 'D')
+    start = int(np.searchsorted(dates, cutoff, side='right'))
+    return dates[start:], closes[start:]
+
+
+def downsample(dates, closes, max_points=MAX_CHART_POINTS):
+    """Downsample a price series with LTTB; returns (dates, closes)"""
+    kept = lttb(dates.astype('datetime64[s]').astype(np.int64), closes, max_points)
+    return dates[kept], closes[kept]
+
+
+def price_figure(ticker, chart_data, range_key='1Y', max_points=MAX_CHART_POINTS):
+    """
+    Interactive closing-price chart for one range
+    Returns: (plotly Figure, number of bars in range, number of points drawn)
+    """
+    dates, closes = range_slice(chart_data, range_key)
+    bars = len(dates)
+    dates, closes = downsample(dates, closes, max_points)
+
+    rising = len(closes) > 1 and closes[-1] >= closes[0]
+    fig = go.Figure(go.Scatter(
+        x=dates,
+        y=closes,
+        mode='lines',
+        name=ticker,
+        line={'color': '#059669' if rising else '#dc2626', 'width': 2},
+        hovertemplate='%{x|%b %d, %Y}<br>$%{y:.2f}<extra></extra>',
+    ))
+    fig.update_layout(
+        height=360,
+        margin={'l': 10, 'r': 10, 't': 10, 'b': 10},
+        yaxis_title='Close ($)',
+        hovermode='x unified',
+        plot_bgcolor='white',
+    )
+    fig.update_xaxes(showgrid=False)
+    fig.update_yaxes(gridcolor='#e2e8f0')
+    return fig, bars, len(dates)
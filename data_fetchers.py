@@ -1,25 +1,35 @@
 import os
+import contextvars
 import requests
 import pandas as pd
 import yfinance as yf
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from fetch_cache import disk_cached, record_lookup, cache_bypassed
+from news_store import NewsStore, collapse_duplicates
 
 load_dotenv()
 
-def get_stock_data(ticker):
+@disk_cached(ttl_minutes=30)
+def get_stock_data(ticker, period="1mo"):
     """
     Get stock price data using yfinance
+    period: history to fetch for the chart (e.g. "5y"); 30-day stats use the last month
+    chart_data is columnar: {'date': datetime64 array, 'close': float array}
     """
     try:
         stock = yf.Ticker(ticker)
-        hist = stock.history(period="1mo")
+        hist = stock.history(period=period)
         
         if hist.empty:
             return None
         
-        current_price = hist['Close'].iloc[-1]
-        price_30d_ago = hist['Close'].iloc[0]
+        # 30-day stats come from the last month of whatever was fetched
+        month = hist[hist.index >= hist.index[-1] - pd.DateOffset(months=1)]
+        
+        current_price = month['Close'].iloc[-1]
+        price_30d_ago = month['Close'].iloc[0]
         price_change_30d = current_price - price_30d_ago
         price_change_pct_30d = (price_change_30d / price_30d_ago) * 100
         
@@ -27,10 +37,13 @@ def get_stock_data(ticker):
             'current_price': round(current_price, 2),
             'price_change_30d': round(price_change_30d, 2),
             'price_change_pct_30d': round(price_change_pct_30d, 2),
-            'high_30d': round(hist['High'].max(), 2),
-            'low_30d': round(hist['Low'].min(), 2),
-            'avg_volume_30d': int(hist['Volume'].mean()),
-            'chart_data': hist[['Close']].reset_index().to_dict('records')
+            'high_30d': round(month['High'].max(), 2),
+            'low_30d': round(month['Low'].min(), 2),
+            'avg_volume_30d': int(month['Volume'].mean()),
+            'chart_data': {
+                'date': hist.index.tz_localize(None).to_numpy(dtype='datetime64[s]'),
+                'close': hist['Close'].to_numpy(dtype='float64'),
+            }
         }
         
     except Exception as e:
@@ -38,26 +51,63 @@ def get_stock_data(ticker):
         return None
 
 
-def get_company_news(ticker, company_name=None):
+@disk_cached(ttl_minutes=30)
+def get_price_history(tickers, period="1y"):
+    """
+    Daily close and volume for several tickers in one batched download
+    Returns: dict with wide 'close' and 'volume' DataFrames (dates x tickers), or None
+    """
+    try:
+        hist = yf.download(list(tickers), period=period, auto_adjust=True, progress=False, threads=True)
+        
+        if hist.empty:
+            return None
+        
+        return {
+            'close': hist['Close'].dropna(axis=1, how='all'),
+            'volume': hist['Volume'].dropna(axis=1, how='all'),
+        }
+        
+    except Exception as e:
+        print(f"Error fetching price history: {str(e)}")
+        return None
+
+
+# Repeat news searches within this window are served from the local news store
+NEWS_QUERY_TTL_MINUTES = 60
+
+
+def get_company_news(ticker, company_name=None, limit=10):
     """
     Fetch recent news about a company
-    Returns: list of news articles with title, source, date, url
+    Articles go through the shared news store: syndicated near-duplicates are
+    collapsed (each kept article counts its 'duplicates') and a repeat search
+    within NEWS_QUERY_TTL_MINUTES does not call NewsAPI
+    Returns: list of news articles with title, source, date, url ('' if none) and store key
     """
     api_key = os.getenv('NEWS_API_KEY')
     
     search_query = company_name if company_name else ticker
     from_date = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
     
+    query_key = f"{search_query}|{from_date}"
     url = f'https://newsapi.org/v2/everything?q={search_query}&from={from_date}&sortBy=relevancy&language=en&apiKey={api_key}'
     
     try:
+        store = NewsStore()
+        articles = None if cache_bypassed() else store.cached_query(query_key, NEWS_QUERY_TTL_MINUTES)
+        record_lookup('get_company_news', articles is not None)
+        if articles is not None:
+            return collapse_duplicates(articles, limit)
+        
         response = requests.get(url)
         data = response.json()
         
         if data.get("status") != "ok":
             return []
         
-        articles = data.get("articles", [])[:10]
+        # Over-fetch so `limit` distinct stories remain after collapsing duplicates
+        articles = data.get("articles", [])[:limit * 3]
         
         news_items = []
         for article in articles:
@@ -69,65 +119,259 @@ def get_company_news(ticker, company_name=None):
                 "url": article.get("url", "")
             })
         
-        return news_items
+        return collapse_duplicates(store.add_articles(news_items, query=query_key), limit)
         
     except Exception as e:
         print(f"Error fetching news: {str(e)}")
         return []
 
 
-def get_fundamental_data(ticker):
+# Field registry: field -> sources in order of preference
+# A source is (quote-summary module, key), or ('fast_info', key) for fields
+# yfinance can derive from its lightweight price/shares endpoints
+FUNDAMENTAL_FIELDS = {
+    'market_cap': (('fast_info', 'marketCap'), ('summaryDetail', 'marketCap')),
+    'pe_ratio': (('summaryDetail', 'trailingPE'),),
+    'forward_pe': (('summaryDetail', 'forwardPE'), ('defaultKeyStatistics', 'forwardPE')),
+    'peg_ratio': (('defaultKeyStatistics', 'pegRatio'),),
+    'price_to_book': (('defaultKeyStatistics', 'priceToBook'),),
+    'price_to_sales': (('summaryDetail', 'priceToSalesTrailing12Months'),),
+    'ev_to_ebitda': (('defaultKeyStatistics', 'enterpriseToEbitda'),),
+    
+    # Profitability
+    'profit_margin': (('financialData', 'profitMargins'), ('defaultKeyStatistics', 'profitMargins')),
+    'operating_margin': (('financialData', 'operatingMargins'),),
+    'gross_margin': (('financialData', 'grossMargins'),),
+    'roe': (('financialData', 'returnOnEquity'),),
+    'roa': (('financialData', 'returnOnAssets'),),
+    
+    # Growth
+    'revenue_growth_yoy': (('financialData', 'revenueGrowth'),),
+    'earnings_growth_yoy': (('financialData', 'earningsGrowth'),),
+    
+    # Other
+    'beta': (('summaryDetail', 'beta'), ('defaultKeyStatistics', 'beta')),
+    'dividend_yield': (('summaryDetail', 'dividendYield'),),
+    '52_week_high': (('fast_info', 'yearHigh'), ('summaryDetail', 'fiftyTwoWeekHigh')),
+    '52_week_low': (('fast_info', 'yearLow'), ('summaryDetail', 'fiftyTwoWeekLow')),
+    
+    # Profile
+    'name': (('quoteType', 'longName'),),
+    'sector': (('assetProfile', 'sector'),),
+    'industry': (('assetProfile', 'industry'),),
+}
+
+# Field sets declared by callers
+FUNDAMENTALS = tuple(field for field in FUNDAMENTAL_FIELDS if field not in ('name', 'sector', 'industry'))
+PEER_FIELDS = ('market_cap', 'pe_ratio', 'profit_margin', 'roe', 'ev_to_ebitda', 'revenue_growth_yoy')
+PROFILE_FIELDS = ('name', 'sector', 'industry')
+
+# Modules requested by yfinance's .info (plus a v7 quote call)
+INFO_MODULES = ('financialData', 'quoteType', 'defaultKeyStatistics', 'assetProfile', 'summaryDetail')
+
+
+def plan_fields_fetch(fields):
+    """
+    Choose the fewest sources covering the requested fields
+    fast_info alone is used when it covers every field; otherwise each field
+    reuses an already-chosen module where it can
+    Returns: (sorted quote-summary modules, {field: (source, key)})
+    """
+    if all(any(source == 'fast_info' for source, _ in FUNDAMENTAL_FIELDS[field]) for field in fields):
+        return [], {field: ('fast_info', dict(FUNDAMENTAL_FIELDS[field])['fast_info']) for field in fields}
+    
+    modules, plan = set(), {}
+    # Fields with a single module choice go first so the others can share them
+    module_sources = {
+        field: [(source, key) for source, key in FUNDAMENTAL_FIELDS[field] if source != 'fast_info']
+        for field in fields
+    }
+    for field in sorted(fields, key=lambda f: len(module_sources[f])):
+        sources = module_sources[field]
+        if not sources:
+            plan[field] = ('fast_info', dict(FUNDAMENTAL_FIELDS[field])['fast_info'])
+            continue
+        shared = [source for source in sources if source[0] in modules]
+        plan[field] = (shared or sources)[0]
+        modules.add(plan[field][0])
+    return sorted(modules), {field: plan[field] for field in fields}
+
+
+def _quote_fetch(stock, modules=None):
+    """
+    The only use of yfinance's private quote scraper (Ticker._quote, checked against
+    yfinance 1.7): the public API has just the full .info scrape, which fetches
+    every module plus the additional-info request
+    modules: quote-summary modules to fetch; None fetches the additional info instead
+    Returns: raw JSON response
+    """
+    if modules is None:
+        return stock._quote._fetch_additional_info()
+    return stock._quote._fetch(modules=list(modules))
+
+
+# Set once the .info fallback has been reported in this process
+_fallback_reported = False
+
+
+def _info_module(info, module):
+    """
+    One quote-summary module rebuilt from the flattened .info dict
+    Only the registry keys .info supplies are mapped; modules .info does not fetch come back empty
+    Returns: dict key -> value
+    """
+    if module not in INFO_MODULES:
+        return {}
+    keys = {key for sources in FUNDAMENTAL_FIELDS.values() for source, key in sources if source == module}
+    return {key: info[key] for key in keys if key in info}
+
+
+def _quote_summary(stock, modules):
+    """
+    Raw quote-summary modules for one ticker
+    Falls back to the full .info scrape if the private module fetch fails, reported
+    once per process since it silently costs the field-selective saving
+    """
+    try:
+        return _quote_fetch(stock, modules)['quoteSummary']['result'][0]
+    except Exception as e:
+        global _fallback_reported
+        if not _fallback_reported:
+            _fallback_reported = True
+            print(f"Error fetching quote-summary modules, falling back to the full .info scrape "
+                  f"(yfinance {yf.__version__} may have changed its private quote API): {str(e)}")
+        info = stock.info
+        return {module: _info_module(info, module) for module in modules}
+
+
+def fetch_fields(ticker, fields):
+    """
+    Fetch only the sources the requested registry fields need
+    Returns: dict field -> raw value ('N/A' when missing)
+    """
+    modules, plan = plan_fields_fetch(fields)
+    stock = yf.Ticker(ticker)
+    summary = _quote_summary(stock, modules) if modules else {}
+    
+    values = {}
+    for field in fields:
+        source, key = plan[field]
+        try:
+            value = stock.fast_info[key] if source == 'fast_info' else summary.get(source, {}).get(key)
+        except Exception:
+            value = None
+        if isinstance(value, dict):
+            value = value.get('raw')
+        values[field] = 'N/A' if value is None else value
+    return values
+
+
+@disk_cached(ttl_minutes=720)
+def get_fundamental_data(ticker, offline=False, fields=FUNDAMENTALS):
     """
     Get fundamental financial data using yfinance
+    fields: registry fields to fetch; only the quote-summary modules they need are requested
+    With offline=True, derive what we can from the XBRL facts of the latest
+    10-K already on disk instead (no network; market-price metrics are N/A)
     Returns dict with valuation metrics, profitability, growth
     """
+    if offline:
+        return get_xbrl_fundamental_data(ticker)
+    
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        
-        # Extract key metrics
-        fundamental_data = {
-            'market_cap': info.get('marketCap', 'N/A'),
-            'pe_ratio': info.get('trailingPE', 'N/A'),
-            'forward_pe': info.get('forwardPE', 'N/A'),
-            'peg_ratio': info.get('pegRatio', 'N/A'),
-            'price_to_book': info.get('priceToBook', 'N/A'),
-            'price_to_sales': info.get('priceToSalesTrailing12Months', 'N/A'),
-            'ev_to_ebitda': info.get('enterpriseToEbitda', 'N/A'),
-            
-            # Profitability
-            'profit_margin': info.get('profitMargins', 'N/A'),
-            'operating_margin': info.get('operatingMargins', 'N/A'),
-            'gross_margin': info.get('grossMargins', 'N/A'),
-            'roe': info.get('returnOnEquity', 'N/A'),
-            'roa': info.get('returnOnAssets', 'N/A'),
-            
-            # Growth
-            'revenue_growth_yoy': info.get('revenueGrowth', 'N/A'),
-            'earnings_growth_yoy': info.get('earningsGrowth', 'N/A'),
-            
-            # Other
-            'beta': info.get('beta', 'N/A'),
-            'dividend_yield': info.get('dividendYield', 'N/A'),
-            '52_week_high': info.get('fiftyTwoWeekHigh', 'N/A'),
-            '52_week_low': info.get('fiftyTwoWeekLow', 'N/A'),
-        }
-        
-        # Convert percentages to readable format
-        if fundamental_data['profit_margin'] != 'N/A':
-            fundamental_data['profit_margin'] = f"{fundamental_data['profit_margin']*100:.2f}%"
-        if fundamental_data['roe'] != 'N/A':
-            fundamental_data['roe'] = f"{fundamental_data['roe']*100:.2f}%"
-        if fundamental_data['revenue_growth_yoy'] != 'N/A':
-            fundamental_data['revenue_growth_yoy'] = f"{fundamental_data['revenue_growth_yoy']*100:.2f}%"
-            
-        return fundamental_data
+        return _format_fundamentals(fetch_fields(ticker, fields))
         
     except Exception as e:
         print(f"Error fetching fundamental data: {str(e)}")
         return None
 
 
+def compare_fundamentals_fetch(tickers, fields=FUNDAMENTALS):
+    """
+    Measure the full .info scrape against the field-selective fetch
+    Bytes are the size of the decoded JSON responses
+    Returns: list of per-ticker dicts with bytes and milliseconds for each path
+    """
+    import json
+    import time
+    
+    rows = []
+    for ticker in tickers:
+        stock = yf.Ticker(ticker)
+        start = time.perf_counter()
+        full = _quote_fetch(stock, INFO_MODULES)
+        extra = _quote_fetch(stock)
+        full_ms = (time.perf_counter() - start) * 1000
+        full_bytes = len(json.dumps(full)) + len(json.dumps(extra))
+        
+        modules, _ = plan_fields_fetch(fields)
+        start = time.perf_counter()
+        selective = _quote_fetch(yf.Ticker(ticker), modules) if modules else {}
+        selective_ms = (time.perf_counter() - start) * 1000
+        
+        rows.append({
+            'ticker': ticker,
+            'modules': ','.join(modules) or 'fast_info',
+            'info_bytes': full_bytes,
+            'selective_bytes': len(json.dumps(selective)),
+            'info_ms': round(full_ms, 1),
+            'selective_ms': round(selective_ms, 1),
+        })
+    return rows
+
+
+def get_xbrl_fundamental_data(ticker):
+    """
+    Offline fundamentals from the latest downloaded 10-K's XBRL facts
+    Same keys as get_fundamental_data; facts are cached per filing as Parquet
+    """
+    # Imported lazily: the SEC stack is only needed for the offline path
+    from sec_parser import SECParser
+    
+    xbrl = SECParser(verbose=False).get_xbrl_fundamentals(ticker.upper(), download=False)
+    if "error" in xbrl:
+        print(f"Error reading XBRL fundamentals: {xbrl['error']}")
+        return None
+    
+    fundamental_data = {
+        key: 'N/A' for key in (
+            'market_cap', 'pe_ratio', 'forward_pe', 'peg_ratio', 'price_to_book',
+            'price_to_sales', 'ev_to_ebitda', 'beta', 'dividend_yield',
+            '52_week_high', '52_week_low',
+        )
+    }
+    for key in ('profit_margin', 'operating_margin', 'gross_margin', 'roe', 'roa',
+                'revenue_growth_yoy', 'earnings_growth_yoy'):
+        fundamental_data[key] = xbrl[key] if xbrl[key] is not None else 'N/A'
+    
+    return _format_fundamentals(fundamental_data)
+
+
+def _format_fundamentals(fundamental_data):
+    """Convert percentages to readable format"""
+    for key in ('profit_margin', 'roe', 'revenue_growth_yoy'):
+        if fundamental_data.get(key, 'N/A') != 'N/A':
+            fundamental_data[key] = f"{fundamental_data[key]*100:.2f}%"
+    
+    return fundamental_data
+
+
+@disk_cached(ttl_minutes=10080)
+def get_company_profile(ticker):
+    """
+    Get display name, sector and industry for a company
+    Falls back to the ticker itself when yfinance has no profile
+    """
+    try:
+        profile = fetch_fields(ticker, PROFILE_FIELDS)
+        if profile['name'] == 'N/A':
+            profile['name'] = ticker
+        return profile
+    except Exception as e:
+        print(f"Error fetching company profile: {str(e)}")
+        return {'name': ticker, 'sector': 'N/A', 'industry': 'N/A'}
+
+
 def format_market_cap(market_cap):
     """Helper function to format market cap in B/T"""
     if market_cap == 'N/A' or market_cap is None:
@@ -142,49 +386,43 @@ def format_market_cap(market_cap):
         return f"${market_cap:,.0f}"
 
 
+PEER_FETCH_WORKERS = 8
+
+
+def _peer_metrics(ticker):
+    """Key comparison metrics for one company, or None if its data is unavailable"""
+    stock_data = get_stock_data(ticker)
+    fundamental_data = get_fundamental_data(ticker, fields=PEER_FIELDS)
+
+    if not stock_data or not fundamental_data:
+        return None
+    return {
+        'price': stock_data.get('current_price', 'N/A'),
+        'change_30d': stock_data.get('price_change_pct_30d', 'N/A'),
+        'pe_ratio': fundamental_data.get('pe_ratio', 'N/A'),
+        'profit_margin': fundamental_data.get('profit_margin', 'N/A'),
+        'market_cap': fundamental_data.get('market_cap', 'N/A'),
+        'roe': fundamental_data.get('roe', 'N/A'),
+        'ev_to_ebitda': fundamental_data.get('ev_to_ebitda', 'N/A'),
+        'revenue_growth': fundamental_data.get('revenue_growth_yoy', 'N/A'),
+    }
+
+
 def get_comprehensive_peer_data(ticker, peers):
     """
     Get fundamental data for ticker + all peers for comparison
-    Returns dict with all companies' key metrics
+    Companies are fetched concurrently, so sector-sized peer sets (50+) stay practical
+    Returns dict with all companies' key metrics, ticker first, then peers in input order
     """
-    all_data = {}
-    
-    # Get primary company data
-    print(f"Fetching data for {ticker}...")
-    stock_data = get_stock_data(ticker)
-    fundamental_data = get_fundamental_data(ticker)
-    
-    if stock_data and fundamental_data:
-        all_data[ticker] = {
-            'price': stock_data.get('current_price', 'N/A'),
-            'change_30d': stock_data.get('price_change_pct_30d', 'N/A'),
-            'pe_ratio': fundamental_data.get('pe_ratio', 'N/A'),
-            'profit_margin': fundamental_data.get('profit_margin', 'N/A'),
-            'market_cap': fundamental_data.get('market_cap', 'N/A'),
-            'roe': fundamental_data.get('roe', 'N/A'),
-            'ev_to_ebitda': fundamental_data.get('ev_to_ebitda', 'N/A'),
-            'revenue_growth': fundamental_data.get('revenue_growth_yoy', 'N/A'),
-        }
-    
-    # Get peer data
-    for peer in peers:
-        print(f"Fetching data for peer: {peer}...")
-        peer_stock = get_stock_data(peer)
-        peer_fund = get_fundamental_data(peer)
-        
-        if peer_stock and peer_fund:
-            all_data[peer] = {
-                'price': peer_stock.get('current_price', 'N/A'),
-                'change_30d': peer_stock.get('price_change_pct_30d', 'N/A'),
-                'pe_ratio': peer_fund.get('pe_ratio', 'N/A'),
-                'profit_margin': peer_fund.get('profit_margin', 'N/A'),
-                'market_cap': peer_fund.get('market_cap', 'N/A'),
-                'roe': peer_fund.get('roe', 'N/A'),
-                'ev_to_ebitda': peer_fund.get('ev_to_ebitda', 'N/A'),
-                'revenue_growth': peer_fund.get('revenue_growth_yoy', 'N/A'),
-            }
-    
-    return all_data
+    symbols = list(dict.fromkeys([ticker, *peers]))
+    print(f"Fetching data for {ticker} and {len(symbols) - 1} peers...")
+
+    # Each task gets its own copy of the context so fresh_fetches() applies in the workers
+    with ThreadPoolExecutor(max_workers=PEER_FETCH_WORKERS) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, _peer_metrics, symbol) for symbol in symbols]
+        results = [future.result() for future in futures]
+
+    return {symbol: metrics for symbol, metrics in zip(symbols, results) if metrics}
 
 
 # Test functions
@@ -193,7 +431,7 @@ if __name__ == "__main__":
     print("="*60)
     
     # Test stock data
-    print("\n[1/4] Testing stock data fetcher...")
+    print("\n[1/5] Testing stock data fetcher...")
     stock_result = get_stock_data("NVDA")
     if stock_result:
         print("✅ Stock data fetched successfully!")
@@ -205,7 +443,7 @@ if __name__ == "__main__":
         print("❌ Error: Could not fetch stock data")
     
     # Test fundamental data
-    print("\n[2/4] Testing fundamental data fetcher...")
+    print("\n[2/5] Testing fundamental data fetcher...")
     fund_result = get_fundamental_data("NVDA")
     if fund_result:
         print("✅ Fundamental data fetched successfully!")
@@ -217,7 +455,7 @@ if __name__ == "__main__":
         print("❌ Error: Could not fetch fundamental data")
     
     # Test news
-    print("\n[3/4] Testing news fetcher...")
+    print("\n[3/5] Testing news fetcher...")
     news_result = get_company_news("NVDA", "NVIDIA")
     if news_result:
         print(f"✅ Found {len(news_result)} news articles")
@@ -227,7 +465,7 @@ if __name__ == "__main__":
         print("❌ Error: Could not fetch news")
     
     # Test peer comparison
-    print("\n[4/4] Testing peer comparison...")
+    print("\n[4/5] Testing peer comparison...")
     peer_result = get_comprehensive_peer_data("NVDA", ["AMD", "INTC"])
     if peer_result:
         print(f"✅ Peer data fetched for {len(peer_result)} companies")
@@ -236,6 +474,16 @@ if __name__ == "__main__":
     else:
         print("❌ Error: Could not fetch peer data")
     
+    # Compare fundamentals fetch paths
+    print("\n[5/5] Comparing full .info scrape vs field-selective fetch...")
+    try:
+        for fields_name, fields in (('all', FUNDAMENTALS), ('peer', PEER_FIELDS)):
+            for row in compare_fundamentals_fetch(["NVDA", "AMD", "INTC"], fields):
+                print(f"    {row['ticker']:<5} {fields_name:<4} .info {row['info_bytes']/1024:6.1f} KB {row['info_ms']:6.0f} ms"
+                      f"  ->  {row['modules']}: {row['selective_bytes']/1024:6.1f} KB {row['selective_ms']:6.0f} ms")
+    except Exception as e:
+        print(f"❌ Error: Could not compare fetch paths: {str(e)}")
+    
     print("\n" + "="*60)
     print("DATA FETCHERS TEST COMPLETE ✅")
     print("="*60)
\ No newline at end of file
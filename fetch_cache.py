@@ -0,0 +1,102 @@
+import os
+import pickle
+import hashlib
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime
+
+CACHE_FOLDER = os.getenv('FETCH_CACHE_DIR', os.path.join('.cache', 'fetchers'))
+
+_stats = {}
+_stats_lock = threading.Lock()
+_refresh = contextvars.ContextVar('fetch_cache_refresh', default=False)
+
+
+def record_lookup(name, hit):
+    """Count a cache lookup, for caches kept outside disk_cached (e.g. the news store)"""
+    with _stats_lock:
+        _stats.setdefault(name, {'hits': 0, 'misses': 0})['hits' if hit else 'misses'] += 1
+
+
+def disk_cached(ttl_minutes):
+    """
+    Cache a fetcher's results on disk for ttl_minutes, shared across processes
+    (the app, job workers and the prewarm scheduler all read the same files)
+    Empty results (None, [], {}) are never cached, so errors are retried
+    FETCH_CACHE=off disables the cache
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if os.getenv('FETCH_CACHE') == 'off':
+                return func(*args, **kwargs)
+
+            key = hashlib.sha1(repr((args, sorted(kwargs.items()))).encode()).hexdigest()
+            path = os.path.join(CACHE_FOLDER, func.__name__, key + ".pkl")
+
+            if not _refresh.get():
+                try:
+                    age_minutes = (datetime.now().timestamp() - os.path.getmtime(path)) / 60
+                except OSError:
+                    age_minutes = None
+                if age_minutes is not None and age_minutes < ttl_minutes:
+                    try:
+                        with open(path, 'rb') as f:
+                            value = pickle.load(f)
+                        record_lookup(func.__name__, True)
+                        return value
+                    except Exception:
+                        # Truncated, or pickled from code that has since changed: drop it and refetch
+                        try:
+                            os.remove(path)
+                        except OSError:
+                            pass
+
+            record_lookup(func.__name__, False)
+            value = func(*args, **kwargs)
+            if value:
+                try:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                    with open(tmp_path, 'wb') as f:
+                        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    os.replace(tmp_path, path)
+                except OSError as e:
+                    print(f"Error writing fetch cache: {str(e)}")
+            return value
+
+        wrapper.uncached = func
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def fresh_fetches():
+    """Within this block cached fetchers skip cache reads (results are still written)"""
+    token = _refresh.set(True)
+    try:
+        yield
+    finally:
+        _refresh.reset(token)
+
+
+def cache_bypassed():
+    """True inside fresh_fetches(), for caches kept outside disk_cached"""
+    return _refresh.get()
+
+
+def cache_stats(reset=False):
+    """
+    Hit/miss counts per fetcher in this process
+    Returns: dict name -> {'hits', 'misses', 'hit_rate'}
+    """
+    with _stats_lock:
+        stats = {
+            name: {**counts, 'hit_rate': round(counts['hits'] / max(1, counts['hits'] + counts['misses']), 3)}
+            for name, counts in _stats.items()
+        }
+        if reset:
+            _stats.clear()
+    return stats
@@ -0,0 +1,230 @@
+import os
+import re
+import time
+import pickle
+from array import array
+from collections import defaultdict
+
+INDEX_PATH = os.path.join("sec_corpus", "filing_index.pkl")
+
+
+def index_tokens(text):
+    """Lowercase alphanumeric tokens, stopwords kept so phrase positions are exact"""
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+class FilingIndex:
+    """
+    Positional inverted index over extracted 10-K sections
+    Each document is one (ticker, filing_date, section); postings map
+    term -> {doc_id: positions} so phrase queries need no re-parsing
+    """
+
+    def __init__(self):
+        self.docs = {}                       # doc_id -> (ticker, filing_date, section)
+        self.doc_ids = {}                    # (ticker, filing_date, section) -> doc_id
+        self.postings = defaultdict(dict)    # term -> {doc_id: array of positions}
+        self.doc_terms = {}                  # doc_id -> terms, so a doc can be removed
+        self.next_id = 0
+
+    def add_document(self, ticker, filing_date, section, text):
+        """Index one section, replacing any earlier version of it"""
+        key = (ticker, filing_date, section)
+        if key in self.doc_ids:
+            self.remove_document(self.doc_ids[key])
+
+        doc_id = self.next_id
+        self.next_id += 1
+        self.docs[doc_id] = key
+        self.doc_ids[key] = doc_id
+
+        positions = defaultdict(lambda: array('I'))
+        for position, term in enumerate(index_tokens(text)):
+            positions[term].append(position)
+        for term, term_positions in positions.items():
+            self.postings[term][doc_id] = term_positions
+        self.doc_terms[doc_id] = list(positions)
+
+    def remove_document(self, doc_id):
+        """Drop one document and its postings"""
+        for term in self.doc_terms.pop(doc_id, []):
+            self.postings[term].pop(doc_id, None)
+            if not self.postings[term]:
+                del self.postings[term]
+        key = self.docs.pop(doc_id)
+        del self.doc_ids[key]
+
+    def remove_ticker(self, ticker):
+        """Drop every filing of a ticker (e.g. before indexing a newer filing)"""
+        for doc_id in [d for d, key in self.docs.items() if key[0] == ticker]:
+            self.remove_document(doc_id)
+
+    def indexed_filings(self):
+        """Returns: dict of ticker -> set of indexed filing dates"""
+        filings = defaultdict(set)
+        for ticker, filing_date, _ in self.docs.values():
+            filings[ticker].add(filing_date)
+        return filings
+
+    def update_from_corpus(self, out_dir="sec_corpus", keep_history=False):
+        """
+        Index sections from a sec_batch corpus that are not indexed yet
+        By default an older filing of the same ticker is replaced
+        Returns: number of sections indexed
+        """
+        from sec_batch import load_corpus
+
+        corpus = load_corpus(out_dir, "sections")
+        if corpus.empty:
+            return 0
+
+        indexed = self.indexed_filings()
+        added = 0
+        for (ticker, filing_date), rows in corpus.groupby(['ticker', 'filing_date'], observed=True):
+            if filing_date in indexed.get(ticker, set()):
+                continue
+            if not keep_history:
+                self.remove_ticker(ticker)
+            for row in rows.itertuples():
+                self.add_document(ticker, filing_date, row.section, row.text)
+                added += 1
+        return added
+
+    def _phrase_docs(self, terms):
+        """Docs containing the terms consecutively -> number of occurrences"""
+        if not terms:
+            return {}
+        if any(term not in self.postings for term in terms):
+            return {}
+
+        candidate_docs = set(self.postings[terms[0]])
+        for term in terms[1:]:
+            candidate_docs &= set(self.postings[term])
+
+        matches = {}
+        for doc_id in candidate_docs:
+            starts = set(self.postings[terms[0]][doc_id])
+            for offset, term in enumerate(terms[1:], 1):
+                starts &= {p - offset for p in self.postings[term][doc_id]}
+                if not starts:
+                    break
+            if starts:
+                matches[doc_id] = len(starts)
+        return matches
+
+    def search(self, query, limit=50):
+        """
+        Boolean / phrase search
+        Syntax: terms and "quoted phrases" are ANDed, OR separates alternatives,
+        NOT or a leading '-' excludes, ticker:X and section:Y filter
+        e.g. '"export controls" china OR "entity list" section:risk_factors'
+        Returns: list of hit dicts sorted by match count
+        """
+        results = {}
+        for disjunct in re.split(r'\s+OR\s+', query.strip()):
+            for doc_id, count in self._search_conjunction(disjunct).items():
+                results[doc_id] = results.get(doc_id, 0) + count
+
+        hits = []
+        for doc_id, count in sorted(results.items(), key=lambda item: item[1], reverse=True)[:limit]:
+            ticker, filing_date, section = self.docs[doc_id]
+            hits.append({'ticker': ticker, 'filing_date': filing_date, 'section': section, 'matches': count})
+        return hits
+
+    def _search_conjunction(self, clause_text):
+        """Evaluate one OR-free clause list -> {doc_id: match count}"""
+        include, exclude, filters = [], [], {}
+        negate_next = False
+
+        for token in re.findall(r'-?"[^"]+"|\S+', clause_text):
+            if token == 'NOT':
+                negate_next = True
+                continue
+            negate = negate_next or token.startswith('-')
+            negate_next = False
+            token = token.lstrip('-')
+
+            field = re.match(r'(ticker|section):(\S+)$', token, re.IGNORECASE)
+            if field:
+                filters[field.group(1).lower()] = field.group(2)
+                continue
+
+            terms = index_tokens(token.strip('"'))
+            if terms:
+                (exclude if negate else include).append(terms)
+
+        if include:
+            matched = self._phrase_docs(include[0])
+            for terms in include[1:]:
+                other = self._phrase_docs(terms)
+                matched = {d: c + other[d] for d, c in matched.items() if d in other}
+        else:
+            matched = {doc_id: 0 for doc_id in self.docs}
+
+        for terms in exclude:
+            excluded = self._phrase_docs(terms)
+            matched = {d: c for d, c in matched.items() if d not in excluded}
+
+        if 'ticker' in filters:
+            matched = {d: c for d, c in matched.items() if self.docs[d][0] == filters['ticker'].upper()}
+        if 'section' in filters:
+            matched = {d: c for d, c in matched.items() if self.docs[d][2] == filters['section'].lower()}
+        return matched
+
+    def save(self, path=INDEX_PATH):
+        """Persist the index (written to a temp file, then swapped in)"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        state = {
+            'docs': self.docs,
+            'postings': dict(self.postings),
+            'doc_terms': self.doc_terms,
+            'next_id': self.next_id,
+        }
+        with open(path + ".tmp", 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        """Load a saved index, or return an empty one if none exists"""
+        index = cls()
+        if not os.path.exists(path):
+            return index
+
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        index.docs = state['docs']
+        index.doc_ids = {key: doc_id for doc_id, key in index.docs.items()}
+        index.postings = defaultdict(dict, state['postings'])
+        index.doc_terms = state['doc_terms']
+        index.next_id = state['next_id']
+        return index
+
+
+def update_index(out_dir="sec_corpus", path=None):
+    """
+    Bring the on-disk index up to date with the ingested corpus
+    Returns: the updated FilingIndex
+    """
+    path = path or os.path.join(out_dir, "filing_index.pkl")
+    index = FilingIndex.load(path)
+    added = index.update_from_corpus(out_dir)
+    if added:
+        index.save(path)
+    print(f"Indexed {added} new sections ({len(index.docs)} total, {len(index.postings)} terms)")
+    return index
+
+
+if __name__ == "__main__":
+    import sys
+
+    index = update_index()
+    query = ' '.join(sys.argv[1:]) or '"export controls" section:risk_factors'
+
+    start = time.perf_counter()
+    hits = index.search(query)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    print(f"\n{len(hits)} hits for {query!r} in {elapsed_ms:.2f} ms")
+    for hit in hits:
+        print(f"    {hit['ticker']:<6} {hit['filing_date']}  {hit['section']:<13} {hit['matches']} matches")
@@ -0,0 +1,277 @@
+import os
+import json
+import time
+import zstandard as zstd
+from datetime import datetime, timedelta
+
+STORE_FOLDER = "filing_store"
+DOCUMENT_FRAME = "document"
+
+# Raw files that the store makes redundant once a filing is archived
+RAW_FILENAMES = ('full-submission.txt', 'extracted_10k.html')
+
+
+class FilingStore:
+    """
+    Compressed store for 10-K filings
+    Each filing is one .zst file made of independent zstd frames - the full
+    document plus one per section - with a JSON index of frame offsets, so a
+    single section is read and inflated without touching the rest
+    """
+
+    def __init__(self, folder=STORE_FOLDER, level=10):
+        """Initialize the store folder and compressor"""
+        self.folder = folder
+        self.compressor = zstd.ZstdCompressor(level=level)
+        self.decompressor = zstd.ZstdDecompressor()
+
+    def _paths(self, ticker, filing_date):
+        base = os.path.join(self.folder, ticker.upper(), filing_date)
+        return base + ".zst", base + ".json"
+
+    def put(self, ticker, filing_date, document, sections, raw_bytes=None):
+        """
+        Store one filing
+        document: full primary document (HTML); sections: dict name -> text
+        raw_bytes: size of the raw files this replaces, for savings stats
+        Returns: the filing's index dict
+        """
+        data_path, index_path = self._paths(ticker, filing_date)
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+
+        frames = {}
+        offset = 0
+        with open(data_path + ".tmp", 'wb') as f:
+            for name, text in [(DOCUMENT_FRAME, document), *sections.items()]:
+                raw = text.encode('utf-8')
+                frame = self.compressor.compress(raw)
+                f.write(frame)
+                frames[name] = {'offset': offset, 'length': len(frame), 'raw_size': len(raw)}
+                offset += len(frame)
+        os.replace(data_path + ".tmp", data_path)
+
+        index = {
+            'ticker': ticker.upper(),
+            'filing_date': filing_date,
+            'stored_at': datetime.now().isoformat(timespec='seconds'),
+            'frames': frames,
+            'compressed_bytes': offset,
+            'raw_bytes': raw_bytes if raw_bytes is not None else sum(fr['raw_size'] for fr in frames.values()),
+        }
+        with open(index_path, 'w') as f:
+            json.dump(index, f)
+        return index
+
+    def get_index(self, ticker, filing_date):
+        """Returns: index dict for one filing, or None if it is not stored"""
+        _, index_path = self._paths(ticker, filing_date)
+        if not os.path.exists(index_path):
+            return None
+        with open(index_path, 'r') as f:
+            return json.load(f)
+
+    def read_section(self, ticker, filing_date, section):
+        """
+        Read one section (or DOCUMENT_FRAME) by seeking to its frame
+        Returns: text, or None if the filing or section is not stored
+        """
+        index = self.get_index(ticker, filing_date)
+        if not index or section not in index['frames']:
+            return None
+
+        frame = index['frames'][section]
+        data_path, _ = self._paths(ticker, filing_date)
+        with open(data_path, 'rb') as f:
+            f.seek(frame['offset'])
+            compressed = f.read(frame['length'])
+        return self.decompressor.decompress(compressed).decode('utf-8')
+
+    def list_filings(self, ticker=None):
+        """Returns: list of index dicts, oldest filing first per ticker"""
+        if not os.path.isdir(self.folder):
+            return []
+
+        tickers = [ticker.upper()] if ticker else sorted(os.listdir(self.folder))
+        filings = []
+        for symbol in tickers:
+            ticker_dir = os.path.join(self.folder, symbol)
+            if not os.path.isdir(ticker_dir):
+                continue
+            for name in sorted(os.listdir(ticker_dir)):
+                if name.endswith(".json"):
+                    filings.append(self.get_index(symbol, name[:-len(".json")]))
+        return filings
+
+    def delete(self, ticker, filing_date):
+        """Remove one stored filing; returns bytes freed"""
+        freed = 0
+        for path in self._paths(ticker, filing_date):
+            if os.path.exists(path):
+                freed += os.path.getsize(path)
+                os.remove(path)
+        return freed
+
+    def evict(self, keep_per_ticker=2, max_age_days=None, max_total_bytes=None):
+        """
+        Evict old filings
+        - keep only the newest keep_per_ticker filings of each ticker
+        - drop filings stored more than max_age_days ago (age counts from
+          archiving, stored_at, not from the filing's own date)
+        - then drop the oldest-stored filings until under max_total_bytes
+        Returns: dict with evicted count and bytes freed
+        """
+        evicted, freed = 0, 0
+        survivors = []
+
+        by_ticker = {}
+        for index in self.list_filings():
+            by_ticker.setdefault(index['ticker'], []).append(index)
+
+        cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat() if max_age_days else None
+        for filings in by_ticker.values():
+            for position, index in enumerate(reversed(filings)):
+                too_many = keep_per_ticker is not None and position >= keep_per_ticker
+                too_old = cutoff is not None and index['stored_at'] < cutoff
+                if too_many or too_old:
+                    freed += self.delete(index['ticker'], index['filing_date'])
+                    evicted += 1
+                else:
+                    survivors.append(index)
+
+        if max_total_bytes is not None:
+            total = sum(index['compressed_bytes'] for index in survivors)
+            for index in sorted(survivors, key=lambda i: i['stored_at']):
+                if total <= max_total_bytes:
+                    break
+                freed += self.delete(index['ticker'], index['filing_date'])
+                total -= index['compressed_bytes']
+                evicted += 1
+
+        return {'evicted': evicted, 'bytes_freed': freed}
+
+    def stats(self):
+        """
+        Storage report across the store
+        Returns: dict with filing count, raw vs compressed bytes and bytes saved
+        """
+        filings = self.list_filings()
+        raw = sum(index['raw_bytes'] for index in filings)
+        compressed = sum(index['compressed_bytes'] for index in filings)
+        return {
+            'filings': len(filings),
+            'raw_bytes': raw,
+            'compressed_bytes': compressed,
+            'bytes_saved': raw - compressed,
+            'ratio': round(raw / compressed, 2) if compressed else None,
+        }
+
+
+def archive_filing(parser, filing_info, store=None, remove_raw=False):
+    """
+    Compress a downloaded filing into the store
+    XBRL facts are cached first, since they are read from full-submission.txt
+    With remove_raw, the raw submission and extracted HTML are deleted afterwards
+    Returns: the stored filing's index dict
+    """
+    store = store or parser.store
+    file_path = filing_info['file_path']
+    filing_dir = os.path.dirname(file_path)
+
+    stored = store.get_index(filing_info['ticker'], filing_info['filing_date'])
+    if stored and not os.path.exists(file_path):
+        # Already archived with the raw files removed
+        return stored
+
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        document = f.read()
+    sections = parser.extract_sections(parser.html_to_text(file_path))
+
+    raw_paths = [os.path.join(filing_dir, name) for name in RAW_FILENAMES
+                 if os.path.exists(os.path.join(filing_dir, name))]
+    raw_bytes = sum(os.path.getsize(path) for path in raw_paths)
+
+    from sec_parser import XBRL_FACTS_FILENAME
+    submission_file = os.path.join(filing_dir, 'full-submission.txt')
+    facts_path = os.path.join(filing_dir, XBRL_FACTS_FILENAME)
+    if os.path.exists(submission_file) and not os.path.exists(facts_path):
+        parser.extract_xbrl_facts(submission_file).to_parquet(facts_path, index=False)
+
+    index = store.put(filing_info['ticker'], filing_info['filing_date'], document, sections, raw_bytes=raw_bytes)
+
+    if remove_raw:
+        for path in raw_paths:
+            os.remove(path)
+    return index
+
+
+def measure_read_latency(store, section='mda', repeats=5):
+    """
+    Time single-section reads against inflating the whole filing
+    Returns: dict with median milliseconds for each
+    """
+    section_times, full_times = [], []
+    for index in store.list_filings():
+        if section not in index['frames']:
+            continue
+        for _ in range(repeats):
+            start = time.perf_counter()
+            store.read_section(index['ticker'], index['filing_date'], section)
+            section_times.append(time.perf_counter() - start)
+
+            data_path, _ = store._paths(index['ticker'], index['filing_date'])
+            start = time.perf_counter()
+            with open(data_path, 'rb') as f:
+                reader = store.decompressor.stream_reader(f, read_across_frames=True)
+                while reader.read(1 << 20):
+                    pass
+            full_times.append(time.perf_counter() - start)
+
+    def median_ms(values):
+        return round(sorted(values)[len(values) // 2] * 1000, 3) if values else None
+
+    return {'section_read_ms': median_ms(section_times), 'full_read_ms': median_ms(full_times)}
+
+
+if __name__ == "__main__":
+    import argparse
+    from sec_parser import SECParser
+
+    arg_parser = argparse.ArgumentParser(description="Archive downloaded 10-Ks into the compressed filing store")
+    arg_parser.add_argument("tickers", nargs="*", help="Tickers to archive (default: every downloaded ticker)")
+    arg_parser.add_argument("--download-folder", default="sec_filings")
+    arg_parser.add_argument("--store-folder", default=STORE_FOLDER)
+    arg_parser.add_argument("--remove-raw", action="store_true", help="Delete raw submission files after archiving")
+    arg_parser.add_argument("--keep", type=int, default=2, help="Filings to keep per ticker when evicting")
+    arg_parser.add_argument("--max-age-days", type=int)
+    arg_parser.add_argument("--max-gb", type=float)
+    args = arg_parser.parse_args()
+
+    parser = SECParser(args.download_folder, verbose=False, store_folder=args.store_folder)
+    store = parser.store
+
+    filings_root = os.path.join(args.download_folder, "sec-edgar-filings")
+    tickers = args.tickers or (sorted(os.listdir(filings_root)) if os.path.isdir(filings_root) else [])
+
+    for ticker in tickers:
+        filings = parser.get_10k_history(ticker.upper(), limit=args.keep, download=False)
+        if isinstance(filings, dict):
+            print(f"    ❌ {ticker}: {filings['error']}")
+            continue
+        for filing_info in filings:
+            try:
+                index = archive_filing(parser, filing_info, store, remove_raw=args.remove_raw)
+            except Exception as e:
+                print(f"    ❌ {ticker} {filing_info['filing_date']}: {str(e)}")
+                continue
+            print(f"    ✅ {ticker} {filing_info['filing_date']}: {index['raw_bytes']/1024:.0f} KB -> {index['compressed_bytes']/1024:.0f} KB")
+
+    max_bytes = int(args.max_gb * (1 << 30)) if args.max_gb else None
+    eviction = store.evict(keep_per_ticker=args.keep, max_age_days=args.max_age_days, max_total_bytes=max_bytes)
+    report = store.stats()
+    latency = measure_read_latency(store)
+
+    print("\n" + "="*60)
+    print(f"Filings stored: {report['filings']}  (evicted {eviction['evicted']}, freed {eviction['bytes_freed']/1e6:.1f} MB)")
+    print(f"Raw: {report['raw_bytes']/1e6:.1f} MB  Compressed: {report['compressed_bytes']/1e6:.1f} MB  Saved: {report['bytes_saved']/1e6:.1f} MB (x{report['ratio']})")
+    print(f"Item 7 read: {latency['section_read_ms']} ms  vs full filing: {latency['full_read_ms']} ms")
+    print("="*60)
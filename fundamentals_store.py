@@ -0,0 +1,208 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from datetime import datetime, timedelta
+from data_fetchers import FUNDAMENTALS
+
+HISTORY_FOLDER = "fundamentals_history"
+
+# Layout under the folder (hive-style, so date filters prune whole partitions):
+#   date=YYYY-MM-DD/part-<ns>.parquet    snapshots appended that day, named in write order
+
+# Every fetch appends a file, so append compacts a partition once it holds this many
+COMPACT_AFTER_FILES = 16
+
+SCHEMA = pa.schema(
+    [('ticker', pa.dictionary(pa.int32(), pa.string())), ('captured_at', pa.timestamp('s'))]
+    + [(field, pa.float64()) for field in FUNDAMENTALS]
+)
+PARTITIONING = ds.partitioning(pa.schema([('date', pa.string())]), flavor='hive')
+
+
+def _to_number(value):
+    """Fundamentals value -> float ('12.34%' -> 0.1234, 'N/A' -> NaN)"""
+    if isinstance(value, str):
+        if value.endswith('%'):
+            try:
+                return float(value[:-1]) / 100
+            except ValueError:
+                return np.nan
+        return np.nan
+    return float(value) if isinstance(value, (int, float)) else np.nan
+
+
+class FundamentalsStore:
+    """
+    Append-only daily snapshots of get_fundamental_data, one Parquet partition per date
+    Tickers are dictionary-encoded; the latest snapshot of a ticker on a date wins
+    """
+
+    def __init__(self, folder=HISTORY_FOLDER):
+        self.folder = folder
+
+    def append(self, snapshots, captured_at=None):
+        """
+        Append snapshots for one or more tickers
+        snapshots: dict ticker -> fundamentals dict (formatted or raw values)
+        Returns: path of the written file, or None if there was nothing to write
+        """
+        snapshots = {ticker: data for ticker, data in snapshots.items() if data}
+        if not snapshots:
+            return None
+
+        captured_at = (captured_at or datetime.now()).replace(microsecond=0)
+        frame = pd.DataFrame([
+            {field: _to_number(data.get(field, 'N/A')) for field in FUNDAMENTALS}
+            for data in snapshots.values()
+        ])
+        frame.insert(0, 'captured_at', captured_at)
+        frame.insert(0, 'ticker', pd.Categorical([ticker.upper() for ticker in snapshots]))
+
+        partition = os.path.join(self.folder, f"date={captured_at:%Y-%m-%d}")
+        os.makedirs(partition, exist_ok=True)
+        path = os.path.join(partition, f"part-{time.time_ns():020d}.parquet")
+        table = pa.Table.from_pandas(frame, schema=SCHEMA, preserve_index=False)
+        pq.write_table(table, path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+        if sum(name.endswith(".parquet") for name in os.listdir(partition)) >= COMPACT_AFTER_FILES:
+            self.compact(f"{captured_at:%Y-%m-%d}")
+        return path
+
+    def dates(self):
+        """Returns: sorted list of snapshot dates (YYYY-MM-DD)"""
+        if not os.path.isdir(self.folder):
+            return []
+        return sorted(name[len("date="):] for name in os.listdir(self.folder) if name.startswith("date="))
+
+    def read(self, tickers=None, start=None, end=None, fields=None):
+        """
+        Range query over snapshots; start/end are inclusive dates (str or date)
+        Only matching date partitions and columns are read
+        Returns: DataFrame with date, ticker, captured_at and the fields, one row per ticker per date
+        """
+        columns = ['date', 'ticker', 'captured_at', *(fields or FUNDAMENTALS)]
+        if not self.dates():
+            return pd.DataFrame(columns=columns)
+
+        dataset = ds.dataset(self.folder, format='parquet', partitioning=PARTITIONING, schema=SCHEMA.append(pa.field('date', pa.string())))
+        condition = None
+        for clause in (
+            ds.field('date') >= str(start) if start else None,
+            ds.field('date') <= str(end) if end else None,
+            ds.field('ticker').isin([t.upper() for t in tickers]) if tickers else None,
+        ):
+            if clause is not None:
+                condition = clause if condition is None else condition & clause
+
+        frame = dataset.to_table(columns=columns, filter=condition).to_pandas()
+        # Files are read in write order, so a stable sort keeps the last write of a tie
+        return (frame.sort_values('captured_at', kind='stable')
+                .drop_duplicates(['date', 'ticker'], keep='last')
+                .sort_values(['ticker', 'date'])
+                .reset_index(drop=True))
+
+    def history(self, ticker, field, start=None, end=None):
+        """Returns: Series of one field for one ticker, indexed by date"""
+        frame = self.read([ticker], start, end, [field])
+        return frame.set_index('date')[field]
+
+    def changes(self, tickers=None, lookback_days=30, min_change=0.0):
+        """
+        What changed between each ticker's latest snapshot and the one before it
+        min_change: minimum relative change to report (0.05 = 5%)
+        Returns: DataFrame with ticker, field, previous/latest dates and values, and change
+        """
+        start = (datetime.now() - timedelta(days=lookback_days)).strftime('%Y-%m-%d')
+        frame = self.read(tickers, start=start)
+        columns = ['ticker', 'field', 'previous_date', 'latest_date', 'previous', 'latest', 'change']
+        if frame.empty:
+            return pd.DataFrame(columns=columns)
+
+        last_two = frame.groupby('ticker', observed=True).tail(2)
+        latest = last_two.groupby('ticker', observed=True).nth(-1).set_index('ticker')
+        previous = last_two.groupby('ticker', observed=True).nth(-2).set_index('ticker')
+        latest = latest.loc[latest.index.intersection(previous.index)]
+        if latest.empty:
+            return pd.DataFrame(columns=columns)
+
+        old = previous.loc[latest.index, list(FUNDAMENTALS)].stack(future_stack=True)
+        new = latest[list(FUNDAMENTALS)].stack(future_stack=True)
+        diff = pd.DataFrame({'previous': old, 'latest': new})
+        diff['change'] = (diff['latest'] - diff['previous']) / diff['previous'].abs()
+        changed = (diff['latest'] != diff['previous']) & ~(diff['latest'].isna() & diff['previous'].isna())
+        diff = diff[changed & ~(diff['change'].abs() < min_change)]
+
+        diff.index.names = ['ticker', 'field']
+        diff = diff.reset_index()
+        diff['previous_date'] = diff['ticker'].map(previous['date'])
+        diff['latest_date'] = diff['ticker'].map(latest['date'])
+        return diff[columns].reset_index(drop=True)
+
+    def compact(self, date):
+        """
+        Merge one date partition's files into a single file, keeping each ticker's latest snapshot
+        Returns: number of files merged
+        """
+        partition = os.path.join(self.folder, f"date={date}")
+        files = sorted(os.path.join(partition, name) for name in os.listdir(partition) if name.endswith(".parquet"))
+        if len(files) < 2:
+            return len(files)
+
+        # Files are in write order, so the last row of a ticker is its latest snapshot
+        frame = pa.concat_tables(pq.read_table(path, schema=SCHEMA) for path in files).to_pandas()
+        frame = frame.drop_duplicates('ticker', keep='last')
+        table = pa.Table.from_pandas(frame, schema=SCHEMA, preserve_index=False)
+        # Named after the newest merged file so it still sorts before later appends
+        merged = files[-1][:-len(".parquet")] + "-compacted.parquet"
+        pq.write_table(table, merged + ".tmp")
+        os.replace(merged + ".tmp", merged)
+        for path in files:
+            # Another process compacting the same partition may have removed it already
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return len(files)
+
+
+def record_fundamentals(snapshots, store=None):
+    """Append snapshots to the history store, never failing the caller"""
+    try:
+        return (store or FundamentalsStore()).append(snapshots)
+    except Exception as e:
+        print(f"Error recording fundamentals history: {str(e)}")
+        return None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Query the daily fundamentals history")
+    arg_parser.add_argument("tickers", nargs="*", help="Tickers to query (default: all)")
+    arg_parser.add_argument("--field", default="forward_pe")
+    arg_parser.add_argument("--days", type=int, default=90)
+    arg_parser.add_argument("--min-change", type=float, default=0.0)
+    args = arg_parser.parse_args()
+
+    store = FundamentalsStore()
+    start_date = (datetime.now() - timedelta(days=args.days)).strftime('%Y-%m-%d')
+
+    start = time.perf_counter()
+    frame = store.read(args.tickers or None, start=start_date, fields=[args.field])
+    read_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    changes = store.changes(args.tickers or None, lookback_days=args.days, min_change=args.min_change)
+    changes_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{len(frame)} snapshots over {len(store.dates())} days ({read_ms:.1f} ms)")
+    if not frame.empty:
+        print(frame.pivot(index='date', columns='ticker', values=args.field).to_string())
+    print(f"\n{len(changes)} changes since the previous snapshot ({changes_ms:.1f} ms)")
+    if not changes.empty:
+        print(changes.to_string(index=False))
@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import uuid
+import pickle
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pipeline import run_analysis_job
+
+JOB_DB = os.getenv('JOB_QUEUE_DB', 'jobs.db')
+# Finished (done/error) jobs older than this are deleted, with their pickled results
+JOB_RETENTION_DAYS = float(os.getenv('JOB_RETENTION_DAYS', '7'))
+
+# Running jobs refresh heartbeat_at this often, well inside the stale window
+HEARTBEAT_SECONDS = 30
+
+# Job kinds -> handler(payload, report_progress) returning the job's result
+JOB_HANDLERS = {
+    'analysis': run_analysis_job,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    job_key TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress BLOB,
+    progress_seq INTEGER NOT NULL DEFAULT 0,
+    result BLOB,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    heartbeat_at TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_key ON jobs (job_key, status);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+"""
+
+
+def _now():
+    return datetime.now().isoformat(timespec='milliseconds')
+
+
+class JobQueue:
+    """
+    Persistent local job queue backed by SQLite
+    Jobs outlive the Streamlit script run that submitted them: workers run
+    them in this process (workers > 0) and/or in separate worker processes
+    sharing the same database file. Identical jobs are merged by key.
+    """
+
+    def __init__(self, db_path=JOB_DB, workers=2, stale_minutes=15, retention_days=JOB_RETENTION_DAYS):
+        """Open the database, clean up stale and expired jobs and start `workers` worker threads"""
+        self.db_path = db_path
+        self.wake = threading.Event()
+        self.stop = threading.Event()
+
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+        self.requeue_stale(stale_minutes)
+        self.purge_finished(retention_days)
+
+        self.threads = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._work_loop, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    @contextmanager
+    def _connect(self):
+        """Autocommit connection; explicit BEGIN IMMEDIATE where atomicity matters"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.row_factory = sqlite3.Row
+            yield conn
+        finally:
+            conn.close()
+
+    def submit(self, kind, payload, reuse_done=True):
+        """
+        Queue a job, merging with an identical queued, running or (by default) finished job
+        Returns: job id
+        """
+        job_key = f"{kind}:{json.dumps(payload, sort_keys=True)}"
+        statuses = ('queued', 'running', 'done') if reuse_done else ('queued', 'running')
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            existing = conn.execute(
+                f"SELECT id FROM jobs WHERE job_key = ? AND status IN ({','.join('?' * len(statuses))}) "
+                "ORDER BY created_at DESC LIMIT 1",
+                (job_key, *statuses),
+            ).fetchone()
+            if existing:
+                conn.execute("COMMIT")
+                return existing['id']
+
+            job_id = uuid.uuid4().hex[:12]
+            conn.execute(
+                "INSERT INTO jobs (id, job_key, kind, payload, status, created_at) VALUES (?, ?, ?, ?, 'queued', ?)",
+                (job_id, job_key, kind, json.dumps(payload), _now()),
+            )
+            conn.execute("COMMIT")
+
+        self.wake.set()
+        return job_id
+
+    def get(self, job_id):
+        """
+        Current state of a job
+        Returns: dict with status, progress_seq, progress/result objects and error, or None
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not row:
+            return None
+
+        return {
+            'id': row['id'],
+            'kind': row['kind'],
+            'payload': json.loads(row['payload']),
+            'status': row['status'],
+            'progress_seq': row['progress_seq'],
+            'progress': pickle.loads(row['progress']) if row['progress'] else None,
+            'result': pickle.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'created_at': row['created_at'],
+            'finished_at': row['finished_at'],
+        }
+
+    def counts(self):
+        """Returns: dict of status -> number of jobs"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row['status']: row['n'] for row in rows}
+
+    def requeue_stale(self, stale_minutes=15):
+        """Put running jobs whose worker stopped heartbeating back in the queue"""
+        cutoff = (datetime.now() - timedelta(minutes=stale_minutes)).isoformat(timespec='milliseconds')
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running' AND heartbeat_at < ?",
+                (cutoff,),
+            )
+
+    def purge_finished(self, max_age_days=JOB_RETENTION_DAYS):
+        """
+        Delete done and error jobs that finished more than max_age_days ago
+        Returns: number of jobs deleted
+        """
+        cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat(timespec='milliseconds')
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'error') AND finished_at < ?",
+                (cutoff,),
+            )
+            return cursor.rowcount
+
+    def _claim(self):
+        """Atomically move the oldest queued job to running; returns its row or None"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, kind, payload FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, heartbeat_at = ? WHERE id = ?",
+                    (_now(), _now(), row['id']),
+                )
+            conn.execute("COMMIT")
+        return row
+
+    def _report(self, job_id, progress):
+        """Persist partial results so pollers can render them"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET progress = ?, progress_seq = progress_seq + 1, heartbeat_at = ? WHERE id = ?",
+                (pickle.dumps(progress), _now(), job_id),
+            )
+
+    def _heartbeat(self, job_id, done):
+        """Keep a running job's heartbeat fresh until `done` is set, even through long stages"""
+        while not done.wait(HEARTBEAT_SECONDS):
+            try:
+                with self._connect() as conn:
+                    conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running'", (_now(), job_id))
+            except sqlite3.Error as e:
+                print(f"Error updating heartbeat for job {job_id}: {str(e)}")
+
+    def _finish(self, job_id, result=None, error=None):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, progress_seq = progress_seq + 1 WHERE id = ?",
+                ('error' if error else 'done', pickle.dumps(result) if result is not None else None, error, _now(), job_id),
+            )
+
+    def run_one(self):
+        """Claim and run one queued job; returns False if the queue was empty"""
+        row = self._claim()
+        if not row:
+            return False
+
+        handler = JOB_HANDLERS.get(row['kind'])
+        done = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(row['id'], done), name=f"job-heartbeat-{row['id']}", daemon=True).start()
+        try:
+            if handler is None:
+                raise ValueError(f"No handler for job kind {row['kind']!r}")
+            result = handler(json.loads(row['payload']), lambda progress: self._report(row['id'], progress))
+            self._finish(row['id'], result=result)
+        except Exception as e:
+            print(f"Error running job {row['id']}: {str(e)}")
+            self._finish(row['id'], error=str(e))
+        finally:
+            done.set()
+        return True
+
+    def _work_loop(self):
+        while not self.stop.is_set():
+            if not self.run_one():
+                # Idle: wake on an in-process submit, or poll for jobs from other processes
+                self.wake.wait(timeout=1.0)
+                self.wake.clear()
+
+    def shutdown(self):
+        """Stop worker threads after their current job"""
+        self.stop.set()
+        self.wake.set()
+        for thread in self.threads:
+            thread.join()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Run analysis job workers outside the Streamlit process")
+    arg_parser.add_argument("--workers", type=int, default=4)
+    arg_parser.add_argument("--db", default=JOB_DB)
+    arg_parser.add_argument("--retention-days", type=float, default=JOB_RETENTION_DAYS,
+                            help="Delete finished jobs older than this")
+    args = arg_parser.parse_args()
+
+    queue = JobQueue(args.db, workers=args.workers, retention_days=args.retention_days)
+    print(f"Job workers running: {args.workers} threads on {args.db} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(30)
+            purged = queue.purge_finished(args.retention_days)
+            print(f"    {datetime.now():%H:%M:%S} {queue.counts()}" + (f" (purged {purged} old jobs)" if purged else ""))
+    except KeyboardInterrupt:
+        print("Stopping workers after current jobs...")
+        queue.shutdown()
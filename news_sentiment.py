@@ -0,0 +1,154 @@
+import re
+import numpy as np
+
+# Compact finance lexicon in the spirit of Loughran-McDonald: words that read as
+# good or bad news in a financial context (general-purpose lists misfire on
+# words like "liability", "tax" or "crude"). Inflected forms are listed explicitly.
+# Words whose sign depends on what they modify are left out: "lower costs" vs
+# "lower guidance", "rate cut" vs "job cuts", "record loss", "risk appetite",
+# "default settings", "fine" (the adjective).
+POSITIVE_WORDS = """
+beat beats beating exceed exceeds exceeded exceeding outperform outperforms outperformed
+surge surges surged surging soar soars soared soaring rally rallies rallied rallying
+jump jumps jumped gain gains gained rise rises rising rose climb climbs climbed
+strong stronger strongest robust boost boosts boosted upgrade upgrades upgraded
+raise raises raised growth grow grows grew expand expands expanded expansion
+profit profits profitable profitability improve improves improved improvement
+win wins won award awarded breakthrough breakthroughs innovative innovation
+bullish optimistic optimism upbeat positive favorable momentum rebound rebounds rebounded
+accelerate accelerates accelerated accelerating demand partnership approval approved
+dividend buyback buybacks outperformance tops topped success successful leading leader
+""".split()
+
+NEGATIVE_WORDS = """
+miss misses missed missing fall falls fell falling drop drops dropped dropping
+decline declines declined declining plunge plunges plunged plunging slump slumps slumped
+tumble tumbles tumbled sink sinks sank slide slides slid crash crashes crashed
+loss losses lose loses lost weak weaker weakest weakness downgrade downgrades downgraded
+warn warns warned warning warnings
+lawsuit lawsuits sue sued litigation probe investigation investigations fraud
+recall recalls recalled delay delays delayed halt halts halted ban bans banned
+layoff layoffs restructuring bankruptcy defaulted impairment writedown
+bearish pessimistic concern concerns worry worries worried fear fears
+volatile volatility slowdown slowing shortfall underperform underperforms underperformed
+penalty penalties fined scrutiny antitrust tariff tariffs sanctions selloff
+""".split()
+
+NEGATORS = {'not', 'no', 'never', 'without', 'fails', 'failed'}
+
+# Negators flip a lexicon hit up to this many words later ("not expected to beat");
+# a hit is flipped once however many negators precede it
+NEGATION_WINDOW = 3
+
+# Fewer than MIN_HITS lexicon hits is no signal; |score| below NEUTRAL_BAND reads as
+# neutral and below STRONG_SCORE as weak (mixed news with many hits is still weak, not none)
+MIN_HITS = 3
+NEUTRAL_BAND = 0.15
+STRONG_SCORE = 0.4
+
+_VOCABULARY = {'': 0}
+for _word in POSITIVE_WORDS + NEGATIVE_WORDS + sorted(NEGATORS):
+    _VOCABULARY.setdefault(_word, len(_VOCABULARY))
+
+# Per-word polarity (+1/-1/0) and negator flag, indexed by vocabulary id (0 = unknown word)
+_POLARITY = np.zeros(len(_VOCABULARY), dtype=np.int8)
+_POLARITY[[_VOCABULARY[w] for w in POSITIVE_WORDS]] = 1
+_POLARITY[[_VOCABULARY[w] for w in NEGATIVE_WORDS]] = -1
+_NEGATOR = np.zeros(len(_VOCABULARY), dtype=bool)
+_NEGATOR[[_VOCABULARY[w] for w in NEGATORS]] = True
+
+_TOKEN = re.compile(r"[a-z]+")
+
+
+def score_texts(texts):
+    """
+    Lexicon scores for a batch of texts
+    All texts are tokenized into one flat array of word ids; polarity lookup,
+    negation and per-text sums are array operations
+    Returns: (positive, negative) hit counts per text, as int arrays
+    """
+    tokens = [_TOKEN.findall((text or '').lower()) for text in texts]
+    lengths = np.fromiter((len(words) for words in tokens), dtype=np.int64, count=len(tokens))
+    ids = np.fromiter((_VOCABULARY.get(word, 0) for words in tokens for word in words),
+                      dtype=np.int64, count=int(lengths.sum()))
+    doc = np.repeat(np.arange(len(texts)), lengths)
+
+    polarity = _POLARITY[ids].astype(np.int64)
+    negator = _NEGATOR[ids]
+    negated = np.zeros(len(ids), dtype=bool)
+    for shift in range(1, min(NEGATION_WINDOW, len(ids) - 1) + 1):
+        # A negator `shift` words back, within the same text
+        negated[shift:] |= negator[:-shift] & (doc[shift:] == doc[:-shift])
+    polarity[negated] *= -1
+
+    positive = np.bincount(doc, weights=polarity > 0, minlength=len(texts)).astype(np.int64)
+    negative = np.bincount(doc, weights=polarity < 0, minlength=len(texts)).astype(np.int64)
+    return positive, negative
+
+
+def score_news(articles):
+    """
+    Local sentiment pre-pass over news articles (title + description)
+    The aggregate weights each story by its syndicated copies ('duplicates')
+    Returns: dict with score (-1..1), label, strength ('none', 'weak', 'strong'),
+             positive/negative hit totals and per-article scores (aligned with articles)
+    """
+    if not articles:
+        return {'score': 0.0, 'label': 'neutral', 'strength': 'none', 'positive': 0, 'negative': 0, 'articles': []}
+
+    positive, negative = score_texts([f"{a.get('title') or ''}. {a.get('description') or ''}" for a in articles])
+    hits = positive + negative
+    with np.errstate(invalid='ignore', divide='ignore'):
+        per_article = np.where(hits > 0, (positive - negative) / hits, 0.0)
+
+    weights = 1 + np.array([a.get('duplicates', 0) for a in articles], dtype=np.float64)
+    weighted_hits = float((weights * hits).sum())
+    score = float((weights * (positive - negative)).sum() / weighted_hits) if weighted_hits else 0.0
+
+    if hits.sum() < MIN_HITS:
+        strength = 'none'
+    elif abs(score) < STRONG_SCORE:
+        strength = 'weak'
+    else:
+        strength = 'strong'
+
+    return {
+        'score': round(score, 3),
+        'label': 'bullish' if score >= NEUTRAL_BAND else 'bearish' if score <= -NEUTRAL_BAND else 'neutral',
+        'strength': strength,
+        'positive': int(positive.sum()),
+        'negative': int(negative.sum()),
+        'articles': [round(float(s), 3) for s in per_article],
+    }
+
+
+def format_score(sentiment):
+    """Display string, e.g. '+0.42 (bullish, 9 hits)'"""
+    if not sentiment:
+        return 'N/A'
+    hits = sentiment['positive'] + sentiment['negative']
+    return f"{sentiment['score']:+.2f} ({sentiment['label']}, {hits} hits)"
+
+
+if __name__ == "__main__":
+    import time
+
+    headlines = [
+        {'title': 'Chipmaker shares surge after record quarter beats estimates', 'description': 'Revenue growth accelerated on strong demand.'},
+        {'title': 'Regulators open antitrust probe into chip sales', 'description': 'The investigation adds to concerns over export tariffs.'},
+        {'title': 'Company does not expect to miss guidance', 'description': None},
+        {'title': 'Board schedules annual meeting', 'description': 'Shareholders will vote on directors.'},
+    ]
+    for article in headlines:
+        print(f"{score_news([article])['articles'][0]:+.2f}  {article['title']}")
+    sentiment = score_news(headlines)
+    print(f"Aggregate: {format_score(sentiment)}, strength {sentiment['strength']}")
+
+    # Typical request: one ticker's 10 articles; batch: 10,000 articles at once
+    for count, runs in ((10, 2000), (10000, 5)):
+        batch = (headlines * (count // len(headlines) + 1))[:count]
+        start = time.perf_counter()
+        for _ in range(runs):
+            score_news(batch)
+        elapsed_us = (time.perf_counter() - start) / runs * 1e6
+        print(f"{count} articles in {elapsed_us:,.0f} µs ({elapsed_us / count:.2f} µs/article)")
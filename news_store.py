@@ -0,0 +1,193 @@
+import os
+import json
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import numpy as np
+from text_fingerprint import exact_hash, minhash, similarity, lsh_keys
+
+NEWS_DB = os.getenv('NEWS_STORE_DB', 'news.db')
+
+# Articles and searches older than this are pruned (searches only look back a week)
+NEWS_RETENTION_DAYS = float(os.getenv('NEWS_RETENTION_DAYS', '30'))
+
+# Bumped when the tables change; the store is a cache, so older tables are dropped and refilled
+SCHEMA_VERSION = 2
+
+# Syndicated copies usually differ only in a few words of the title or description
+DUPLICATE_THRESHOLD = 0.5
+SHINGLE_SIZE = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    key TEXT PRIMARY KEY,
+    cluster_id INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    article TEXT NOT NULL,
+    first_seen TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS articles_fingerprint ON articles (fingerprint);
+CREATE INDEX IF NOT EXISTS articles_first_seen ON articles (first_seen);
+CREATE TABLE IF NOT EXISTS bands (
+    band_key TEXT NOT NULL,
+    key TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bands_key ON bands (band_key);
+CREATE INDEX IF NOT EXISTS bands_article ON bands (key);
+CREATE TABLE IF NOT EXISTS queries (
+    query TEXT PRIMARY KEY,
+    keys TEXT NOT NULL,
+    fetched_at TEXT NOT NULL
+);
+"""
+
+
+def _article_text(article):
+    return f"{article.get('title') or ''} {article.get('description') or ''}"
+
+
+def article_key(article):
+    """Store key of an article: its URL, or a hash of its text when it has none"""
+    return article.get('url') or exact_hash(_article_text(article))
+
+
+class NewsStore:
+    """
+    Local article store shared by every ticker and process
+    Articles are keyed by article_key and grouped into clusters of near-duplicates
+    (exact match on normalized text, then MinHash LSH over title + description);
+    query results are kept so repeat searches skip NewsAPI
+    """
+
+    def __init__(self, db_path=NEWS_DB):
+        self.db_path = db_path
+        with self._connect() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                conn.executescript(
+                    "DROP TABLE IF EXISTS articles; DROP TABLE IF EXISTS bands; DROP TABLE IF EXISTS queries; "
+                    f"PRAGMA user_version = {SCHEMA_VERSION};"
+                )
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.row_factory = sqlite3.Row
+            yield conn
+        finally:
+            conn.close()
+
+    def _find_cluster(self, conn, fingerprint, signature):
+        """Cluster of an exact or near-duplicate stored article, or None"""
+        row = conn.execute("SELECT cluster_id FROM articles WHERE fingerprint = ? LIMIT 1", (fingerprint,)).fetchone()
+        if row:
+            return row['cluster_id']
+
+        keys = lsh_keys(signature)
+        candidates = conn.execute(
+            f"SELECT DISTINCT a.cluster_id, a.signature FROM bands b JOIN articles a ON a.key = b.key "
+            f"WHERE b.band_key IN ({','.join('?' * len(keys))})",
+            keys,
+        ).fetchall()
+        best, best_score = None, DUPLICATE_THRESHOLD
+        for candidate in candidates:
+            score = similarity(signature, np.frombuffer(candidate['signature'], dtype=np.uint64))
+            if score >= best_score:
+                best, best_score = candidate['cluster_id'], score
+        return best
+
+    def add_articles(self, articles, query=None):
+        """
+        Store articles (new keys only) and assign each to a duplicate cluster
+        query: search the articles came from, remembered for cached_query
+        Returns: the articles annotated with 'key' and 'cluster_id'
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        annotated = []
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for article in articles:
+                key = article_key(article)
+                row = conn.execute("SELECT cluster_id FROM articles WHERE key = ?", (key,)).fetchone()
+                if row:
+                    cluster_id = row['cluster_id']
+                else:
+                    fingerprint = exact_hash(_article_text(article))
+                    signature = minhash(_article_text(article), size=SHINGLE_SIZE)
+                    cluster_id = self._find_cluster(conn, fingerprint, signature)
+                    if cluster_id is None:
+                        cluster_id = (conn.execute("SELECT COALESCE(MAX(cluster_id), 0) + 1 FROM articles").fetchone()[0])
+                    conn.execute(
+                        "INSERT INTO articles (key, cluster_id, fingerprint, signature, article, first_seen) VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, cluster_id, fingerprint, signature.tobytes(), json.dumps(article), now),
+                    )
+                    conn.executemany("INSERT INTO bands (band_key, key) VALUES (?, ?)",
+                                     [(band_key, key) for band_key in lsh_keys(signature)])
+                annotated.append({**article, 'key': key, 'cluster_id': cluster_id})
+
+            if query is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO queries (query, keys, fetched_at) VALUES (?, ?, ?)",
+                    (query, json.dumps([a['key'] for a in annotated]), now),
+                )
+            conn.execute("COMMIT")
+        # Only NewsAPI misses write here, so pruning runs at most once per new search
+        self.prune()
+        return annotated
+
+    def cached_query(self, query, max_age_minutes=60):
+        """
+        Articles from an earlier identical search, if it is recent enough
+        Returns: list of articles annotated with 'key' and 'cluster_id', or None
+        """
+        cutoff = (datetime.now() - timedelta(minutes=max_age_minutes)).isoformat(timespec='seconds')
+        with self._connect() as conn:
+            row = conn.execute("SELECT keys FROM queries WHERE query = ? AND fetched_at >= ?", (query, cutoff)).fetchone()
+            if not row:
+                return None
+            keys = json.loads(row['keys'])
+            stored = {
+                r['key']: {**json.loads(r['article']), 'key': r['key'], 'cluster_id': r['cluster_id']}
+                for r in conn.execute(f"SELECT key, cluster_id, article FROM articles WHERE key IN ({','.join('?' * len(keys))})", keys)
+            }
+        return [stored[key] for key in keys if key in stored]
+
+    def prune(self, max_age_days=NEWS_RETENTION_DAYS):
+        """
+        Delete articles (with their LSH bands) and searches older than max_age_days
+        Returns: number of articles deleted
+        """
+        cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat(timespec='seconds')
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM bands WHERE key IN (SELECT key FROM articles WHERE first_seen < ?)", (cutoff,))
+            deleted = conn.execute("DELETE FROM articles WHERE first_seen < ?", (cutoff,)).rowcount
+            conn.execute("DELETE FROM queries WHERE fetched_at < ?", (cutoff,))
+            conn.execute("COMMIT")
+        return deleted
+
+    def stats(self):
+        """Returns: dict with stored articles, distinct clusters and remembered queries"""
+        with self._connect() as conn:
+            articles, clusters = conn.execute("SELECT COUNT(*), COUNT(DISTINCT cluster_id) FROM articles").fetchone()
+            queries = conn.execute("SELECT COUNT(*) FROM queries").fetchone()[0]
+        return {'articles': articles, 'clusters': clusters, 'queries': queries}
+
+
+def collapse_duplicates(articles, limit=None):
+    """
+    Keep the first article of each duplicate cluster, in the given (relevance) order
+    Each kept article gets 'duplicates': how many copies were folded into it
+    """
+    kept, counts = {}, {}
+    for article in articles:
+        cluster_id = article['cluster_id']
+        counts[cluster_id] = counts.get(cluster_id, 0) + 1
+        kept.setdefault(cluster_id, article)
+
+    collapsed = [{**article, 'duplicates': counts[cluster_id] - 1} for cluster_id, article in kept.items()]
+    return collapsed[:limit] if limit else collapsed
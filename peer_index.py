@@ -0,0 +1,170 @@
+import os
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from data_fetchers import fetch_fields, PROFILE_FIELDS
+from peer_ranking import robust_scale, metric_distance
+
+PEER_INDEX_PATH = os.getenv('PEER_INDEX_PATH', 'peer_index.parquet')
+
+# Index field -> similarity weight; market cap is compared on a log scale
+INDEX_FIELDS = {
+    'market_cap': 2.0,
+    'forward_pe': 1.0,
+    'ev_to_ebitda': 1.0,
+    'price_to_sales': 1.0,
+    'gross_margin': 1.0,
+    'profit_margin': 1.0,
+    'roe': 1.0,
+    'revenue_growth_yoy': 1.0,
+}
+
+# Added to the metric distance (in squared MAD units) for a different industry / sector
+INDUSTRY_PENALTY = 2.0
+SECTOR_PENALTY = 8.0
+
+
+def fetch_index_row(ticker):
+    """One index row from a single quote-summary request, or None if yfinance has no data"""
+    try:
+        values = fetch_fields(ticker, (*PROFILE_FIELDS, *INDEX_FIELDS))
+    except Exception as e:
+        print(f"Error fetching index data for {ticker}: {str(e)}")
+        return None
+    if all(values[field] == 'N/A' for field in INDEX_FIELDS):
+        return None
+    return {'ticker': ticker, **values, 'indexed_at': datetime.now().replace(microsecond=0)}
+
+
+class PeerIndex:
+    """
+    Local peer lookup over a ticker universe, stored as one Parquet file
+    Metrics are standardized once at load time; a suggestion is a single
+    vectorized distance computation, with no network call
+    """
+
+    def __init__(self, frame):
+        self.frame = frame.reset_index(drop=True)
+        self.positions = {ticker: i for i, ticker in enumerate(self.frame['ticker'])}
+
+        values = self.frame[list(INDEX_FIELDS)].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64, copy=True)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values[:, 0] = np.log10(values[:, 0])
+        self.scaled = robust_scale(values)
+        self.weights = np.array(list(INDEX_FIELDS.values()))
+        self.sectors = self.frame['sector'].to_numpy()
+        self.industries = self.frame['industry'].to_numpy()
+
+    @classmethod
+    def load(cls, path=PEER_INDEX_PATH):
+        """Returns: PeerIndex, or None if the index has not been built"""
+        if not os.path.exists(path):
+            return None
+        return cls(pd.read_parquet(path))
+
+    def __len__(self):
+        return len(self.frame)
+
+    def __contains__(self, ticker):
+        return ticker in self.positions
+
+    def suggest(self, ticker, k=5, exclude=()):
+        """
+        Nearest tickers by metric distance plus industry/sector penalties
+        Returns: list of (ticker, distance), nearest first; empty if the ticker is not indexed
+        """
+        if ticker not in self.positions:
+            return []
+        position = self.positions[ticker]
+
+        distance = metric_distance(self.scaled, self.scaled[position], self.weights)
+        if self.sectors[position] != 'N/A':
+            distance = (distance
+                        + INDUSTRY_PENALTY * (self.industries != self.industries[position])
+                        + SECTOR_PENALTY * (self.sectors != self.sectors[position]))
+
+        distance[position] = np.inf
+        for symbol in exclude:
+            if symbol in self.positions:
+                distance[self.positions[symbol]] = np.inf
+
+        count = min(k, int(np.isfinite(distance).sum()))
+        if count == 0:
+            return []
+        nearest = np.argpartition(distance, count - 1)[:count]
+        nearest = nearest[np.argsort(distance[nearest], kind='stable')]
+        tickers = self.frame['ticker'].to_numpy()
+        return [(tickers[i], round(float(distance[i]), 3)) for i in nearest]
+
+
+def build_index(tickers, path=PEER_INDEX_PATH, max_age_days=7, workers=8):
+    """
+    Build or refresh the index incrementally
+    Only tickers that are missing or older than max_age_days are fetched; rows
+    already indexed are kept even when a refetch fails
+    Returns: dict with counts of fetched, failed and kept rows and the index size
+    """
+    existing = pd.read_parquet(path) if os.path.exists(path) else pd.DataFrame(columns=['ticker', 'indexed_at'])
+    cutoff = datetime.now() - timedelta(days=max_age_days)
+    fresh = set(existing.loc[pd.to_datetime(existing['indexed_at']) >= cutoff, 'ticker'])
+    stale = [ticker for ticker in dict.fromkeys(t.upper() for t in tickers) if ticker not in fresh]
+
+    print(f"Indexing {len(stale)} of {len(set(tickers))} tickers ({len(fresh)} fresh) with {workers} workers...")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        rows = [row for row in pool.map(fetch_index_row, stale) if row]
+
+    updated = pd.DataFrame(rows)
+    if not updated.empty:
+        # Raw values mix numbers and 'N/A'; store numbers (NaN when missing) and text profiles
+        for field in INDEX_FIELDS:
+            updated[field] = pd.to_numeric(updated[field], errors='coerce')
+        existing = existing[~existing['ticker'].isin(updated['ticker'])]
+        frame = pd.concat([existing, updated], ignore_index=True) if len(existing) else updated
+        frame = frame.sort_values('ticker').reset_index(drop=True)
+        frame.to_parquet(path + ".tmp", index=False)
+        os.replace(path + ".tmp", path)
+        size = len(frame)
+    else:
+        size = len(existing)
+
+    return {'fetched': len(rows), 'failed': len(stale) - len(rows), 'kept': len(fresh), 'size': size}
+
+
+if __name__ == "__main__":
+    from batch_reports import read_watchlist
+
+    arg_parser = argparse.ArgumentParser(description="Build and query the local peer suggestion index")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="Index (or refresh) every ticker and peer in a watchlist file")
+    build_parser.add_argument("universe", help="Watchlist file with one 'TICKER [PEER,PEER]' entry per line")
+    build_parser.add_argument("--max-age-days", type=float, default=7)
+    build_parser.add_argument("--workers", type=int, default=8)
+    suggest_parser = commands.add_parser("suggest", help="Suggest peers for tickers already in the index")
+    suggest_parser.add_argument("tickers", nargs="+")
+    suggest_parser.add_argument("-k", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    if args.command == "build":
+        universe = [symbol for ticker, peers in read_watchlist(args.universe) for symbol in (ticker, *peers)]
+        start = time.perf_counter()
+        summary = build_index(universe, max_age_days=args.max_age_days, workers=args.workers)
+        print("\n" + "="*60)
+        print(f"Fetched: {summary['fetched']}  Failed: {summary['failed']}  Kept: {summary['kept']}  "
+              f"Index size: {summary['size']}  ({time.perf_counter() - start:.1f}s)")
+        print("="*60)
+    else:
+        index = PeerIndex.load()
+        if index is None:
+            print(f"❌ No peer index at {PEER_INDEX_PATH}; run 'python peer_index.py build <universe>' first")
+        else:
+            for ticker in args.tickers:
+                start = time.perf_counter()
+                suggestions = index.suggest(ticker.upper(), k=args.k)
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                if suggestions:
+                    print(f"✅ {ticker.upper()}: " + ", ".join(f"{s} ({d:.2f})" for s, d in suggestions) + f"  [{elapsed_ms:.2f} ms]")
+                else:
+                    print(f"❌ {ticker.upper()}: not in the index ({len(index)} tickers)")
@@ -0,0 +1,166 @@
+import warnings
+import numpy as np
+import pandas as pd
+
+# Above this many peers the peer prompt switches to the compact encoding
+COMPACT_THRESHOLD = 8
+# Nearest peers listed row by row in the compact encoding; the rest only feed the aggregates
+COMPACT_PEERS = 10
+
+# peer_data metric -> (CSV column, ranking weight); percentages become fractions
+PEER_METRICS = {
+    'market_cap': ('mcap_b', 2.0),
+    'pe_ratio': ('pe', 1.0),
+    'ev_to_ebitda': ('ev_ebitda', 1.0),
+    'profit_margin': ('margin', 1.0),
+    'roe': ('roe', 1.0),
+    'revenue_growth': ('rev_growth', 1.0),
+    'change_30d': ('chg_30d_pct', 0.5),
+}
+
+
+def peer_frame(peer_data):
+    """
+    Numeric view of get_comprehensive_peer_data output
+    Returns: DataFrame indexed by ticker with the PEER_METRICS columns (NaN for 'N/A')
+    """
+    frame = pd.DataFrame.from_dict(peer_data, orient='index').reindex(columns=list(PEER_METRICS))
+    for column in frame.columns:
+        values = frame[column].astype(str)
+        percent = values.str.endswith('%')
+        numbers = pd.to_numeric(values.str.rstrip('%'), errors='coerce')
+        frame[column] = numbers.where(~percent, numbers / 100)
+    return frame.astype(np.float64)
+
+
+def rank_peers(ticker, frame):
+    """
+    Order peers by distance to the ticker in standardized metric space
+    Market cap is compared on a log scale; each metric is scaled by the peer set's
+    median absolute deviation, and metrics missing for either side are skipped
+    Returns: list of peer tickers, nearest first
+    """
+    peers = frame.drop(index=ticker, errors='ignore')
+    if ticker not in frame.index or peers.empty:
+        return list(peers.index)
+
+    values = frame.to_numpy(copy=True)
+    cap = list(PEER_METRICS).index('market_cap')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        values[:, cap] = np.log10(values[:, cap])
+
+    weights = np.array([weight for _, weight in PEER_METRICS.values()])
+    scaled = robust_scale(values)
+    distance = metric_distance(scaled, scaled[frame.index.get_loc(ticker)], weights)
+
+    order = pd.Series(distance, index=frame.index).drop(index=ticker).sort_values(kind='stable')
+    return list(order.index)
+
+
+def robust_scale(values):
+    """
+    Standardize each column by its median and median absolute deviation
+    (outliers such as a 300x P/E do not squash everyone else); NaN stays NaN
+    """
+    with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+        # Metrics nobody reports are all-NaN columns; they drop out of metric_distance
+        warnings.simplefilter('ignore', RuntimeWarning)
+        median = np.nanmedian(values, axis=0)
+        scale = np.nanmedian(np.abs(values - median), axis=0)
+        return (values - median) / np.where(scale > 0, scale, 1)
+
+
+def metric_distance(scaled, target, weights):
+    """
+    Weighted mean squared distance from every row of `scaled` to `target`
+    Averaged over the metrics both sides have, so a row is not favoured for missing
+    data; rows sharing no metric with the target are infinitely far
+    """
+    diff = (scaled - target) ** 2 * weights
+    present = ~np.isnan(diff)
+    return np.where(present.any(axis=1), np.nansum(diff, axis=1) / np.maximum(present.sum(axis=1), 1), np.inf)
+
+
+def sector_aggregates(ticker, frame):
+    """
+    Peer-set distribution per metric and where the ticker falls in it
+    Returns: DataFrame indexed by CSV column with n, p25, median, p75 and the ticker's percentile
+    """
+    stats = frame.describe(percentiles=[0.25, 0.5, 0.75]).T
+    aggregates = pd.DataFrame({
+        'n': stats['count'].astype(int),
+        'p25': stats['25%'],
+        'median': stats['50%'],
+        'p75': stats['75%'],
+    })
+    if ticker in frame.index:
+        aggregates[f'{ticker}_pctile'] = (frame.rank(pct=True).loc[ticker] * 100).round()
+    aggregates.index = [PEER_METRICS[metric][0] for metric in aggregates.index]
+    return aggregates
+
+
+def _csv(frame):
+    """CSV with 4 significant digits and blanks for missing values"""
+    return frame.to_csv(float_format='%.4g', na_rep='')
+
+
+def metrics_csv(frame, tickers=None):
+    """
+    Prompt encoding of peer_frame rows (all, or `tickers` in that order)
+    Columns use the short PEER_METRICS names, with market cap in $B
+    """
+    rows = frame.loc[[t for t in tickers if t in frame.index]] if tickers is not None else frame
+    rows = rows.assign(market_cap=rows['market_cap'] / 1e9)
+    rows.columns = [PEER_METRICS[metric][0] for metric in rows.columns]
+    rows.index.name = 'ticker'
+    return _csv(rows)
+
+
+def aggregates_csv(frame, ticker=None):
+    """Prompt encoding of sector_aggregates, with market cap in $B"""
+    aggregates = sector_aggregates(ticker, frame)
+    aggregates.loc['mcap_b', ['p25', 'median', 'p75']] /= 1e9
+    aggregates.index.name = 'metric'
+    return _csv(aggregates)
+
+
+def compact_peer_prompt_data(ticker, peer_data, limit=COMPACT_PEERS):
+    """
+    Bounded tabular encoding of a large peer set for the peer prompt
+    Returns: (CSV of the ticker and its `limit` nearest peers, CSV of sector aggregates, peers omitted)
+    """
+    frame = peer_frame(peer_data)
+    listed = [t for t in (ticker, *rank_peers(ticker, frame)[:limit]) if t in frame.index]
+    return metrics_csv(frame, listed), aggregates_csv(frame, ticker), len(frame) - len(listed)
+
+
+if __name__ == "__main__":
+    import time
+
+    # Synthetic sectors: the encoding should stay the same size as the peer set grows
+    rng = np.random.default_rng(0)
+
+    def synthetic_peers(count):
+        return {
+            symbol: {
+                'price': round(float(rng.uniform(10, 500)), 2),
+                'change_30d': round(float(rng.normal(0, 8)), 2),
+                'pe_ratio': float(rng.lognormal(3, 0.5)) if rng.random() > 0.1 else 'N/A',
+                'profit_margin': f"{rng.normal(15, 10):.2f}%",
+                'market_cap': float(rng.lognormal(24, 1.5)),
+                'roe': f"{rng.normal(18, 12):.2f}%",
+                'ev_to_ebitda': float(rng.lognormal(2.8, 0.4)),
+                'revenue_growth': f"{rng.normal(10, 15):.2f}%",
+            }
+            for symbol in ['MAIN'] + [f'P{i:03d}' for i in range(count)]
+        }
+
+    for count in (10, 60, 500):
+        peer_data = synthetic_peers(count)
+        start = time.perf_counter()
+        peers_csv, sector_csv, omitted = compact_peer_prompt_data('MAIN', peer_data)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"{count:>4} peers: {len(peers_csv) + len(sector_csv)} chars in {elapsed_ms:.1f} ms ({omitted} only in aggregates)")
+
+    print("\n" + peers_csv)
+    print(sector_csv)
@@ -0,0 +1,186 @@
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from data_fetchers import (
+    get_stock_data,
+    get_fundamental_data,
+    get_company_news,
+    get_comprehensive_peer_data,
+    get_company_profile,
+    get_price_history
+)
+from technicals import compute_technicals, technicals_by_ticker
+from news_sentiment import score_news
+from fundamentals_store import record_fundamentals
+from fetch_cache import fresh_fetches
+from analysis_cache import analysis_cache_enabled, cached_analyze, reuse_unchanged
+from ai_analyzer import (
+    analyze_financial_health,
+    analyze_peer_comparison,
+    analyze_price_trend,
+    analyze_news_sentiment,
+    generate_investment_summary
+)
+
+
+def data_version(minutes=15, now=None):
+    """
+    Stamp identifying the current data window
+    Results cached under the same stamp are considered fresh
+    """
+    now = now or datetime.now()
+    bucket = now.replace(minute=(now.minute // minutes) * minutes, second=0, microsecond=0)
+    return bucket.strftime('%Y%m%d%H%M')
+
+
+# History fetched for the primary ticker's chart (covers the longest chart range)
+CHART_PERIOD = "5y"
+
+
+def fetch_data(ticker, peers):
+    """
+    Fetch everything the analyses need for one ticker
+    Returns: dict of fetched data, or None if the ticker has no price/fundamentals
+    """
+    stock_data = get_stock_data(ticker, period=CHART_PERIOD)
+    fund_data = get_fundamental_data(ticker)
+
+    if not stock_data or not fund_data:
+        return None
+
+    # Keep a daily snapshot so fundamentals can be tracked over time
+    record_fundamentals({ticker: fund_data})
+
+    news = get_company_news(ticker, ticker)
+
+    return {
+        'fetched_at': datetime.now(),
+        'stock_data': stock_data,
+        'fund_data': fund_data,
+        'profile': get_company_profile(ticker),
+        'news': news,
+        'news_sentiment': score_news(news),
+        'peer_data': get_comprehensive_peer_data(ticker, list(peers)) if peers else {},
+        'technicals': fetch_technicals(ticker, peers),
+    }
+
+
+def fetch_technicals(ticker, peers):
+    """
+    Technical statistics for the ticker and its peers from one batched history download
+    Returns: dict ticker -> stats (empty if the history is unavailable)
+    """
+    history = get_price_history((ticker, *peers))
+    if not history:
+        return {}
+    return technicals_by_ticker(compute_technicals(history['close'], history['volume']))
+
+
+# Analyses that only need fetched data; the investment summary is built from them
+UPSTREAM_ANALYSES = ('health_analysis', 'trend_analysis', 'peer_analysis', 'news_analysis')
+
+
+def run_analysis(key, ticker, data, upstream=None):
+    """
+    Run one Claude analysis over fetched data
+    upstream: the four finished analyses, needed only for 'investment_summary'
+    """
+    if key == 'health_analysis':
+        return analyze_financial_health(ticker, data['fund_data'])
+    if key == 'trend_analysis':
+        return analyze_price_trend(ticker, data['stock_data'], data.get('technicals', {}))
+    if key == 'peer_analysis':
+        return analyze_peer_comparison(ticker, data['peer_data']) if data['peer_data'] else "No peer data provided."
+    if key == 'news_analysis':
+        return analyze_news_sentiment(ticker, data['news'], data.get('news_sentiment'))
+    if key == 'investment_summary':
+        return generate_investment_summary(ticker, {
+            'financial_health': upstream['health_analysis'],
+            'peer_comparison': upstream['peer_analysis'],
+            'price_trend': upstream['trend_analysis'],
+            'news_sentiment': upstream['news_analysis']
+        })
+    raise ValueError(f"Unknown analysis: {key}")
+
+
+def analysis_runner(ticker, data, refresh=False, status=None):
+    """
+    callable(key, upstream) running one analysis, but only if its inputs changed since
+    the ticker's last run; with ANALYSIS_CACHE=on, near-identical inputs also reuse an earlier text
+    refresh: recompute every analysis even if a stored text would match
+    status: optional dict filled with 'fresh' or 'reused' per analysis
+    """
+    status = {} if status is None else status
+
+    def compute(key, upstream):
+        status[key] = 'fresh'
+        return run_analysis(key, ticker, data, upstream)
+
+    analyze = cached_analyze(ticker, data, compute, refresh, status=status) if analysis_cache_enabled() else compute
+    return reuse_unchanged(ticker, data, analyze, refresh, status=status)
+
+
+def iter_analyses(ticker, data=None, analyze=None, max_workers=4, initializer=None):
+    """
+    Run the four independent analyses concurrently, then the summary
+    Yields (key, text) in completion order, in the calling thread
+    analyze: optional callable(key, upstream) replacing analysis_runner (e.g. a cached wrapper)
+    """
+    analyze = analyze or analysis_runner(ticker, data)
+    analyses = {}
+    
+    with ThreadPoolExecutor(max_workers=max_workers, initializer=initializer) as pool:
+        futures = {pool.submit(analyze, key, None): key for key in UPSTREAM_ANALYSES}
+        for future in as_completed(futures):
+            key = futures[future]
+            analyses[key] = future.result()
+            yield key, analyses[key]
+    
+    yield 'investment_summary', analyze('investment_summary', analyses)
+
+
+def run_analyses(ticker, data):
+    """
+    Run all five Claude analyses over fetched data
+    Returns: dict keyed like the HTML report expects
+    """
+    return dict(iter_analyses(ticker, data))
+
+
+def run_analysis_job(payload, report_progress):
+    """
+    Job handler: fetch and analyze one ticker outside the Streamlit script run
+    payload: dict with ticker, peers and version (the version only keys the job)
+    report_progress: callable persisting the partial result after each stage
+    Returns: result dict with data, all analyses and sections ('fresh' or 'reused' per analysis)
+    """
+    ticker = payload['ticker']
+    peers = tuple(payload.get('peers', ()))
+    
+    # A force-refresh version stamp ('-r...') also bypasses the fetcher and analysis caches
+    refresh = '-r' in (payload.get('version') or '')
+    if refresh:
+        with fresh_fetches():
+            data = fetch_data(ticker, peers)
+    else:
+        data = fetch_data(ticker, peers)
+    if not data:
+        raise ValueError(f"Could not fetch data for {ticker}. Please check the ticker symbol.")
+    
+    result = {
+        'ticker': ticker,
+        'peers': peers,
+        'version': payload.get('version'),
+        'data': data,
+        'analyses': {},
+        'sections': {},
+    }
+    report_progress(result)
+    
+    # Workers fill `status`; the result only takes each entry once its analysis is in
+    status = {}
+    for key, text in iter_analyses(ticker, data, analyze=analysis_runner(ticker, data, refresh, status)):
+        result['analyses'][key] = text
+        result['sections'][key] = status.get(key, 'fresh')
+        report_progress(result)
+    
+    return result
@@ -0,0 +1,159 @@
+import json
+import time
+import argparse
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from batch_reports import read_watchlist
+from fetch_cache import cache_stats
+from pipeline import fetch_data, iter_analyses, analysis_runner
+
+PREWARM_LOG = "prewarm_log.jsonl"
+
+
+def warm_ticker(ticker, peers, deadline):
+    """
+    Run every fetcher the app needs for one ticker so their results land in the disk cache
+    Returns: row with status ('warmed', 'failed' or 'skipped' past the deadline), seconds taken
+    and the fetched data (None unless warmed)
+    """
+    if time.monotonic() > deadline:
+        return {'ticker': ticker, 'status': 'skipped', 'data': None}
+
+    start = time.perf_counter()
+    data = None
+    try:
+        data = fetch_data(ticker, peers)
+        status = 'warmed' if data else 'failed'
+    except Exception as e:
+        print(f"    ❌ {ticker}: {str(e)}")
+        status = 'failed'
+    return {'ticker': ticker, 'status': status, 'seconds': round(time.perf_counter() - start, 2), 'data': data}
+
+
+def warm_analysis(ticker, data, deadline):
+    """
+    Run the five analyses for one ticker so their texts land in the analysis caches
+    data: the ticker's fetch_data result from warm_ticker, so nothing is fetched twice
+    Jobs are keyed on a 15-minute data version, so a warmed job would not match an
+    analyst's later request; the section cache is version-free, and a later job
+    reuses every section whose inputs are unchanged
+    Returns: row with status and the number of sections generated (vs. already cached)
+    """
+    if time.monotonic() > deadline:
+        return {'ticker': ticker, 'status': 'skipped'}
+
+    status = {}
+    try:
+        for _ in iter_analyses(ticker, data, analyze=analysis_runner(ticker, data, status=status)):
+            pass
+    except Exception as e:
+        print(f"    ❌ {ticker} analyses: {str(e)}")
+        return {'ticker': ticker, 'status': 'failed'}
+    return {'ticker': ticker, 'status': 'warmed', 'generated': sum(s == 'fresh' for s in status.values())}
+
+
+def warm_analyses(entries, deadline, workers=2):
+    """
+    Warm the analysis caches for every entry, starting none past the deadline
+    entries: (ticker, fetched data) pairs
+    Returns: dict with tickers submitted and warmed, and sections generated
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        rows = list(pool.map(lambda entry: warm_analysis(*entry, deadline), entries))
+
+    warmed = [row for row in rows if row['status'] == 'warmed']
+    return {'submitted': len(entries), 'finished': len(warmed), 'generated': sum(row['generated'] for row in warmed)}
+
+
+def prewarm(entries, workers=4, budget_minutes=30, analyses=False, log_path=PREWARM_LOG):
+    """
+    Warm the fetcher caches (and optionally the analyses) for a coverage list
+    Tickers are started in list order, so put the hottest names first; none is
+    started once the time budget is spent
+    Returns: run summary, also appended to log_path as one JSON line
+    """
+    started_at = datetime.now()
+    deadline = time.monotonic() + budget_minutes * 60
+    cache_stats(reset=True)
+
+    print(f"Pre-warming {len(entries)} tickers with {workers} workers ({budget_minutes} min budget)...")
+
+    rows, fetched = [], {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(warm_ticker, ticker, peers, deadline) for ticker, peers in entries]
+        for future in as_completed(futures):
+            row = future.result()
+            data = row.pop('data')
+            # Kept only for the analyses pass, which reuses it instead of fetching again
+            if analyses and data:
+                fetched[row['ticker']] = data
+            rows.append(row)
+            if row['status'] == 'warmed':
+                print(f"    ✅ {row['ticker']}: {row['seconds']:.1f}s")
+
+    warmed = [row['ticker'] for row in rows if row['status'] == 'warmed']
+    summary = {
+        'started_at': started_at.isoformat(timespec='seconds'),
+        'tickers': len(entries),
+        'warmed': len(warmed),
+        'failed': sorted(row['ticker'] for row in rows if row['status'] == 'failed'),
+        'skipped': sorted(row['ticker'] for row in rows if row['status'] == 'skipped'),
+        'coverage': round(len(warmed) / max(1, len(entries)), 3),
+        # Hits here were already warm (e.g. from an earlier run); a high rate means the run can start later
+        'cache': cache_stats(),
+    }
+
+    if analyses and warmed:
+        warm_entries = [(ticker, fetched[ticker]) for ticker, _ in entries if ticker in fetched]
+        summary['analyses'] = warm_analyses(warm_entries, deadline, workers=min(workers, 4))
+
+    summary['wall_s'] = round((datetime.now() - started_at).total_seconds(), 1)
+    with open(log_path, 'a') as f:
+        f.write(json.dumps(summary) + "\n")
+    return summary
+
+
+def next_run(at, now=None):
+    """Next weekday datetime at HH:MM"""
+    now = now or datetime.now()
+    hour, minute = map(int, at.split(':'))
+    run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if run <= now:
+        run += timedelta(days=1)
+    while run.weekday() >= 5:
+        run += timedelta(days=1)
+    return run
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Pre-warm fetcher caches for the coverage list before the open")
+    arg_parser.add_argument("coverage", help="Watchlist file with one 'TICKER [PEER,PEER]' entry per line")
+    arg_parser.add_argument("--workers", type=int, default=4)
+    arg_parser.add_argument("--budget-minutes", type=float, default=30)
+    arg_parser.add_argument("--analyses", action="store_true", help="Also run the Claude analyses into the analysis caches")
+    arg_parser.add_argument("--at", help="Wait until this time (HH:MM, weekdays) before running")
+    arg_parser.add_argument("--daily", action="store_true", help="With --at, run every weekday")
+    args = arg_parser.parse_args()
+
+    while True:
+        if args.at:
+            run_at = next_run(args.at)
+            print(f"Next pre-warm at {run_at:%a %Y-%m-%d %H:%M}")
+            time.sleep(max(0, (run_at - datetime.now()).total_seconds()))
+
+        # Re-read each run so coverage edits apply without a restart
+        entries = read_watchlist(args.coverage)
+        summary = prewarm(entries, args.workers, args.budget_minutes, args.analyses)
+
+        print("\n" + "="*60)
+        print(f"Warmed: {summary['warmed']}/{summary['tickers']} ({summary['coverage']:.0%})  "
+              f"Failed: {len(summary['failed'])}  Skipped: {len(summary['skipped'])}  Wall time: {summary['wall_s']}s")
+        for name, stats in sorted(summary['cache'].items()):
+            print(f"    {name:<28} hit rate {stats['hit_rate']:.0%} ({stats['hits']} hits / {stats['misses']} misses)")
+        if 'analyses' in summary:
+            print(f"Analyses: {summary['analyses']['finished']}/{summary['analyses']['submitted']} warmed "
+                  f"({summary['analyses']['generated']} sections generated, the rest were already cached)")
+        print("="*60)
+
+        if not (args.at and args.daily):
+            break
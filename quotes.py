@@ -0,0 +1,117 @@
+import os
+import random
+from abc import ABC, abstractmethod
+from datetime import datetime
+import yfinance as yf
+
+
+class QuoteSource(ABC):
+    """
+    Cheap last-price source for live tiles
+    get_quote returns dict with price, previous_close, market_cap and as_of, or None
+    reference_price: last known price, used by simulated feeds as a starting point
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def get_quote(self, ticker, reference_price=None):
+        """Returns: quote dict, or None when no quote is available"""
+
+
+class YFinanceQuoteSource(QuoteSource):
+    """Quotes from yfinance fast_info (one light request, no quote-summary scrape)"""
+
+    name = "yfinance"
+
+    def get_quote(self, ticker, reference_price=None):
+        try:
+            fast_info = yf.Ticker(ticker).fast_info
+            return {
+                'price': round(fast_info['lastPrice'], 2),
+                'previous_close': fast_info['previousClose'],
+                'market_cap': fast_info['marketCap'],
+                'as_of': datetime.now(),
+            }
+        except Exception as e:
+            print(f"Error fetching quote: {str(e)}")
+            return None
+
+
+class FakeQuoteSource(QuoteSource):
+    """
+    Local random-walk feed for tests and offline demos
+    Prices start at `start_prices` (else the reference price, else 100) and
+    move by `volatility` per quote
+    """
+
+    name = "fake"
+
+    def __init__(self, start_prices=None, volatility=0.002, seed=0):
+        self.prices = dict(start_prices or {})
+        self.previous_close = dict(self.prices)
+        self.volatility = volatility
+        self.random = random.Random(seed)
+
+    def get_quote(self, ticker, reference_price=None):
+        last = self.prices.get(ticker, reference_price or 100.0)
+        self.previous_close.setdefault(ticker, last)
+        price = last * (1 + self.random.gauss(0, self.volatility))
+        self.prices[ticker] = price
+        return {
+            'price': round(price, 2),
+            'previous_close': self.previous_close[ticker],
+            'market_cap': 'N/A',
+            'as_of': datetime.now(),
+        }
+
+
+QUOTE_SOURCES = {source.name: source for source in (YFinanceQuoteSource, FakeQuoteSource)}
+_instances = {}
+
+
+def get_quote_source(name=None):
+    """
+    Shared quote source instance, chosen by name or the QUOTE_SOURCE env var
+    (default 'yfinance'); stateful sources such as the fake feed persist across calls
+    """
+    name = name or os.getenv('QUOTE_SOURCE', 'yfinance')
+    if name not in _instances:
+        _instances[name] = QUOTE_SOURCES[name]()
+    return _instances[name]
+
+
+def register_quote_source(source):
+    """Install a QuoteSource instance under its name (e.g. a seeded fake feed)"""
+    _instances[source.name] = source
+
+
+def apply_quote(stock_data, fund_data, quote):
+    """
+    Overlay a live quote on fetched price and fundamentals data
+    The 30-day change keeps its original base; P/E (and market cap when the
+    quote has none) are rescaled at constant earnings and share count
+    Returns: (stock_data, fund_data) copies
+    """
+    if not quote:
+        return stock_data, fund_data
+
+    old_price = stock_data['current_price']
+    price = quote['price']
+    base_price = old_price - stock_data['price_change_30d']
+
+    stock_data = {
+        **stock_data,
+        'current_price': price,
+        'price_change_30d': round(price - base_price, 2),
+        'price_change_pct_30d': round((price / base_price - 1) * 100, 2),
+    }
+
+    fund_data = dict(fund_data)
+    if quote['market_cap'] != 'N/A':
+        fund_data['market_cap'] = quote['market_cap']
+    elif isinstance(fund_data.get('market_cap'), (int, float)):
+        fund_data['market_cap'] = fund_data['market_cap'] * price / old_price
+    if isinstance(fund_data.get('pe_ratio'), (int, float)):
+        fund_data['pe_ratio'] = fund_data['pe_ratio'] * price / old_price
+    return stock_data, fund_data
@@ -0,0 +1,438 @@
+import os
+import re
+import sys
+import json
+import time
+import pickle
+import random
+import runpy
+import hashlib
+import argparse
+import tempfile
+import threading
+import contextvars
+import zstandard
+from datetime import datetime
+
+REPLAY_DIR = os.getenv('REPLAY_DIR', 'fixtures')
+
+# Seconds per call used by the 'lognormal' latency mode: (median, sigma of log)
+LATENCY_PROFILES = {
+    'yfinance': (0.35, 0.6),
+    'newsapi': (0.45, 0.5),
+    'edgar': (2.5, 0.7),
+    'anthropic': (9.0, 0.4),
+}
+
+# Query parameters that never go into a fixture key or file
+_SECRET_PARAMS = ('apikey', 'api_key', 'token', 'key')
+_SECRET = re.compile(rf"(?i)\b({'|'.join(_SECRET_PARAMS)})=[^&]*")
+# Rolling date windows (NewsAPI's from=<a week ago>) are left out of the key so fixtures do not expire
+_DATE_PARAMS = ('from', 'to')
+_ROLLING_DATE = re.compile(rf"\b({'|'.join(_DATE_PARAMS)})=\d{{4}}-\d{{2}}-\d{{2}}")
+
+_settings = {'mode': 'off', 'folder': REPLAY_DIR, 'latency': 'recorded', 'scale': 1.0, 'rng': random.Random(0)}
+_originals = {}
+_latencies = {}
+_stats = {}
+_lock = threading.Lock()
+# Set while a recorded call runs, so clients it uses internally are not recorded again
+_inside = contextvars.ContextVar('replay_inside', default=False)
+
+
+class ReplayMissError(LookupError):
+    """Replay mode hit a call that was never recorded"""
+
+
+def _redact(text):
+    return _SECRET.sub(lambda m: f"{m.group(1)}=REDACTED", text)
+
+
+def _clean_params(params):
+    """Query params dict with the same redaction and date normalization as URLs"""
+    cleaned = []
+    for name, value in sorted((params or {}).items()):
+        if str(name).lower() in _SECRET_PARAMS:
+            value = 'REDACTED'
+        elif name in _DATE_PARAMS and re.fullmatch(r"\d{4}-\d{2}-\d{2}", str(value)):
+            value = 'DATE'
+        cleaned.append((name, value))
+    return cleaned
+
+
+def _fixture_path(service, call):
+    key = hashlib.sha1(_ROLLING_DATE.sub(r"\1=DATE", _redact(repr(call))).encode()).hexdigest()
+    return os.path.join(_settings['folder'], service, key + ".pkl.zst")
+
+
+def _count(service, name, seconds=0.0):
+    with _lock:
+        entry = _stats.setdefault(service, {'recorded': 0, 'replayed': 0, 'missed': 0, 'latency_s': 0.0})
+        entry[name] += 1
+        entry['latency_s'] += seconds
+
+
+def _inject_latency(service, recorded_s):
+    """Sleep for one call's worth of latency under the configured mode"""
+    mode, scale, rng = _settings['latency'], _settings['scale'], _settings['rng']
+    if mode == 'recorded':
+        seconds = recorded_s
+    elif mode == 'sampled':
+        observed = _latencies.get(service) or [recorded_s]
+        with _lock:
+            seconds = rng.choice(observed)
+    elif mode == 'lognormal':
+        median, sigma = LATENCY_PROFILES.get(service, LATENCY_PROFILES['newsapi'])
+        with _lock:
+            seconds = rng.lognormvariate(0, sigma) * median
+    else:
+        seconds = 0.0
+    seconds *= scale
+    if seconds > 0:
+        time.sleep(seconds)
+    return seconds
+
+
+def _call(service, call, fetch, pack=None, unpack=None):
+    """
+    Route one client call through the record/replay layer
+    call: hashable description of the request (secrets are redacted from the key)
+    pack/unpack: convert results that do not pickle well (e.g. HTTP responses)
+    Errors raised by the real client are recorded and re-raised on replay
+    """
+    mode = _settings['mode']
+    if mode == 'off' or _inside.get():
+        return fetch()
+    path = _fixture_path(service, call)
+
+    if mode == 'replay':
+        try:
+            with open(path, 'rb') as f:
+                fixture = pickle.loads(zstandard.decompress(f.read()))
+        except FileNotFoundError:
+            _count(service, 'missed')
+            raise ReplayMissError(f"No {service} fixture for {_redact(repr(call))[:200]} in {_settings['folder']}") from None
+        _count(service, 'replayed', _inject_latency(service, fixture['latency_s']))
+        if 'error' in fixture:
+            raise fixture['error']
+        return unpack(fixture['result']) if unpack else fixture['result']
+
+    token = _inside.set(True)
+    start = time.perf_counter()
+    try:
+        result = fetch()
+        fixture = {'result': pack(result) if pack else result}
+    except Exception as e:
+        fixture = {'error': e}
+    finally:
+        _inside.reset(token)
+    fixture.update(call=_redact(repr(call)), latency_s=time.perf_counter() - start,
+                   recorded_at=datetime.now().isoformat(timespec='seconds'))
+
+    try:
+        payload = pickle.dumps(fixture)
+    except Exception as e:
+        if 'error' not in fixture:
+            raise TypeError(f"Cannot record {service} call {fixture['call'][:200]}: its result does not pickle ({str(e)})") from e
+        # Some client exceptions carry unpicklable state; keep their message
+        fixture['error'] = RuntimeError(str(fixture['error']))
+        payload = pickle.dumps(fixture)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", 'wb') as f:
+        f.write(zstandard.compress(payload, 3))
+    os.replace(path + ".tmp", path)
+    with _lock:
+        with open(os.path.join(_settings['folder'], 'latency.jsonl'), 'a') as f:
+            f.write(json.dumps({'service': service, 'latency_s': round(fixture['latency_s'], 4)}) + "\n")
+    _count(service, 'recorded', fixture['latency_s'])
+
+    if 'error' in fixture:
+        raise fixture['error']
+    return result
+
+
+# yfinance: Ticker (history, info, fast_info, quote-summary modules) and download
+
+class _FastInfo:
+    def __init__(self, ticker):
+        self._ticker = ticker
+
+    def __getitem__(self, key):
+        return _call('yfinance', ('fast_info', self._ticker.ticker, key),
+                     lambda: self._ticker._target().fast_info[key])
+
+
+class _Quote:
+    def __init__(self, ticker):
+        self._ticker = ticker
+
+    def _fetch(self, modules):
+        return _call('yfinance', ('quote', self._ticker.ticker, tuple(modules)),
+                     lambda: self._ticker._target()._quote._fetch(modules=modules))
+
+    def _fetch_additional_info(self):
+        return _call('yfinance', ('quote_additional', self._ticker.ticker),
+                     lambda: self._ticker._target()._quote._fetch_additional_info())
+
+
+class ReplayTicker:
+    """Stand-in for yf.Ticker covering the attributes this project uses"""
+
+    def __init__(self, ticker, *args, **kwargs):
+        self.ticker = ticker.upper()
+        self._args, self._kwargs = args, kwargs
+        self._real = None
+
+    def _target(self):
+        if self._real is None:
+            self._real = _originals['yf.Ticker'](self.ticker, *self._args, **self._kwargs)
+        return self._real
+
+    def history(self, *args, **kwargs):
+        return _call('yfinance', ('history', self.ticker, args, sorted(kwargs.items())),
+                     lambda: self._target().history(*args, **kwargs))
+
+    @property
+    def info(self):
+        return _call('yfinance', ('info', self.ticker), lambda: self._target().info)
+
+    @property
+    def news(self):
+        return _call('yfinance', ('news', self.ticker), lambda: self._target().news)
+
+    @property
+    def fast_info(self):
+        return _FastInfo(self)
+
+    @property
+    def _quote(self):
+        return _Quote(self)
+
+
+def _download(tickers, *args, **kwargs):
+    symbols = tuple(tickers) if isinstance(tickers, (list, tuple, set)) else tickers
+    return _call('yfinance', ('download', symbols, args, sorted(kwargs.items())),
+                 lambda: _originals['yf.download'](tickers, *args, **kwargs))
+
+
+# requests.get (NewsAPI); responses are stored as status, headers and body only
+
+def _pack_response(response):
+    return {'status_code': response.status_code, 'headers': dict(response.headers),
+            'content': response.content, 'encoding': response.encoding, 'url': _redact(response.url)}
+
+
+def _unpack_response(packed):
+    import requests
+    response = requests.Response()
+    response.status_code = packed['status_code']
+    response.headers.update(packed['headers'])
+    response._content = packed['content']
+    response.encoding = packed['encoding']
+    response.url = packed['url']
+    return response
+
+
+def _http_get(url, params=None, **kwargs):
+    service = 'newsapi' if 'newsapi.org' in url else 'http'
+    return _call(service, ('GET', url, _clean_params(params)),
+                 lambda: _originals['requests.get'](url, params=params, **kwargs),
+                 pack=_pack_response, unpack=_unpack_response)
+
+
+# EDGAR Downloader: get() is replayed by restoring the files it wrote
+
+class ReplayDownloader:
+    """Stand-in for sec_edgar_downloader.Downloader; the real one is only built when recording"""
+
+    def __init__(self, company_name, email_address, download_folder=None):
+        self._args = (company_name, email_address, download_folder)
+        self.download_folder = str(download_folder or os.getcwd())
+        self._real = None
+
+    def get(self, form, ticker_or_cik, **kwargs):
+        folder = os.path.join(self.download_folder, "sec-edgar-filings", str(ticker_or_cik), form)
+
+        def fetch():
+            if self._real is None:
+                self._real = _originals['Downloader'](*self._args)
+            count = self._real.get(form, ticker_or_cik, **kwargs)
+            files = {}
+            for root, _, names in os.walk(folder):
+                for name in names:
+                    path = os.path.join(root, name)
+                    with open(path, 'rb') as f:
+                        files[os.path.relpath(path, folder)] = f.read()
+            return {'count': count, 'files': files}
+
+        def restore(packed):
+            for relative, content in packed['files'].items():
+                path = os.path.join(folder, relative)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.write(content)
+            return packed['count']
+
+        return _call('edgar', ('get', form, str(ticker_or_cik), sorted(kwargs.items())), fetch, unpack=restore)
+
+
+# Anthropic: messages.create, keyed on the full request
+
+class _Messages:
+    def __init__(self, client):
+        self._client = client
+
+    def create(self, **kwargs):
+        return _call('anthropic', ('messages.create', json.dumps(kwargs, sort_keys=True, default=str)),
+                     lambda: self._client._target().messages.create(**kwargs))
+
+
+class ReplayAnthropic:
+    """Stand-in for anthropic.Anthropic; the real client is only built when recording"""
+
+    def __init__(self, *args, **kwargs):
+        self._args, self._kwargs = args, kwargs
+        self._real = None
+        self.messages = _Messages(self)
+
+    def _target(self):
+        if self._real is None:
+            self._real = _originals['Anthropic'](*self._args, **self._kwargs)
+        return self._real
+
+
+def load_latencies(folder):
+    """Returns: dict of service -> recorded call latencies (seconds) from folder/latency.jsonl"""
+    latencies = {}
+    path = os.path.join(folder, 'latency.jsonl')
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                row = json.loads(line)
+                latencies.setdefault(row['service'], []).append(row['latency_s'])
+    return latencies
+
+
+def install(mode, folder=REPLAY_DIR, latency='recorded', scale=1.0, seed=0):
+    """
+    Put the record/replay clients in place of yfinance, requests.get, the EDGAR
+    Downloader and the Anthropic client (modules imported later pick them up too)
+    mode: 'record' calls the real services and saves every response under folder;
+          'replay' serves saved responses and never touches the network
+    latency (replay only): 'recorded' sleeps each call's own recorded time, 'sampled'
+          draws from all recorded times of that service, 'lognormal' draws from
+          LATENCY_PROFILES, 'none' does not sleep; every draw is scaled by `scale`
+    Draws come from a seeded generator, so a replay run is repeatable
+    """
+    import requests
+    import yfinance
+    import anthropic
+    import sec_edgar_downloader
+
+    if mode not in ('record', 'replay'):
+        raise ValueError(f"Unknown replay mode: {mode}")
+    if latency not in ('recorded', 'sampled', 'lognormal', 'none'):
+        raise ValueError(f"Unknown latency mode: {latency}")
+
+    if not _originals:
+        _originals.update({
+            'yf.Ticker': yfinance.Ticker,
+            'yf.download': yfinance.download,
+            'requests.get': requests.get,
+            'Downloader': sec_edgar_downloader.Downloader,
+            'Anthropic': anthropic.Anthropic,
+        })
+    _settings.update(mode=mode, folder=folder, latency=latency, scale=scale, rng=random.Random(seed))
+    _latencies.clear()
+    _latencies.update(load_latencies(folder))
+    os.makedirs(folder, exist_ok=True)
+
+    yfinance.Ticker = ReplayTicker
+    yfinance.download = _download
+    requests.get = _http_get
+    sec_edgar_downloader.Downloader = ReplayDownloader
+    anthropic.Anthropic = ReplayAnthropic
+
+    # Modules already imported hold their own references
+    if 'sec_parser' in sys.modules:
+        sys.modules['sec_parser'].Downloader = ReplayDownloader
+    if 'ai_analyzer' in sys.modules:
+        module = sys.modules['ai_analyzer']
+        module.Anthropic = ReplayAnthropic
+        if not isinstance(module.client, ReplayAnthropic):
+            wrapped = ReplayAnthropic()
+            wrapped._real = module.client
+            module.client = wrapped
+
+
+def stats():
+    """Returns: dict of service -> recorded/replayed/missed counts and total latency seconds"""
+    with _lock:
+        return {service: {**entry, 'latency_s': round(entry['latency_s'], 3)} for service, entry in _stats.items()}
+
+
+def fixture_summary(folder=REPLAY_DIR):
+    """Returns: dict of service -> fixture count, size on disk and recorded latency percentiles"""
+    latencies = load_latencies(folder)
+    summary = {}
+    for service in sorted(os.listdir(folder)) if os.path.isdir(folder) else []:
+        path = os.path.join(folder, service)
+        if not os.path.isdir(path):
+            continue
+        files = [os.path.join(path, name) for name in os.listdir(path) if name.endswith('.pkl.zst')]
+        observed = sorted(latencies.get(service, []))
+        summary[service] = {
+            'fixtures': len(files),
+            'size_mb': round(sum(os.path.getsize(f) for f in files) / 1e6, 2),
+            'p50_s': observed[len(observed) // 2] if observed else 'N/A',
+            'p95_s': observed[int(len(observed) * 0.95)] if observed else 'N/A',
+        }
+    return summary
+
+
+if __name__ == "__main__":
+    from fetch_cache import fresh_fetches
+
+    arg_parser = argparse.ArgumentParser(description="Run a script against recorded service responses")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("record", "Run a script against the live services and save every response"),
+                            ("replay", "Run a script offline from saved responses")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("script", help="Python script to run, e.g. data_fetchers.py")
+        command.add_argument("args", nargs=argparse.REMAINDER, help="Arguments passed to the script")
+        command.add_argument("--dir", default=REPLAY_DIR, help="Fixture folder")
+        if name == "replay":
+            command.add_argument("--latency", default="recorded", choices=["recorded", "sampled", "lognormal", "none"])
+            command.add_argument("--scale", type=float, default=1.0, help="Multiply every injected latency")
+            command.add_argument("--seed", type=int, default=0)
+    commands.add_parser("stats", help="Summarize recorded fixtures").add_argument("--dir", default=REPLAY_DIR)
+    args = arg_parser.parse_args()
+
+    if args.command == "stats":
+        print("="*60)
+        for service, summary in fixture_summary(args.dir).items():
+            print(f"{service:<10} {summary['fixtures']:>5} fixtures  {summary['size_mb']:>7} MB  "
+                  f"p50 {summary['p50_s']}s  p95 {summary['p95_s']}s")
+        print("="*60)
+        sys.exit(0)
+
+    # Local caches would hide calls from the recorder and make replays depend on earlier runs
+    scratch = tempfile.mkdtemp(prefix="replay-")
+    os.environ['FETCH_CACHE'] = 'off'
+    for variable, name in (('NEWS_STORE_DB', 'news.db'), ('ANALYSIS_CACHE_DB', 'analysis_cache.db'), ('JOB_QUEUE_DB', 'jobs.db')):
+        os.environ[variable] = os.path.join(scratch, name)
+
+    install(args.command, folder=args.dir, latency=getattr(args, 'latency', 'recorded'),
+            scale=getattr(args, 'scale', 1.0), seed=getattr(args, 'seed', 0))
+    sys.argv = [args.script, *args.args]
+    start = time.perf_counter()
+    try:
+        with fresh_fetches():
+            runpy.run_path(args.script, run_name="__main__")
+    finally:
+        print("\n" + "="*60)
+        print(f"{args.command.upper()} of {args.script} in {time.perf_counter() - start:.1f}s")
+        for service, entry in stats().items():
+            print(f"{service:<10} recorded {entry['recorded']:>4}  replayed {entry['replayed']:>4}  "
+                  f"missed {entry['missed']:>3}  latency {entry['latency_s']:.2f}s")
+        print("="*60)
@@ -0,0 +1,471 @@
+import re
+import html
+import time
+from datetime import datetime
+from data_fetchers import format_market_cap
+from charts import range_slice, downsample, RANGE_LABELS
+from news_sentiment import format_score
+
+_SLOT_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+class ReportTemplate:
+    """
+    Template compiled once into literal chunks and named {{slots}}
+    Rendering walks the compiled parts and yields chunks, so a report can be
+    streamed to a file without ever being held as one string
+    """
+
+    def __init__(self, source):
+        """Split the source into (is_slot, text) parts"""
+        self.parts = []
+        position = 0
+        for match in _SLOT_PATTERN.finditer(source):
+            self.parts.append((False, source[position:match.start()]))
+            self.parts.append((True, match.group(1)))
+            position = match.end()
+        self.parts.append((False, source[position:]))
+        self.slots = {name for is_slot, name in self.parts if is_slot}
+
+    def stream(self, values):
+        """
+        Yield the rendered report chunk by chunk
+        values: slot -> string, or an iterable of strings rendered lazily
+        """
+        missing = self.slots - values.keys()
+        if missing:
+            raise KeyError(f"Missing template values: {', '.join(sorted(missing))}")
+
+        for is_slot, text in self.parts:
+            if not is_slot:
+                yield text
+            elif isinstance(values[text], str):
+                yield values[text]
+            else:
+                yield from values[text]
+
+
+REPORT_TEMPLATE = ReportTemplate("""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>{{ticker}} Analysis Report</title>
+    <style>
+        body {
+            font-family: 'Helvetica Neue', Arial, sans-serif;
+            margin: 40px;
+            color: #1e293b;
+            line-height: 1.6;
+        }
+        .header {
+            background: linear-gradient(135deg, #1e3a8a 0%, #3b82f6 100%);
+            color: white;
+            padding: 30px;
+            border-radius: 10px;
+            text-align: center;
+            margin-bottom: 30px;
+        }
+        .company-info {
+            background: #f8fafc;
+            padding: 20px;
+            border-left: 5px solid #2563eb;
+            margin: 20px 0;
+            border-radius: 8px;
+        }
+        .quick-take {
+            background: #fef3c7;
+            border-left: 5px solid #f59e0b;
+            padding: 20px;
+            margin: 20px 0;
+            border-radius: 8px;
+        }
+        .quick-take h2 {
+            color: #78350f;
+            margin-top: 0;
+        }
+        .summary {
+            background: #eff6ff;
+            border-left: 5px solid #2563eb;
+            padding: 20px;
+            margin: 20px 0;
+            border-radius: 8px;
+        }
+        .section {
+            margin: 30px 0;
+            page-break-inside: avoid;
+        }
+        h1 {
+            margin: 0;
+        }
+        h2 {
+            color: #1e3a8a;
+            border-bottom: 2px solid #e2e8f0;
+            padding-bottom: 10px;
+            page-break-after: avoid;
+            margin-top: 30px;
+        }
+        .analysis-box {
+            background: #f8fafc;
+            padding: 20px;
+            border: 1px solid #cbd5e1;
+            border-radius: 8px;
+            margin: 15px 0;
+            white-space: pre-wrap;
+        }
+        .metrics {
+            display: grid;
+            grid-template-columns: repeat(2, 1fr);
+            gap: 15px;
+            margin: 15px 0;
+        }
+        .metric {
+            padding: 10px;
+            background: white;
+            border-radius: 5px;
+        }
+        .metric strong {
+            display: block;
+            color: #64748b;
+            font-size: 0.9em;
+            margin-bottom: 5px;
+        }
+        .metric-value {
+            font-size: 1.2em;
+            font-weight: 600;
+            color: #1e293b;
+        }
+        table {
+            width: 100%;
+            border-collapse: collapse;
+            margin: 15px 0;
+            page-break-inside: avoid;
+        }
+        th, td {
+            padding: 12px;
+            text-align: left;
+            border: 1px solid #e2e8f0;
+        }
+        th {
+            background: #f1f5f9;
+            font-weight: 600;
+            color: #1e293b;
+        }
+        tr:nth-child(even) {
+            background: #f8fafc;
+        }
+        tr.primary-row {
+            background: #dbeafe;
+            font-weight: 600;
+        }
+        .price-chart {
+            width: 100%;
+            height: auto;
+            margin: 15px 0;
+        }
+        .footer {
+            margin-top: 50px;
+            padding-top: 20px;
+            border-top: 2px solid #e2e8f0;
+            text-align: center;
+            color: #64748b;
+            font-size: 0.9em;
+        }
+        @media print {
+            body { margin: 20px; }
+            .no-print { display: none; }
+            * {
+                -webkit-print-color-adjust: exact !important;
+                print-color-adjust: exact !important;
+            }
+        }
+    </style>
+</head>
+<body>
+    <div class="header">
+        <h1>📊 Equity Analyst Assistant</h1>
+        <p>AI-Powered Stock Analysis Report</p>
+    </div>
+
+    <div class="company-info">
+        <h1>{{company_name}} ({{ticker}})</h1>
+        <p style="margin: 5px 0; color: #64748b;">{{sector}}</p>
+        <p style="margin: 5px 0; font-size: 0.9em; color: #64748b;">Analysis generated on {{generated_at}}</p>
+    </div>
+
+    <div class="quick-take">
+        <h2>📌 Quick Take</h2>
+        <div class="metrics">
+            <div class="metric">
+                <strong>Price</strong>
+                <div class="metric-value">${{current_price}}</div>
+                <div style="color: {{change_color}}; font-size: 0.9em;">
+                    {{change_pct}} (30D)
+                </div>
+            </div>
+            <div class="metric">
+                <strong>Market Cap</strong>
+                <div class="metric-value">{{market_cap}}</div>
+            </div>
+            <div class="metric">
+                <strong>P/E Ratio</strong>
+                <div class="metric-value">{{pe_ratio}}</div>
+            </div>
+            <div class="metric">
+                <strong>Profit Margin</strong>
+                <div class="metric-value">{{profit_margin}}</div>
+            </div>
+        </div>
+    </div>
+
+    <div class="summary">
+        <h2>🎯 Investment Summary</h2>
+        <p style="margin: 10px 0; line-height: 1.8; white-space: pre-wrap;">{{investment_summary}}</p>
+    </div>
+
+    <div class="section">
+        <h2>📊 Financial Health Analysis</h2>
+        <div class="analysis-box">{{health_analysis}}</div>
+    </div>
+
+    <div class="section">
+        <h2>🔄 Peer Comparison Analysis</h2>
+        {{peer_table}}
+        <div class="analysis-box">{{peer_analysis}}</div>
+    </div>
+
+    <div class="section">
+        <h2>📈 Price Trend Analysis ({{chart_range_label}})</h2>
+        {{price_chart}}
+        <div class="metrics">
+            <div class="metric">
+                <strong>30-Day High</strong>
+                <div class="metric-value">${{high_30d}}</div>
+            </div>
+            <div class="metric">
+                <strong>30-Day Low</strong>
+                <div class="metric-value">${{low_30d}}</div>
+            </div>
+        </div>
+        <div class="analysis-box">{{trend_analysis}}</div>
+    </div>
+
+    <div class="section">
+        <h2>📰 News & Sentiment Analysis</h2>
+        <div class="metrics">
+            <div class="metric">
+                <strong>Lexicon Sentiment</strong>
+                <div class="metric-value">{{news_score}}</div>
+            </div>
+        </div>
+        <div class="analysis-box">{{news_analysis}}</div>
+    </div>
+
+    <div class="footer">
+        <p><strong>Karan Rajpal</strong></p>
+        <p>Model Validation Expert @ Handshake AI | Partnering with OpenAI on LLM Fine-Tuning</p>
+        <p>Former 5th Hire @ Borderless Capital | UC Berkeley Haas MBA '25</p>
+        <p style="margin-top: 10px;"><em>Built with Streamlit, Claude AI (Sonnet 4), and yfinance</em></p>
+    </div>
+</body>
+</html>
+""")
+
+PEER_COLUMNS = ('Ticker', 'Price', '30D Change', 'P/E', 'Profit Margin', 'ROE', 'Market Cap')
+
+
+def _escape(value):
+    return html.escape(str(value))
+
+
+def _format_ratio(value):
+    return f"{value:.2f}" if isinstance(value, (int, float)) else value
+
+
+def peer_table_chunks(ticker, peer_data):
+    """Yield the peer comparison table row by row (nothing when there are no peers)"""
+    if not peer_data:
+        return
+
+    yield '<table>\n<tr>' + ''.join(f'<th>{name}</th>' for name in PEER_COLUMNS) + '</tr>\n'
+    for symbol, metrics in peer_data.items():
+        change = metrics['change_30d']
+        market_cap = metrics['market_cap']
+        cells = (
+            symbol,
+            f"${metrics['price']}" if metrics['price'] != 'N/A' else 'N/A',
+            f"{change:+.2f}%" if isinstance(change, (int, float)) else change,
+            _format_ratio(metrics['pe_ratio']),
+            metrics['profit_margin'],
+            metrics['roe'],
+            format_market_cap(market_cap) if market_cap != 'N/A' else 'N/A',
+        )
+        row_class = ' class="primary-row"' if symbol == ticker else ''
+        yield f'<tr{row_class}>' + ''.join(f'<td>{_escape(cell)}</td>' for cell in cells) + '</tr>\n'
+    yield '</table>'
+
+
+def price_chart_chunks(stock_data, chart_range='1M', width=720, height=220, pad=30, max_points=300):
+    """Yield an inline SVG line chart of the closes over chart_range (prints without JavaScript)"""
+    chart_data = stock_data.get('chart_data')
+    if not chart_data:
+        return
+    dates, closes = downsample(*range_slice(chart_data, chart_range), max_points=max_points)
+    if len(closes) < 2:
+        return
+
+    low, high = float(closes.min()), float(closes.max())
+    span = (high - low) or 1
+    step = (width - 2 * pad) / (len(closes) - 1)
+    color = '#059669' if closes[-1] >= closes[0] else '#dc2626'
+
+    yield f'<svg class="price-chart" viewBox="0 0 {width} {height}" xmlns="http://www.w3.org/2000/svg">'
+    yield f'<polyline fill="none" stroke="{color}" stroke-width="2" points="'
+    for i, close in enumerate(closes):
+        y = height - pad - (close - low) / span * (height - 2 * pad)
+        yield f'{pad + i * step:.1f},{y:.1f} '
+    yield '"/>'
+    yield f'<text x="{pad}" y="{pad - 10}" font-size="12" fill="#64748b">High ${high:.2f}</text>'
+    yield f'<text x="{pad}" y="{height - 8}" font-size="12" fill="#64748b">Low ${low:.2f}</text>'
+    yield f'<text x="{width - pad}" y="{height - 8}" font-size="12" fill="#64748b" text-anchor="end">'
+    yield f'{str(dates[0])[:10]} – {str(dates[-1])[:10]}</text>'
+    yield '</svg>'
+
+
+def iter_html_report(ticker, company_name, sector, analyses, stock_data, fund_data, peer_data, news_sentiment=None,
+                     chart_range='1M'):
+    """
+    Yield the standalone HTML report in chunks
+    chart_range: CHART_RANGES key for the price chart (and its section header)
+    """
+    change_pct = stock_data['price_change_pct_30d']
+    values = {
+        'ticker': _escape(ticker),
+        'company_name': _escape(company_name),
+        'sector': _escape(sector),
+        'generated_at': datetime.now().strftime('%B %d, %Y at %I:%M %p'),
+        'current_price': _escape(stock_data['current_price']),
+        'change_color': '#059669' if change_pct > 0 else '#dc2626',
+        'change_pct': f"{change_pct:+.2f}%",
+        'market_cap': _escape(format_market_cap(fund_data['market_cap'])),
+        'pe_ratio': _escape(_format_ratio(fund_data['pe_ratio'])),
+        'profit_margin': _escape(fund_data['profit_margin']),
+        'high_30d': _escape(stock_data['high_30d']),
+        'low_30d': _escape(stock_data['low_30d']),
+        'peer_table': peer_table_chunks(ticker, peer_data),
+        'price_chart': price_chart_chunks(stock_data, chart_range),
+        'chart_range_label': _escape(RANGE_LABELS[chart_range]),
+        'news_score': _escape(format_score(news_sentiment)),
+        **{key: _escape(analyses[key]) for key in (
+            'investment_summary', 'health_analysis', 'peer_analysis', 'trend_analysis', 'news_analysis'
+        )},
+    }
+    return REPORT_TEMPLATE.stream(values)
+
+
+def generate_html_report(ticker, company_name, sector, analyses, stock_data, fund_data, peer_data, news_sentiment=None,
+                         chart_range='1M'):
+    """Generate standalone HTML for printing/PDF export"""
+    return ''.join(iter_html_report(ticker, company_name, sector, analyses, stock_data, fund_data, peer_data,
+                                    news_sentiment, chart_range))
+
+
+def _report_args(ticker, data, analyses, chart_range='1M'):
+    """Map pipeline output to the report generator's arguments"""
+    profile = data['profile']
+    return {
+        'ticker': ticker,
+        'company_name': profile['name'],
+        'sector': f"{profile['sector']} • {profile['industry']}",
+        'analyses': analyses,
+        'stock_data': data['stock_data'],
+        'fund_data': data['fund_data'],
+        'peer_data': data['peer_data'],
+        'news_sentiment': data.get('news_sentiment'),
+        'chart_range': chart_range,
+    }
+
+
+def build_report(ticker, data, analyses, chart_range='1M'):
+    """
+    Render the HTML report from pipeline output
+    data: dict from pipeline.fetch_data; analyses: dict from pipeline.run_analyses
+    chart_range: CHART_RANGES key for the price chart
+    """
+    return generate_html_report(**_report_args(ticker, data, analyses, chart_range))
+
+
+def write_report(f, ticker, data, analyses, chart_range='1M'):
+    """Stream the report from pipeline output into an open text file; returns characters written"""
+    written = 0
+    for chunk in iter_html_report(**_report_args(ticker, data, analyses, chart_range)):
+        written += f.write(chunk)
+    return written
+
+
+def benchmark(count=2000, peers=8, days=250):
+    """
+    Render `count` reports from synthetic data into a null sink
+    Returns: dict with reports/second and traced memory after the first and the last report
+    """
+    import io
+    import tracemalloc
+    import numpy as np
+
+    tickers = ['BENCH'] + [f'PEER{i}' for i in range(peers)]
+    data = {
+        'profile': {'name': 'Benchmark Corp', 'sector': 'Technology', 'industry': 'Semiconductors'},
+        'stock_data': {
+            'current_price': 123.45, 'price_change_pct_30d': 4.2, 'high_30d': 130.0, 'low_30d': 110.0,
+            'chart_data': {
+                'date': np.datetime64('2020-01-01') + np.arange(days).astype('timedelta64[D]'),
+                'close': 100 + np.arange(days) % 17.0,
+            },
+        },
+        'fund_data': {'market_cap': 2.5e12, 'pe_ratio': 35.2, 'profit_margin': '48.00%'},
+        'peer_data': {
+            symbol: {'price': 100.0, 'change_30d': 1.5, 'pe_ratio': 20.0, 'profit_margin': '12.00%',
+                     'market_cap': 5e10, 'roe': '18.00%'}
+            for symbol in tickers
+        },
+        'news_sentiment': {'score': 0.42, 'label': 'bullish', 'strength': 'strong', 'positive': 9, 'negative': 3,
+                           'articles': [0.5] * 10},
+    }
+    analyses = {key: 'Lorem ipsum <dolor> sit amet. ' * 60 for key in (
+        'investment_summary', 'health_analysis', 'peer_analysis', 'trend_analysis', 'news_analysis'
+    )}
+
+    class NullSink(io.TextIOBase):
+        def write(self, chunk):
+            return len(chunk)
+
+    sink = NullSink()
+    start = time.perf_counter()
+    for _ in range(count):
+        write_report(sink, 'BENCH', data, analyses)
+    elapsed = time.perf_counter() - start
+
+    # Second pass under tracemalloc (which slows rendering, so it is not timed)
+    tracemalloc.start()
+    write_report(sink, 'BENCH', data, analyses)
+    baseline = tracemalloc.get_traced_memory()[0]
+    for _ in range(count):
+        write_report(sink, 'BENCH', data, analyses)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'reports': count,
+        'reports_per_s': round(count / elapsed, 1),
+        'baseline_kb': round(baseline / 1024, 1),
+        'end_kb': round(current / 1024, 1),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    result = benchmark(count)
+    print(f"Rendered {result['reports']} reports: {result['reports_per_s']} reports/s")
+    print(f"Traced memory: {result['baseline_kb']} KB at start, {result['end_kb']} KB at end, {result['peak_kb']} KB peak")
@@ -0,0 +1,190 @@
+import os
+import json
+import time
+import argparse
+import pandas as pd
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from sec_parser import SECParser, SECTIONS
+from filing_index import update_index
+
+# Corpus layout under out_dir:
+#   sections/<TICKER>.parquet    one row per extracted section
+#   filings/<TICKER>.parquet     one row per filing with per-stage timings
+#   checkpoints/<TICKER>.json    ingestion status, used to resume a run
+
+
+def ingest_ticker(ticker, download_folder="sec_filings"):
+    """
+    Download, extract and section the latest 10-K for one ticker
+    Runs inside a worker process, so it only returns plain data
+    Returns: dict with filing row, section rows and an optional error
+    """
+    parser = SECParser(download_folder, verbose=False)
+    timings = {}
+
+    try:
+        start = time.perf_counter()
+        parser.dl.get("10-K", ticker, limit=1)
+        timings['download_s'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        filing_info = parser.get_latest_10k(ticker, download=False)
+        timings['extract_s'] = time.perf_counter() - start
+        if "error" in filing_info:
+            return {"ticker": ticker, "error": filing_info["error"]}
+
+        start = time.perf_counter()
+        text = parser.html_to_text(filing_info['file_path'])
+        timings['parse_s'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sections = parser.extract_sections(text)
+        timings['slice_s'] = time.perf_counter() - start
+
+    except Exception as e:
+        return {"ticker": ticker, "error": str(e)}
+
+    filing_row = {
+        'ticker': ticker,
+        'filing_date': filing_info['filing_date'],
+        'file_path': filing_info['file_path'],
+        'text_chars': len(text),
+        'sections_found': len(sections),
+        **{key: round(value, 4) for key, value in timings.items()},
+        'total_s': round(sum(timings.values()), 4),
+    }
+    section_rows = [
+        {
+            'ticker': ticker,
+            'filing_date': filing_info['filing_date'],
+            'section': name,
+            'text': section_text,
+            'chars': len(section_text),
+        }
+        for name, section_text in sections.items()
+    ]
+    return {"ticker": ticker, "filing": filing_row, "sections": section_rows}
+
+
+def _checkpoint_path(out_dir, ticker):
+    return os.path.join(out_dir, "checkpoints", f"{ticker}.json")
+
+
+def is_ingested(out_dir, ticker):
+    """Check whether a ticker already has a successful checkpoint"""
+    path = _checkpoint_path(out_dir, ticker)
+    if not os.path.exists(path):
+        return False
+    with open(path, 'r') as f:
+        return json.load(f).get('status') == 'ok'
+
+
+def _write_result(out_dir, result):
+    """Write one ticker's corpus rows, then its checkpoint"""
+    ticker = result['ticker']
+    checkpoint = {'ticker': ticker, 'finished_at': datetime.now().isoformat(timespec='seconds')}
+
+    if "error" in result:
+        checkpoint.update(status='error', error=result['error'])
+    else:
+        pd.DataFrame([result['filing']]).to_parquet(
+            os.path.join(out_dir, "filings", f"{ticker}.parquet"), index=False
+        )
+        pd.DataFrame(
+            result['sections'], columns=['ticker', 'filing_date', 'section', 'text', 'chars']
+        ).to_parquet(os.path.join(out_dir, "sections", f"{ticker}.parquet"), index=False)
+        checkpoint.update(status='ok', filing_date=result['filing']['filing_date'])
+
+    # Checkpoint goes last so a crash mid-write gets the ticker re-ingested
+    tmp_path = _checkpoint_path(out_dir, ticker) + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, _checkpoint_path(out_dir, ticker))
+
+
+def ingest_filings(tickers, out_dir="sec_corpus", download_folder="sec_filings", workers=4, resume=True):
+    """
+    Ingest the latest 10-K for many tickers across a process pool
+    Keep workers modest: EDGAR allows roughly 10 requests/second per client
+    Newly ingested sections are added to the corpus' full-text index
+    Returns: dict with counts of ingested, skipped and failed tickers
+    """
+    for sub in ("sections", "filings", "checkpoints"):
+        os.makedirs(os.path.join(out_dir, sub), exist_ok=True)
+
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+    pending = [t for t in tickers if not (resume and is_ingested(out_dir, t))]
+    summary = {'ingested': 0, 'skipped': len(tickers) - len(pending), 'failed': 0}
+
+    print(f"Ingesting {len(pending)} tickers ({summary['skipped']} already done) with {workers} workers...")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(ingest_ticker, t, download_folder): t for t in pending}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"ticker": ticker, "error": str(e)}
+
+            _write_result(out_dir, result)
+
+            if "error" in result:
+                summary['failed'] += 1
+                print(f"    ❌ {ticker}: {result['error']}")
+            else:
+                summary['ingested'] += 1
+                filing = result['filing']
+                print(f"    ✅ {ticker}: {filing['sections_found']}/{len(SECTIONS)} sections in {filing['total_s']:.1f}s")
+
+    # Keep the full-text index in step with the corpus
+    if summary['ingested']:
+        update_index(out_dir)
+
+    return summary
+
+
+def load_corpus(out_dir="sec_corpus", table="sections"):
+    """
+    Load the sections (or filings) table for every ingested ticker
+    Returns: DataFrame, empty if nothing has been ingested yet
+    """
+    table_dir = os.path.join(out_dir, table)
+    if not os.path.isdir(table_dir) or not os.listdir(table_dir):
+        return pd.DataFrame()
+    return pd.read_parquet(table_dir)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Bulk-ingest 10-K filings into a sectioned corpus")
+    arg_parser.add_argument("tickers", nargs="*", help="Tickers to ingest")
+    arg_parser.add_argument("--tickers-file", help="File with one ticker per line")
+    arg_parser.add_argument("--out-dir", default="sec_corpus")
+    arg_parser.add_argument("--download-folder", default="sec_filings")
+    arg_parser.add_argument("--workers", type=int, default=4)
+    arg_parser.add_argument("--no-resume", action="store_true", help="Re-ingest tickers that already have a checkpoint")
+    args = arg_parser.parse_args()
+
+    tickers = list(args.tickers)
+    if args.tickers_file:
+        with open(args.tickers_file, 'r') as f:
+            tickers += [line.split('#')[0].strip() for line in f]
+
+    if not tickers:
+        arg_parser.error("no tickers given")
+
+    result = ingest_filings(
+        tickers,
+        out_dir=args.out_dir,
+        download_folder=args.download_folder,
+        workers=args.workers,
+        resume=not args.no_resume,
+    )
+
+    print("\n" + "="*60)
+    print(f"Ingested: {result['ingested']}  Skipped: {result['skipped']}  Failed: {result['failed']}")
+    filings = load_corpus(args.out_dir, "filings")
+    if not filings.empty:
+        print(f"Median per-filing time: {filings['total_s'].median():.2f}s")
+    print("="*60)
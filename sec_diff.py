@@ -0,0 +1,119 @@
+import re
+from collections import defaultdict
+from text_fingerprint import exact_hash, minhash, similarity, lsh_keys
+
+
+def split_paragraphs(raw_section, min_chars=40):
+    """
+    Split a raw (uncleaned) section into paragraphs at blank lines
+    (see SECParser.html_to_text(blocks=True)); wrapped lines are joined first,
+    then short blocks such as page numbers are dropped; risk headings are kept
+    Returns: list of cleaned paragraph strings
+    """
+    paragraphs = []
+    for block in re.split(r'\n\s*\n', raw_section):
+        block = ' '.join(block.split())
+        if len(block) >= min_chars and not re.fullmatch(r'(?i)table of contents', block):
+            paragraphs.append(block)
+    return paragraphs
+
+
+def diff_paragraphs(old_paragraphs, new_paragraphs, threshold=0.5):
+    """
+    Align two years of paragraphs
+    Exact matches (after normalization) are unchanged; the remaining paragraphs
+    are paired by MinHash similarity, best pairs first, when above threshold
+    Returns: dict with added, removed, modified lists and summary stats
+    """
+    old_by_hash = defaultdict(list)
+    for i, paragraph in enumerate(old_paragraphs):
+        old_by_hash[exact_hash(paragraph)].append(i)
+
+    unchanged_old = set()
+    unmatched_new = []
+    for j, paragraph in enumerate(new_paragraphs):
+        candidates = old_by_hash.get(exact_hash(paragraph))
+        if candidates:
+            unchanged_old.add(candidates.pop(0))
+        else:
+            unmatched_new.append(j)
+    unmatched_old = [i for i in range(len(old_paragraphs)) if i not in unchanged_old]
+
+    # Near-duplicate candidates via LSH buckets over the unmatched old paragraphs
+    old_sigs = {i: minhash(old_paragraphs[i], size=3) for i in unmatched_old}
+    buckets = defaultdict(set)
+    for i, sig in old_sigs.items():
+        for key in lsh_keys(sig):
+            buckets[key].add(i)
+
+    scored_pairs = []
+    for j in unmatched_new:
+        new_sig = minhash(new_paragraphs[j], size=3)
+        candidates = set()
+        for key in lsh_keys(new_sig):
+            candidates |= buckets.get(key, set())
+        for i in candidates:
+            score = similarity(old_sigs[i], new_sig)
+            if score >= threshold:
+                scored_pairs.append((score, i, j))
+
+    modified = []
+    paired_old, paired_new = set(), set()
+    for score, i, j in sorted(scored_pairs, reverse=True):
+        if i in paired_old or j in paired_new:
+            continue
+        paired_old.add(i)
+        paired_new.add(j)
+        modified.append({'old': old_paragraphs[i], 'new': new_paragraphs[j], 'similarity': round(score, 3), 'position': j})
+    modified.sort(key=lambda m: m['position'])
+
+    added = [new_paragraphs[j] for j in unmatched_new if j not in paired_new]
+    removed = [old_paragraphs[i] for i in unmatched_old if i not in paired_old]
+
+    delta_chars = sum(len(p) for p in added) + sum(len(m['new']) for m in modified)
+    total_chars = sum(len(p) for p in new_paragraphs) or 1
+
+    return {
+        'added': added,
+        'removed': removed,
+        'modified': modified,
+        'unchanged_count': len(unchanged_old),
+        'stats': {
+            'old_paragraphs': len(old_paragraphs),
+            'new_paragraphs': len(new_paragraphs),
+            'delta_chars': delta_chars,
+            'delta_ratio': round(delta_chars / total_chars, 3),
+        },
+    }
+
+
+def diff_filings(parser, old_file, new_file, section='risk_factors'):
+    """
+    Diff one section between two filings on disk
+    Returns: diff dict (see diff_paragraphs) or dict with 'error'
+    """
+    paragraphs = []
+    for file_path in (old_file, new_file):
+        raw_section, error = parser.slice_section(parser.html_to_text(file_path, blocks=True), section, clean=False)
+        if error:
+            return {"error": f"{error} in {file_path}"}
+        paragraphs.append(split_paragraphs(raw_section))
+
+    return diff_paragraphs(*paragraphs)
+
+
+def format_diff_for_prompt(diff, max_chars=12000):
+    """
+    Render a diff as compact text for an LLM prompt
+    Added and modified paragraphs come first since they carry the signal
+    """
+    lines = []
+    for paragraph in diff['added']:
+        lines.append(f"[ADDED] {paragraph}")
+    for change in diff['modified']:
+        lines.append(f"[MODIFIED] {change['new']}\n  (previously: {change['old']})")
+    for paragraph in diff['removed']:
+        lines.append(f"[REMOVED] {paragraph}")
+
+    text = "\n\n".join(lines)
+    return text[:max_chars]
@@ -1,8 +1,76 @@
 import os
 import re
+import pandas as pd
 from sec_edgar_downloader import Downloader
 from bs4 import BeautifulSoup
 from datetime import datetime
+from sec_retrieval import get_filing_index, merge_passages
+from sec_diff import diff_filings
+
+# 10-K sections we know how to slice: heading pattern, candidate end
+# headings (first match wins) and the header text stripped after cleaning
+SECTIONS = {
+    'business': {
+        'label': 'Business',
+        'start': r'Item 1[^0-9A-Z]',
+        'end': [r'Item 1A'],
+        'header': r'^Item 1\.?\s*Business\s*',
+    },
+    'risk_factors': {
+        'label': 'Risk Factors',
+        'start': r'Item 1A',
+        'end': [r'Item 1B'],
+        'header': r'^Item 1A\.?\s*Risk Factors\s*',
+    },
+    'mda': {
+        'label': 'MD&A',
+        'start': r'Item 7[^A]',
+        'end': [r'Item 7A', r'Item 8'],
+        'header': r'^Item 7\..*?(?:Results of Operations)\s*',
+    },
+    'market_risk': {
+        'label': 'Market Risk',
+        'start': r'Item 7A',
+        'end': [r'Item 8'],
+        'header': r'^Item 7A\.?\s*Quantitative and Qualitative Disclosures About Market Risk\s*',
+    },
+}
+
+# Standard XBRL facts we keep per filing: our metric name -> candidate
+# concepts, in priority order (filers pick different revenue tags)
+XBRL_CONCEPTS = {
+    'revenue': ['us-gaap:Revenues', 'us-gaap:RevenueFromContractWithCustomerExcludingAssessedTax', 'us-gaap:SalesRevenueNet'],
+    'gross_profit': ['us-gaap:GrossProfit'],
+    'operating_income': ['us-gaap:OperatingIncomeLoss'],
+    'net_income': ['us-gaap:NetIncomeLoss'],
+    'eps_diluted': ['us-gaap:EarningsPerShareDiluted'],
+    'operating_cash_flow': ['us-gaap:NetCashProvidedByUsedInOperatingActivities'],
+    'total_assets': ['us-gaap:Assets'],
+    'total_liabilities': ['us-gaap:Liabilities'],
+    'stockholders_equity': ['us-gaap:StockholdersEquity', 'us-gaap:StockholdersEquityIncludingPortionAttributableToNoncontrollingInterest'],
+    'cash': ['us-gaap:CashAndCashEquivalentsAtCarryingValue'],
+    'shares_outstanding': ['dei:EntityCommonStockSharesOutstanding', 'us-gaap:CommonStockSharesOutstanding'],
+}
+_CONCEPT_TO_METRIC = {concept: metric for metric, concepts in XBRL_CONCEPTS.items() for concept in concepts}
+
+XBRL_FACTS_FILENAME = 'xbrl_facts.parquet'
+
+# HTML elements that end a paragraph in html_to_text(blocks=True)
+BLOCK_TAGS = ['p', 'div', 'li', 'tr', 'table', 'br', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6']
+
+# Contexts, inline facts (ix:nonFraction) and instance-document facts; self-closing
+# nil facts (<ix:nonFraction ... xsi:nil="true"/>) match without a value, so they
+# never run on to the next fact's closing tag
+_XBRL_PATTERN = re.compile(
+    r'<(?:xbrli:)?context\b[^>]*?\bid="(?P<ctx_id>[^"]+)"[^>]*>(?P<ctx_body>.*?)</(?:xbrli:)?context>'
+    r'|<ix:nonFraction\b(?P<ix_attrs>[^>]*?)(?:/>|>(?P<ix_value>.*?)</ix:nonFraction>)'
+    r'|<(?P<inst_name>(?:us-gaap|dei):\w+)\b(?P<inst_attrs>[^>]*?)(?<!/)>(?P<inst_value>[^<]*)</(?P=inst_name)>',
+    re.DOTALL | re.IGNORECASE,
+)
+_ATTR_PATTERN = re.compile(r'([\w:-]+)="([^"]*)"')
+# Longest unmatched text carried between chunks; far larger than any single tag
+_XBRL_MAX_TAIL = 1 << 18
+
 
 class SECParser:
     """
@@ -10,67 +78,185 @@ class SECParser:
     Downloads and extracts key sections from EDGAR
     """
     
-    def __init__(self, download_folder="sec_filings"):
-        """Initialize downloader"""
+    def __init__(self, download_folder="sec_filings", verbose=True, store_folder=None):
+        """
+        Initialize downloader
+        store_folder: compressed filing store read for archived filings (default: filing_store.STORE_FOLDER)
+        """
         self.download_folder = download_folder
-        self.dl = Downloader("YourCompanyName", "your.email@example.com", download_folder)
+        self.verbose = verbose
+        self.store_folder = store_folder
+        self._dl = None
+        self._store = None
+    
+    @property
+    def dl(self):
+        """EDGAR downloader, created on first use (it fetches the CIK map over the network)"""
+        if self._dl is None:
+            self._dl = Downloader("YourCompanyName", "your.email@example.com", self.download_folder)
+        return self._dl
     
-    def get_latest_10k(self, ticker):
+    @property
+    def store(self):
+        """Compressed filing store, opened on first use"""
+        if self._store is None:
+            # Imported lazily: the compressed store is optional for plain parsing
+            from filing_store import FilingStore
+            self._store = FilingStore(self.store_folder) if self.store_folder else FilingStore()
+        return self._store
+    
+    def get_latest_10k(self, ticker, download=True):
         """
         Download the most recent 10-K filing for a company
+        Pass download=False to reuse a filing already on disk
         Returns: dict with filing info and file path
         """
+        filings = self.get_10k_history(ticker, limit=1, download=download)
+        if isinstance(filings, dict):
+            return filings
+        return filings[-1]
+    
+    def get_10k_history(self, ticker, limit=2, download=True):
+        """
+        Download the most recent `limit` 10-K filings for a company
+        Returns: list of filing info dicts, oldest first, or dict with 'error'
+        """
         try:
-            # Download latest 10-K
-            self.dl.get("10-K", ticker, limit=1)
-            
-            # Find the downloaded file
-            company_folder = os.path.join(self.download_folder, "sec-edgar-filings", ticker, "10-K")
+            if download:
+                self.dl.get("10-K", ticker, limit=limit)
             
-            # Get most recent filing
-            filing_folders = [f for f in os.listdir(company_folder) if os.path.isdir(os.path.join(company_folder, f))]
+            # Find the downloaded files
+            company_folder = self._company_folder(ticker)
+            filing_folders = self._filing_folders(ticker)
             if not filing_folders:
                 return {"error": f"No 10-K filings found for {ticker}"}
             
-            latest_filing = sorted(filing_folders)[-1]
-            filing_path = os.path.join(company_folder, latest_filing)
-            
-            # Check if we need to extract from full-submission.txt
-            submission_file = os.path.join(filing_path, 'full-submission.txt')
-            
-            if os.path.exists(submission_file):
-                # Extract the actual document from the submission wrapper
-                print(f"    [Debug] Extracting document from submission file...")
-                document_content = self.extract_document_from_submission(submission_file)
-                
-                if document_content:
-                    # Save extracted content to a temporary file
-                    extracted_file = os.path.join(filing_path, 'extracted_10k.html')
-                    with open(extracted_file, 'w', encoding='utf-8', errors='ignore') as f:
-                        f.write(document_content)
-                    
-                    filing_file = extracted_file
-                    print(f"    [Debug] Extracted {len(document_content)/1024:.1f} KB of content")
-                else:
-                    filing_file = submission_file
-            else:
-                # Look for other files
-                all_files = [f for f in os.listdir(filing_path) if f.endswith(('.htm', '.html', '.txt'))]
-                if all_files:
-                    filing_file = os.path.join(filing_path, all_files[0])
-                else:
-                    return {"error": "No readable filing found"}
-            
-            return {
-                "ticker": ticker.upper(),
-                "filing_date": latest_filing,
-                "file_path": filing_file,
-                "filing_type": "10-K"
-            }
+            # Newest first, skipping folders with nothing readable left (e.g. archived
+            # with --remove-raw, then evicted from the store) so one does not hide the rest
+            filings = []
+            error = None
+            for folder in reversed(filing_folders):
+                filing_info = self._prepare_filing(ticker, os.path.join(company_folder, folder), folder)
+                if "error" in filing_info:
+                    self._debug(f"Skipping {folder}: {filing_info['error']}")
+                    error = filing_info
+                    continue
+                filings.append(filing_info)
+                if len(filings) == limit:
+                    break
+            
+            if not filings:
+                return error
+            return filings[::-1]
             
         except Exception as e:
             return {"error": f"Error downloading 10-K: {str(e)}"}
     
+    def _company_folder(self, ticker):
+        return os.path.join(self.download_folder, "sec-edgar-filings", ticker, "10-K")
+    
+    def _filing_folders(self, ticker):
+        """Returns: names of the downloaded 10-K filing folders, oldest first (raises if none were downloaded)"""
+        company_folder = self._company_folder(ticker)
+        return sorted(f for f in os.listdir(company_folder) if os.path.isdir(os.path.join(company_folder, f)))
+    
+    def _prepare_filing(self, ticker, filing_path, folder_name):
+        """
+        Locate (extracting if needed) the primary document of one filing folder
+        Returns: dict with filing info and file path
+        """
+        # Check if we need to extract from full-submission.txt
+        submission_file = os.path.join(filing_path, 'full-submission.txt')
+        
+        extracted_file = os.path.join(filing_path, 'extracted_10k.html')
+        
+        if os.path.exists(submission_file) and self._is_current(extracted_file, submission_file):
+            # Already extracted from this submission; rewriting it would only churn its mtime
+            filing_file = extracted_file
+        elif os.path.exists(submission_file):
+            # Extract the actual document from the submission wrapper
+            self._debug("Extracting document from submission file...")
+            document_content = self.extract_document_from_submission(submission_file)
+            
+            if document_content:
+                # Save extracted content next to the submission
+                with open(extracted_file, 'w', encoding='utf-8', errors='ignore') as f:
+                    f.write(document_content)
+                
+                filing_file = extracted_file
+                self._debug(f"Extracted {len(document_content)/1024:.1f} KB of content")
+            else:
+                filing_file = submission_file
+        else:
+            # Look for other files
+            all_files = [f for f in os.listdir(filing_path) if f.endswith(('.htm', '.html', '.txt'))]
+            if all_files:
+                filing_file = os.path.join(filing_path, all_files[0])
+            elif self.store.get_index(ticker, folder_name):
+                # Raw files were archived and removed; readers go to the store (see _archived)
+                filing_file = extracted_file
+            else:
+                return {"error": "No readable filing found"}
+        
+        return {
+            "ticker": ticker.upper(),
+            "filing_date": folder_name,
+            "file_path": filing_file,
+            "filing_type": "10-K"
+        }
+    
+    @staticmethod
+    def _is_current(derived_file, source_file):
+        """True if derived_file exists and is newer than the file it was made from"""
+        return os.path.exists(derived_file) and os.path.getmtime(derived_file) >= os.path.getmtime(source_file)
+    
+    def _archived(self, file_path):
+        """
+        Store key of a filing whose raw files were archived and removed
+        Returns: (ticker, filing_date), or None when the file is on disk or not stored
+        """
+        if os.path.exists(file_path):
+            return None
+        filing_path = os.path.dirname(file_path)
+        ticker = os.path.basename(os.path.dirname(os.path.dirname(filing_path)))
+        filing_date = os.path.basename(filing_path)
+        return (ticker, filing_date) if self.store.get_index(ticker, filing_date) else None
+    
+    def read_document(self, file_path):
+        """
+        Filing document as a string
+        Archived filings are inflated from the store in memory; nothing is written back
+        """
+        archived = self._archived(file_path)
+        if archived:
+            from filing_store import DOCUMENT_FRAME
+            return self.store.read_section(*archived, DOCUMENT_FRAME)
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            return f.read()
+    
+    def read_section(self, file_path, section):
+        """
+        One cleaned section (see SECTIONS); archived filings read only that section's frame
+        Returns: (section_text, error) - exactly one of them is None
+        """
+        archived = self._archived(file_path)
+        if archived:
+            section_text = self.store.read_section(*archived, section)
+            if section_text is not None:
+                return section_text, None
+        return self.slice_section(self.html_to_text(file_path), section)
+    
+    def filing_sections(self, file_path):
+        """
+        Every extractable section of a filing, from the store's section frames when archived
+        Returns: dict of section name -> cleaned text
+        """
+        archived = self._archived(file_path)
+        if archived:
+            sections = {section: self.store.read_section(*archived, section) for section in SECTIONS}
+            return {section: text for section, text in sections.items() if text is not None}
+        return self.extract_sections(self.html_to_text(file_path))
+    
     def extract_document_from_submission(self, submission_path):
         """
         Extract the primary 10-K document from full-submission.txt
@@ -101,46 +287,96 @@ class SECParser:
             print(f"Error extracting document: {str(e)}")
             return None
     
-    def extract_risk_factors(self, file_path):
+    def html_to_text(self, file_path, blocks=False):
+        """
+        Parse a filing document and return its plain text
+        With blocks, every block element (paragraph, div, table row...) ends in a
+        blank line, so paragraphs can be told apart from wrapped lines
+        """
+        soup = BeautifulSoup(self.read_document(file_path), 'lxml')
+        if blocks:
+            for tag in soup.find_all(BLOCK_TAGS):
+                tag.append('\n\n')
+        return soup.get_text()
+    
+    def slice_section(self, text, section, clean=True):
+        """
+        Slice one 10-K section (see SECTIONS) out of the filing text
+        Returns: (section_text, error) - exactly one of them is None
+        """
+        spec = SECTIONS[section]
+        
+        # Find ALL occurrences of the item heading - first is usually table of contents
+        all_matches = [m.start() for m in re.finditer(spec['start'], text, re.IGNORECASE)]
+        
+        if len(all_matches) < 2:
+            return None, f"Could not find {spec['label']} section"
+        
+        # Use the SECOND occurrence (skip table of contents)
+        start_pos = all_matches[1]
+        
+        # Find where the next item starts, trying each candidate in order
+        end_match = None
+        for end_pattern in spec['end']:
+            end_match = re.search(end_pattern, text[start_pos:], re.IGNORECASE)
+            if end_match:
+                break
+        
+        if not end_match:
+            return None, f"Could not find end of {spec['label']} section"
+        
+        end_pos = start_pos + end_match.start()
+        self._debug(f"Extracted from position {start_pos} to {end_pos}")
+        
+        section_text = text[start_pos:end_pos]
+        if not clean:
+            return section_text, None
+        
+        # Clean it up and remove the header
+        section_text = self._clean_text(section_text)
+        section_text = re.sub(spec['header'], '', section_text, flags=re.IGNORECASE)
+        return section_text, None
+    
+    def extract_sections(self, text, sections=None):
+        """
+        Extract several sections from already-parsed filing text
+        Returns: dict of section name -> cleaned text (missing sections are skipped)
+        """
+        extracted = {}
+        for section in (sections or SECTIONS):
+            section_text, error = self.slice_section(text, section)
+            if error:
+                self._debug(error)
+                continue
+            extracted[section] = section_text
+        return extracted
+    
+    def get_relevant_passages(self, file_path, query, sections=None, k=8, token_budget=3000):
+        """
+        Retrieve the chunks of a filing most relevant to a query
+        Uses the BM25 index persisted next to the filing (see extract_risk_factors /
+        extract_mda with a query, and ai_analyzer.analyze_10k)
+        Returns: passages joined with blank lines, in document order (neighbouring chunks merged)
+        """
+        index = get_filing_index(self, file_path)
+        chunks = index.top_k_chunks(query, k=k, token_budget=token_budget, sections=sections)
+        return "\n\n".join(merge_passages(chunks))
+    
+    def extract_risk_factors(self, file_path, query=None, token_budget=3750):
         """
         Extract Item 1A - Risk Factors section
+        With a query, returns the most relevant passages within token_budget
+        instead of the leading 15,000 characters
         Returns: cleaned text of risk factors
         """
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            
-            soup = BeautifulSoup(content, 'lxml')
-            text = soup.get_text()
-            
-            # Find ALL occurrences of "Item 1A" - first is usually table of contents
-            all_matches = []
-            for match in re.finditer(r'Item 1A', text, re.IGNORECASE):
-                all_matches.append(match.start())
-            
-            if len(all_matches) < 2:
-                return "Could not find Risk Factors section (only found table of contents)"
+            if query:
+                passages = self.get_relevant_passages(file_path, query, sections=['risk_factors'], k=50, token_budget=token_budget)
+                return passages or "No Risk Factors passages matched the query."
             
-            # Use the SECOND occurrence (skip table of contents)
-            start_pos = all_matches[1]
-            
-            # Find where Item 1B starts (after the second Item 1A)
-            item_1b_match = re.search(r'Item 1B', text[start_pos:], re.IGNORECASE)
-            if not item_1b_match:
-                return "Could not find end of Risk Factors section"
-            
-            end_pos = start_pos + item_1b_match.start()
-            
-            # Extract the risk factors text
-            risk_text = text[start_pos:end_pos]
-            
-            # Clean it up
-            risk_text = self._clean_text(risk_text)
-            
-            # Remove the header
-            risk_text = re.sub(r'^Item 1A\.?\s*Risk Factors\s*', '', risk_text, flags=re.IGNORECASE)
-            
-            print(f"    [Debug] Extracted from position {start_pos} to {end_pos}")
+            risk_text, error = self.read_section(file_path, 'risk_factors')
+            if error:
+                return error
             
             if len(risk_text) > 1000:
                 return risk_text[:15000]
@@ -150,50 +386,21 @@ class SECParser:
         except Exception as e:
             return f"Error extracting risk factors: {str(e)}"
     
-    def extract_mda(self, file_path):
+    def extract_mda(self, file_path, query=None, token_budget=5000):
         """
         Extract Item 7 - Management's Discussion and Analysis
+        With a query, returns the most relevant passages within token_budget
+        instead of the leading 20,000 characters
         Returns: cleaned text of MD&A
         """
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            
-            soup = BeautifulSoup(content, 'lxml')
-            text = soup.get_text()
-            
-            # Find ALL occurrences of "Item 7" - skip table of contents
-            all_matches = []
-            for match in re.finditer(r'Item 7[^A]', text, re.IGNORECASE):
-                all_matches.append(match.start())
-            
-            if len(all_matches) < 2:
-                return "Could not find MD&A section"
-            
-            # Use the SECOND occurrence
-            start_pos = all_matches[1]
-            
-            # Find where Item 7A starts
-            item_7a_match = re.search(r'Item 7A', text[start_pos:], re.IGNORECASE)
-            if not item_7a_match:
-                # Try Item 8 as fallback
-                item_7a_match = re.search(r'Item 8', text[start_pos:], re.IGNORECASE)
-            
-            if not item_7a_match:
-                return "Could not find end of MD&A section"
-            
-            end_pos = start_pos + item_7a_match.start()
-            
-            # Extract MD&A text
-            mda_text = text[start_pos:end_pos]
-            
-            # Clean it up
-            mda_text = self._clean_text(mda_text)
+            if query:
+                passages = self.get_relevant_passages(file_path, query, sections=['mda'], k=50, token_budget=token_budget)
+                return passages or "No MD&A passages matched the query."
             
-            # Remove the header
-            mda_text = re.sub(r'^Item 7\..*?(?:Results of Operations)\s*', '', mda_text, flags=re.IGNORECASE)
-            
-            print(f"    [Debug] Extracted from position {start_pos} to {end_pos}")
+            mda_text, error = self.read_section(file_path, 'mda')
+            if error:
+                return error
             
             if len(mda_text) > 1000:
                 return mda_text[:20000]
@@ -203,6 +410,28 @@ class SECParser:
         except Exception as e:
             return f"Error extracting MD&A: {str(e)}"
     
+    def diff_risk_factors(self, ticker, download=True):
+        """
+        Compare Item 1A between the two most recent 10-Ks
+        Returns: diff dict with added/removed/modified paragraphs, or dict with 'error'
+        """
+        filings = self.get_10k_history(ticker, limit=2, download=download)
+        if isinstance(filings, dict):
+            return filings
+        if len(filings) < 2:
+            return {"error": f"Need two 10-K filings for {ticker} to diff, found {len(filings)}"}
+        
+        diff = diff_filings(self, filings[0]['file_path'], filings[1]['file_path'], 'risk_factors')
+        if "error" not in diff:
+            diff['old_filing'] = filings[0]['filing_date']
+            diff['new_filing'] = filings[1]['filing_date']
+        return diff
+    
+    def _debug(self, message):
+        """Print a debug line when running verbosely"""
+        if self.verbose:
+            print(f"    [Debug] {message}")
+    
     def _clean_text(self, text):
         """Clean extracted text"""
         text = re.sub(r'\s+', ' ', text)
@@ -214,8 +443,7 @@ class SECParser:
     def get_filing_metadata(self, file_path):
         """Extract metadata from filing"""
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
+            content = self.read_document(file_path)
             
             soup = BeautifulSoup(content, 'lxml')
             text = soup.get_text()
@@ -224,7 +452,7 @@ class SECParser:
             
             metadata = {
                 "fiscal_year_end": fiscal_year.group(1) if fiscal_year else "Not found",
-                "filing_size_kb": os.path.getsize(file_path) / 1024
+                "filing_size_kb": (os.path.getsize(file_path) if os.path.exists(file_path) else len(content.encode('utf-8'))) / 1024
             }
             
             return metadata
@@ -232,6 +460,198 @@ class SECParser:
         except Exception as e:
             return {"error": str(e)}
 
+    def extract_xbrl_facts(self, submission_path, chunk_size=1 << 20):
+        """
+        Stream a full-submission.txt and pull the standard XBRL facts
+        Handles both inline XBRL (ix:nonFraction) and classic instance documents
+        Returns: DataFrame with one row per (concept, period), dimensional facts excluded
+        """
+        contexts = {}
+        raw_facts = []
+        buffer = ''
+        
+        with open(submission_path, 'r', encoding='utf-8', errors='ignore') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                buffer += chunk
+                consumed = 0
+                for match in _XBRL_PATTERN.finditer(buffer):
+                    consumed = match.end()
+                    if match.group('ctx_id'):
+                        contexts[match.group('ctx_id')] = _parse_context(match.group('ctx_body'))
+                    elif match.group('ix_attrs') is not None:
+                        fact = _parse_inline_fact(match.group('ix_attrs'), match.group('ix_value'))
+                        if fact:
+                            raw_facts.append(fact)
+                    else:
+                        fact = _parse_instance_fact(match.group('inst_name'), match.group('inst_attrs'), match.group('inst_value'))
+                        if fact:
+                            raw_facts.append(fact)
+                
+                if not chunk:
+                    break
+                # Keep the unmatched tail (a tag may straddle the chunk boundary)
+                buffer = buffer[consumed:][-_XBRL_MAX_TAIL:]
+        
+        rows = []
+        for fact in raw_facts:
+            context = contexts.get(fact.pop('context'))
+            if not context or context['dimensional']:
+                continue
+            rows.append({**fact, 'period_start': context['start'], 'period_end': context['end']})
+        
+        columns = ['metric', 'concept', 'value', 'unit', 'period_start', 'period_end']
+        facts = pd.DataFrame(rows, columns=columns).drop_duplicates(['concept', 'period_start', 'period_end'])
+        for column in ('metric', 'concept', 'unit'):
+            facts[column] = facts[column].astype('category')
+        
+        self._debug(f"Extracted {len(facts)} XBRL facts from {len(contexts)} contexts")
+        return facts.reset_index(drop=True)
+    
+    def get_xbrl_facts(self, ticker, download=False):
+        """
+        XBRL facts for the latest 10-K, cached as Parquet next to the filing
+        Offline by default: only filings already on disk are used
+        Only the filing folder is located, so a cache hit skips document extraction
+        Returns: DataFrame of facts or dict with 'error'
+        """
+        try:
+            if download:
+                self.dl.get("10-K", ticker, limit=1)
+            filing_folders = self._filing_folders(ticker)
+        except Exception as e:
+            return {"error": f"Error downloading 10-K: {str(e)}"}
+        if not filing_folders:
+            return {"error": f"No 10-K filings found for {ticker}"}
+        
+        filing_dir = os.path.join(self._company_folder(ticker), filing_folders[-1])
+        cache_path = os.path.join(filing_dir, XBRL_FACTS_FILENAME)
+        if os.path.exists(cache_path):
+            return pd.read_parquet(cache_path)
+        
+        submission_file = os.path.join(filing_dir, 'full-submission.txt')
+        if not os.path.exists(submission_file):
+            return {"error": f"No full-submission.txt for {ticker}"}
+        
+        try:
+            facts = self.extract_xbrl_facts(submission_file)
+            facts.to_parquet(cache_path, index=False)
+            return facts
+        except Exception as e:
+            return {"error": f"Error extracting XBRL facts: {str(e)}"}
+    
+    def get_xbrl_fundamentals(self, ticker, download=False):
+        """
+        Fundamentals derived from the latest 10-K's XBRL facts
+        Ratios use the most recent fiscal year; growth compares it with the prior year
+        Returns: dict of metric -> value (None when unavailable) or dict with 'error'
+        """
+        facts = self.get_xbrl_facts(ticker, download=download)
+        if isinstance(facts, dict):
+            return facts
+        
+        latest = {metric: lookup_xbrl_fact(facts, metric) for metric in XBRL_CONCEPTS}
+        prior_revenue = lookup_xbrl_fact(facts, 'revenue', years_back=1)
+        prior_net_income = lookup_xbrl_fact(facts, 'net_income', years_back=1)
+        
+        def ratio(numerator, denominator):
+            if numerator is None or not denominator:
+                return None
+            return numerator / denominator
+        
+        return {
+            **latest,
+            'profit_margin': ratio(latest['net_income'], latest['revenue']),
+            'gross_margin': ratio(latest['gross_profit'], latest['revenue']),
+            'operating_margin': ratio(latest['operating_income'], latest['revenue']),
+            'roe': ratio(latest['net_income'], latest['stockholders_equity']),
+            'roa': ratio(latest['net_income'], latest['total_assets']),
+            'revenue_growth_yoy': ratio(latest['revenue'] - prior_revenue, abs(prior_revenue)) if latest['revenue'] is not None and prior_revenue else None,
+            'earnings_growth_yoy': ratio(latest['net_income'] - prior_net_income, abs(prior_net_income)) if latest['net_income'] is not None and prior_net_income else None,
+        }
+
+
+def _parse_context(body):
+    """Period and dimensionality of one xbrli:context"""
+    start = re.search(r'<(?:xbrli:)?startDate>\s*([^<\s]+)', body, re.IGNORECASE)
+    end = re.search(r'<(?:xbrli:)?(?:endDate|instant)>\s*([^<\s]+)', body, re.IGNORECASE)
+    return {
+        'start': start.group(1) if start else None,
+        'end': end.group(1) if end else None,
+        'dimensional': bool(re.search(r'<(?:xbrli:)?segment|<(?:xbrli:)?scenario', body, re.IGNORECASE)),
+    }
+
+
+def _parse_number(text):
+    """Parse a displayed XBRL number; dashes mean zero"""
+    text = re.sub(r'<[^>]+>', '', text).strip().replace(',', '').replace('$', '')
+    if text in ('', '-', '—', '–'):
+        return 0.0
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def _parse_inline_fact(attr_text, value_text):
+    """One ix:nonFraction fact for a concept in XBRL_CONCEPTS, or None (also for nil facts)"""
+    if value_text is None:
+        return None
+    attrs = {key.lower(): value for key, value in _ATTR_PATTERN.findall(attr_text)}
+    metric = _CONCEPT_TO_METRIC.get(attrs.get('name'))
+    if not metric:
+        return None
+    
+    value = _parse_number(value_text)
+    if value is None:
+        return None
+    value *= 10 ** int(attrs.get('scale', 0) or 0)
+    if attrs.get('sign') == '-':
+        value = -value
+    
+    return {'metric': metric, 'concept': attrs['name'], 'value': value,
+            'unit': attrs.get('unitref'), 'context': attrs.get('contextref')}
+
+
+def _parse_instance_fact(name, attr_text, value_text):
+    """One instance-document fact for a concept in XBRL_CONCEPTS, or None"""
+    metric = _CONCEPT_TO_METRIC.get(name)
+    if not metric:
+        return None
+    
+    attrs = {key.lower(): value for key, value in _ATTR_PATTERN.findall(attr_text)}
+    try:
+        value = float(value_text.strip())
+    except ValueError:
+        return None
+    
+    return {'metric': metric, 'concept': name, 'value': value,
+            'unit': attrs.get('unitref'), 'context': attrs.get('contextref')}
+
+
+def lookup_xbrl_fact(facts, metric, years_back=0):
+    """
+    Fast lookup of one metric from an extracted facts table
+    Flow metrics use full-year periods; balances use instants.
+    The first concept in XBRL_CONCEPTS with data wins
+    Returns: float or None
+    """
+    rows = facts[facts['metric'] == metric]
+    if rows.empty:
+        return None
+    
+    # Full fiscal years only for duration facts (roughly 52-53 weeks)
+    if rows['period_start'].notna().any():
+        days = (pd.to_datetime(rows['period_end']) - pd.to_datetime(rows['period_start'])).dt.days
+        rows = rows[(days >= 350) & (days <= 380)]
+    
+    for concept in XBRL_CONCEPTS[metric]:
+        concept_rows = rows[rows['concept'] == concept].sort_values('period_end', ascending=False)
+        periods = concept_rows.drop_duplicates('period_end')
+        if len(periods) > years_back:
+            return float(periods['value'].iloc[years_back])
+    return None
+
 
 # Test the parser
 if __name__ == "__main__":
@@ -240,7 +660,7 @@ if __name__ == "__main__":
     
     parser = SECParser()
     
-    print("\n[1/4] Downloading NVDA 10-K...")
+    print("\n[1/5] Downloading NVDA 10-K...")
     filing_info = parser.get_latest_10k("NVDA")
     
     if "error" in filing_info:
@@ -250,21 +670,39 @@ if __name__ == "__main__":
         print(f"    Ticker: {filing_info['ticker']}")
         print(f"    Filing Date: {filing_info['filing_date']}")
         
-        print("\n[2/4] Extracting Risk Factors...")
+        print("\n[2/5] Extracting Risk Factors...")
         risks = parser.extract_risk_factors(filing_info['file_path'])
         print(f"✅ Extracted {len(risks)} characters")
         print(f"    Preview: {risks[:200]}...")
         
-        print("\n[3/4] Extracting MD&A...")
+        print("\n[3/5] Extracting MD&A...")
         mda = parser.extract_mda(filing_info['file_path'])
         print(f"✅ Extracted {len(mda)} characters")
         print(f"    Preview: {mda[:200]}...")
         
-        print("\n[4/4] Getting metadata...")
+        print("\n[4/5] Getting metadata...")
         metadata = parser.get_filing_metadata(filing_info['file_path'])
         print(f"✅ Metadata extracted")
         print(f"    Fiscal Year End: {metadata.get('fiscal_year_end', 'N/A')}")
     
+    print("\n[5/5] Parsing inline XBRL with a nil fact (offline)...")
+    import tempfile
+    sample = (
+        '<xbrli:context id="FY"><xbrli:period><xbrli:startDate>2024-01-29</xbrli:startDate>'
+        '<xbrli:endDate>2025-01-26</xbrli:endDate></xbrli:period></xbrli:context>'
+        '<ix:nonFraction name="us-gaap:GrossProfit" contextRef="FY" unitRef="usd" xsi:nil="true"/> '
+        '<ix:nonFraction name="us-gaap:Revenues" contextRef="FY" unitRef="usd" scale="6">130,497</ix:nonFraction>'
+    )
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+        f.write(sample)
+    facts = parser.extract_xbrl_facts(f.name)
+    os.remove(f.name)
+    parsed = dict(zip(facts['metric'].astype(str), facts['value']))
+    if parsed == {'revenue': 130497e6}:
+        print(f"✅ Nil fact skipped, revenue = {parsed['revenue']:,.0f}")
+    else:
+        print(f"❌ Unexpected facts: {parsed}")
+    
     print("\n" + "="*60)
     print("SEC PARSER TEST COMPLETE ✅")
     print("="*60)
\ No newline at end of file
@@ -0,0 +1,214 @@
+import os
+import re
+import gzip
+import json
+import math
+from collections import Counter, defaultdict
+
+# Small English stopword list - enough to keep BM25 from rewarding filler words
+STOPWORDS = set("""
+a an and are as at be been but by can could for from has have if in into is it its
+may might not of on or our such that the their there these this those to was we were
+which will with would also other any than then them they us
+""".split())
+
+INDEX_FILENAME = "bm25_index.json.gz"
+
+# Chunk window and the words each chunk shares with the previous one
+CHUNK_WORDS = 180
+CHUNK_OVERLAP_WORDS = 30
+
+
+def estimate_tokens(text):
+    """Rough token count for Claude prompts (~4 characters per token)"""
+    return max(1, len(text) // 4)
+
+
+def tokenize(text):
+    """Lowercase word tokens with stopwords and single characters removed"""
+    return [t for t in re.findall(r"[a-z0-9]+(?:[-'][a-z0-9]+)*", text.lower())
+            if len(t) > 1 and t not in STOPWORDS]
+
+
+def chunk_text(text, chunk_words=CHUNK_WORDS, overlap_words=CHUNK_OVERLAP_WORDS):
+    """
+    Split a section into overlapping word windows
+    Returns: list of chunk strings
+    """
+    words = text.split()
+    if not words:
+        return []
+
+    step = max(1, chunk_words - overlap_words)
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(' '.join(words[start:start + chunk_words]))
+        if start + chunk_words >= len(words):
+            break
+    return chunks
+
+
+class BM25Index:
+    """
+    Lexical BM25 index over the chunks of one filing
+    """
+
+    def __init__(self, chunks, k1=1.5, b=0.75):
+        """
+        Build the index
+        chunks: list of dicts with 'section' and 'text'
+        """
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self.doc_lengths = []
+        self.postings = defaultdict(list)
+
+        for chunk_id, chunk in enumerate(chunks):
+            terms = Counter(tokenize(chunk['text']))
+            self.doc_lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self.postings[term].append((chunk_id, tf))
+
+        self.avg_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0
+
+    def score(self, query, sections=None):
+        """
+        Score every chunk against a query
+        Returns: dict of chunk id -> BM25 score (only chunks sharing a term)
+        """
+        n_docs = len(self.chunks)
+        scores = defaultdict(float)
+
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings:
+                if sections and self.chunks[chunk_id]['section'] not in sections:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[chunk_id] / self.avg_length)
+                scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return scores
+
+    def top_k_chunks(self, query, k=8, token_budget=3000, sections=None):
+        """
+        Pick the best-scoring chunks that fit within a token budget
+        Returns: list of chunk dicts (with 'score'), in document order
+        """
+        scores = self.score(query, sections)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+        selected = []
+        used_tokens = 0
+        for chunk_id, chunk_score in ranked:
+            tokens = estimate_tokens(self.chunks[chunk_id]['text'])
+            if used_tokens + tokens > token_budget:
+                continue
+            selected.append(chunk_id)
+            used_tokens += tokens
+            if len(selected) >= k:
+                break
+
+        return [dict(self.chunks[i], score=round(scores[i], 3)) for i in sorted(selected)]
+
+    def save(self, path, source_stamp=None):
+        """Persist the index as gzipped JSON"""
+        payload = {
+            'source_stamp': source_stamp,
+            'k1': self.k1,
+            'b': self.b,
+            'chunks': self.chunks,
+            'doc_lengths': self.doc_lengths,
+            'postings': self.postings,
+        }
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            json.dump(payload, f)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a persisted index
+        Returns: (index, source_stamp)
+        """
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            payload = json.load(f)
+
+        index = cls.__new__(cls)
+        index.chunks = payload['chunks']
+        index.k1 = payload['k1']
+        index.b = payload['b']
+        index.doc_lengths = payload['doc_lengths']
+        index.postings = {term: [tuple(p) for p in plist] for term, plist in payload['postings'].items()}
+        index.avg_length = (sum(index.doc_lengths) / len(index.doc_lengths)) if index.doc_lengths else 0
+        return index, payload.get('source_stamp')
+
+
+def merge_passages(chunks, overlap_words=CHUNK_OVERLAP_WORDS):
+    """
+    Join selected chunks (in document order) into passages
+    Neighbouring chunks of the same section are merged, dropping the words they share,
+    so the prompt never repeats the overlap
+    Returns: list of passage strings
+    """
+    passages = []
+    previous = None
+    for chunk in chunks:
+        adjacent = previous is not None and chunk['section'] == previous['section'] and chunk['chunk'] == previous['chunk'] + 1
+        if adjacent:
+            passages[-1] += ' ' + ' '.join(chunk['text'].split()[overlap_words:])
+        else:
+            passages.append(chunk['text'])
+        previous = chunk
+    return passages
+
+
+def _source_stamp(file_path):
+    """
+    Size + mtime of the filing's source, so a re-downloaded filing invalidates its index
+    The downloaded full-submission.txt is used when present: the extracted document is
+    derived from it, and re-extracting must not look like a new filing
+    """
+    submission_file = os.path.join(os.path.dirname(file_path), 'full-submission.txt')
+    source = submission_file if os.path.exists(submission_file) else file_path
+    if not os.path.exists(source):
+        # Archived to the filing store with the raw files removed; the archive does not change
+        return "archived"
+    stat = os.stat(source)
+    return f"{stat.st_size}:{int(stat.st_mtime)}"
+
+
+def build_index(sections):
+    """
+    Chunk extracted sections and index them
+    sections: dict of section name -> text
+    """
+    chunks = [
+        {'section': name, 'chunk': i, 'text': chunk}
+        for name, text in sections.items()
+        for i, chunk in enumerate(chunk_text(text))
+    ]
+    return BM25Index(chunks)
+
+
+def get_filing_index(parser, file_path):
+    """
+    Load the BM25 index stored next to a filing, building it if missing or stale
+    parser: SECParser used to extract the sections
+    """
+    index_path = os.path.join(os.path.dirname(file_path), INDEX_FILENAME)
+    stamp = _source_stamp(file_path)
+
+    if os.path.exists(index_path):
+        try:
+            index, saved_stamp = BM25Index.load(index_path)
+            if saved_stamp == stamp:
+                return index
+        except Exception as e:
+            print(f"Error loading index, rebuilding: {str(e)}")
+
+    index = build_index(parser.filing_sections(file_path))
+    index.save(index_path, source_stamp=stamp)
+    return index
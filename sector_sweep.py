@@ -0,0 +1,109 @@
+import json
+import time
+import heapq
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from data_fetchers import get_comprehensive_peer_data
+from ai_analyzer import analyze_sector_sweep, SWEEP_MAX_COMPANIES
+
+# Claude calls the per-ticker pipeline makes (four analyses plus the summary)
+PIPELINE_CALLS_PER_TICKER = 5
+
+
+def sweep_sector(sector, tickers, batch_size=25, workers=4):
+    """
+    Analyze a whole sector in as few requests as possible
+    Tickers are fetched once, then split into batches of at most batch_size companies;
+    every batch shares the same sector-wide aggregates
+    Returns: summary dict with companies, a merged ranking, usage and throughput
+    """
+    batch_size = min(batch_size, SWEEP_MAX_COMPANIES)
+    started_at = datetime.now()
+    run_start = time.perf_counter()
+
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    sector_data = get_comprehensive_peer_data(tickers[0], tickers[1:]) if tickers else {}
+    symbols = list(sector_data)
+    batches = [{t: sector_data[t] for t in symbols[i:i + batch_size]} for i in range(0, len(symbols), batch_size)]
+
+    print(f"Sweeping {len(symbols)} companies in {len(batches)} requests...")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda batch: analyze_sector_sweep(sector, batch, sector_data), batches))
+
+    companies, errors = {}, []
+    for position, result in enumerate(results):
+        if 'error' in result:
+            errors.append(result['error'])
+        for rank, ticker in enumerate(result['ranking']):
+            companies[ticker] = {**result['companies'][ticker], 'batch': position, 'batch_rank': rank + 1}
+
+    # k-way merge on the score of each batch's next company: across batches the 1-10 score
+    # decides, within a batch the model's order is kept even where its scores disagree
+    def merge_key(ticker):
+        score = companies[ticker]['score']
+        return -score if isinstance(score, (int, float)) else 0
+    ranking = list(heapq.merge(*(result['ranking'] for result in results), key=merge_key))
+
+    usage = {
+        key: sum(result['usage'][key] for result in results if 'usage' in result)
+        for key in ('input_tokens', 'output_tokens', 'cost_usd')
+    }
+    calls = len(batches)
+    return {
+        'sector': sector,
+        'started_at': started_at.isoformat(timespec='seconds'),
+        'wall_s': round(time.perf_counter() - run_start, 3),
+        'sector_views': [result.get('sector_view', '') for result in results],
+        'ranking': ranking,
+        'companies': companies,
+        'unanalyzed': [t for t in tickers if t not in companies],
+        'errors': errors,
+        'usage': {**usage, 'cost_usd': round(usage['cost_usd'], 4), 'calls': calls},
+        'companies_per_call': round(len(companies) / calls, 2) if calls else 0,
+        'companies_per_dollar': round(len(companies) / usage['cost_usd'], 1) if usage['cost_usd'] else 0,
+    }
+
+
+if __name__ == "__main__":
+    from batch_reports import read_watchlist
+
+    arg_parser = argparse.ArgumentParser(description="One-pass AI verdicts and ranking for a whole sector")
+    arg_parser.add_argument("sector", help="Sector name used as shared context, e.g. 'Semiconductors'")
+    arg_parser.add_argument("tickers", nargs="*", help="Tickers to cover")
+    arg_parser.add_argument("--watchlist", help="Also cover every ticker and peer in this watchlist file")
+    arg_parser.add_argument("--batch-size", type=int, default=25)
+    arg_parser.add_argument("--out", help="Write the summary as JSON to this path")
+    args = arg_parser.parse_args()
+
+    tickers = list(args.tickers)
+    if args.watchlist:
+        tickers += [symbol for ticker, peers in read_watchlist(args.watchlist) for symbol in (ticker, *peers)]
+    if not tickers:
+        arg_parser.error("no tickers given")
+
+    summary = sweep_sector(args.sector, tickers, batch_size=args.batch_size)
+
+    print("\n" + "="*60)
+    for view in summary['sector_views']:
+        print(view)
+    print()
+    for rank, ticker in enumerate(summary['ranking'], 1):
+        row = summary['companies'][ticker]
+        print(f"{rank:>3}. {ticker:<6} {str(row['verdict']).upper():<6} {row['score']!s:>3}/10  {row['thesis']}")
+    for error in summary['errors']:
+        print(f"❌ {error}")
+    if summary['unanalyzed']:
+        print(f"❌ Not analyzed: {', '.join(summary['unanalyzed'])}")
+
+    usage = summary['usage']
+    print(f"\n{len(summary['companies'])} companies in {usage['calls']} calls "
+          f"({summary['companies_per_call']} companies/call vs {1 / PIPELINE_CALLS_PER_TICKER:.1f} for the per-ticker pipeline)")
+    print(f"Tokens: {usage['input_tokens']:,} in / {usage['output_tokens']:,} out  "
+          f"Cost: ${usage['cost_usd']:.4f} ({summary['companies_per_dollar']} companies/$)  Wall time: {summary['wall_s']:.1f}s")
+    print("="*60)
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"Summary: {args.out}")
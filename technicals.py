@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+# Return horizons in trading days
+HORIZONS = {'1w': 5, '1m': 21, '3m': 63, '6m': 126, '1y': 252}
+MOVING_AVERAGES = (20, 50, 200)
+RSI_PERIOD = 14
+VOLUME_WINDOW = 63
+TRADING_DAYS = 252
+
+# Column -> display label; fractions are shown as percentages
+TECHNICAL_LABELS = {
+    **{f'return_{name}': f'{name.upper()} Return' for name in HORIZONS},
+    'volatility_1m': '1M Volatility',
+    'volatility_3m': '3M Volatility',
+    'max_drawdown': 'Max Drawdown',
+    'rsi': f'RSI({RSI_PERIOD})',
+    **{f'vs_ma{window}': f'vs {window}D MA' for window in MOVING_AVERAGES},
+    'volume_z': 'Volume Z',
+}
+UNITLESS = ('rsi', 'volume_z')
+
+
+def compute_technicals(close, volume=None):
+    """
+    Technical statistics for every ticker at once
+    close, volume: wide DataFrames (dates x tickers), NaN where a ticker has no bar
+    Every statistic is a column-wise array operation, so cost grows with bars, not Python loops
+    Returns: DataFrame indexed by ticker with the TECHNICAL_LABELS columns
+    """
+    prices = close.to_numpy(dtype=np.float64)
+    last = _last_valid(prices)
+    stats = {}
+
+    for name, days in HORIZONS.items():
+        past = prices[-days - 1] if len(prices) > days else np.full(prices.shape[1], np.nan)
+        stats[f'return_{name}'] = last / past - 1
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        log_returns = np.diff(np.log(prices), axis=0)
+    stats['volatility_1m'] = _nanstd(log_returns[-21:]) * np.sqrt(TRADING_DAYS)
+    stats['volatility_3m'] = _nanstd(log_returns[-63:]) * np.sqrt(TRADING_DAYS)
+
+    running_peak = np.fmax.accumulate(prices, axis=0)
+    stats['max_drawdown'] = np.nanmin(prices / running_peak - 1, axis=0)
+
+    # Wilder's RSI: exponential averages of gains and losses with alpha = 1/period
+    changes = close.diff()
+    gains = changes.clip(lower=0).ewm(alpha=1 / RSI_PERIOD, min_periods=RSI_PERIOD).mean().iloc[-1]
+    losses = (-changes.clip(upper=0)).ewm(alpha=1 / RSI_PERIOD, min_periods=RSI_PERIOD).mean().iloc[-1]
+    stats['rsi'] = (100 - 100 / (1 + gains / losses)).to_numpy()
+
+    for window in MOVING_AVERAGES:
+        average = np.nanmean(prices[-window:], axis=0) if len(prices) >= window else np.full(prices.shape[1], np.nan)
+        stats[f'vs_ma{window}'] = last / average - 1
+
+    if volume is not None:
+        volumes = volume.to_numpy(dtype=np.float64)
+        trailing = volumes[-VOLUME_WINDOW - 1:-1]
+        stats['volume_z'] = (_last_valid(volumes) - np.nanmean(trailing, axis=0)) / _nanstd(trailing)
+    else:
+        stats['volume_z'] = np.full(prices.shape[1], np.nan)
+
+    return pd.DataFrame(stats, index=close.columns)
+
+
+def _last_valid(values):
+    """Last non-NaN value of each column"""
+    filled = pd.DataFrame(values).ffill().to_numpy()
+    return filled[-1] if len(filled) else np.full(values.shape[1], np.nan)
+
+
+def _nanstd(values):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std = np.nanstd(values, axis=0, ddof=1) if len(values) > 1 else np.full(values.shape[1], np.nan)
+    return np.where(std > 0, std, np.nan)
+
+
+def technicals_by_ticker(technicals):
+    """Returns: dict ticker -> {stat: float or 'N/A'} for prompts and session state"""
+    cleaned = technicals.round(4).astype(object).where(technicals.notna(), 'N/A')
+    return cleaned.to_dict('index')
+
+
+def format_technical(column, value):
+    """Display string for one statistic"""
+    if not isinstance(value, (int, float)):
+        return 'N/A'
+    if column in UNITLESS:
+        return f"{value:.1f}" if column == 'rsi' else f"{value:+.2f}"
+    return f"{value * 100:+.2f}%" if column.startswith(('return_', 'vs_ma', 'max_')) else f"{value * 100:.1f}%"
+
+
+if __name__ == "__main__":
+    import time
+
+    # Synthetic universe: one year of daily bars for 3000 tickers
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range(end=pd.Timestamp.today(), periods=TRADING_DAYS + 1)
+    tickers = [f"T{i:04d}" for i in range(3000)]
+    close = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.02, (len(dates), len(tickers))), axis=0)), dates, tickers)
+    volume = pd.DataFrame(rng.lognormal(14, 0.5, (len(dates), len(tickers))), dates, tickers)
+
+    start = time.perf_counter()
+    technicals = compute_technicals(close, volume)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    print(f"Technicals for {len(tickers)} tickers x {len(dates)} bars in {elapsed_ms:.1f} ms")
+    print(technicals.head().round(3).to_string())
@@ -0,0 +1,61 @@
+import re
+import zlib
+import hashlib
+import numpy as np
+
+# MinHash parameters: 64 permutations split into 32 LSH bands of 2 rows.
+# A pair with Jaccard s shares a band with probability 1 - (1 - s^2)^32:
+# ~0.999 at 0.5 (the sec_diff / news_store threshold), ~0.95 at 0.3.
+# (16 bands of 4 rows gave only ~0.64 at 0.5.)
+NUM_PERM = 64
+BANDS = 32
+MERSENNE_PRIME = (1 << 31) - 1
+
+_rng = np.random.RandomState(1729)
+_PERM_A = _rng.randint(1, MERSENNE_PRIME, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, MERSENNE_PRIME, size=NUM_PERM).astype(np.uint64)
+
+
+def normalize(text):
+    """Lowercase, strip punctuation and collapse whitespace"""
+    return ' '.join(re.findall(r"[a-z0-9]+", (text or '').lower()))
+
+
+def exact_hash(text):
+    """Stable hash of the normalized text, for exact-duplicate matching"""
+    return hashlib.sha1(normalize(text).encode('utf-8')).hexdigest()
+
+
+def shingles(text, size=5):
+    """Word n-gram shingles of the normalized text"""
+    words = normalize(text).split()
+    if len(words) < size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash(text, size=5):
+    """
+    MinHash signature over word shingles
+    Returns: numpy array of NUM_PERM uint64 values (stable across processes)
+    """
+    shingle_set = shingles(text, size)
+    if not shingle_set:
+        return np.full(NUM_PERM, MERSENNE_PRIME, dtype=np.uint64)
+
+    base = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingle_set),
+                       dtype=np.uint64, count=len(shingle_set))
+    hashed = (_PERM_A[:, None] * base[None, :] + _PERM_B[:, None]) % MERSENNE_PRIME
+    return hashed.min(axis=1)
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    return float(np.mean(sig_a == sig_b))
+
+
+def lsh_keys(signature):
+    """Band keys for locality-sensitive bucketing of a signature"""
+    rows = NUM_PERM // BANDS
+    return [f"{band}:{signature[band * rows:(band + 1) * rows].tobytes().hex()}"
+            for band in range(BANDS)]